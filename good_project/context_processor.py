@@ -1,8 +1,16 @@
 from datetime import datetime
+from django.utils.functional import SimpleLazyObject
 
 
 def get_current_year_context_processor(request):
     current_year = datetime.now().year
     return {
         'current_year': current_year
-    }
\ No newline at end of file
+    }
+
+def favorite_ids_context_processor(request):
+    # Perezoso: solo se consulta (y cachea) si la plantilla pinta el estado de favorita
+    from utils.favorites import get_favorite_ids
+    return {
+        'favorite_ids': SimpleLazyObject(lambda: get_favorite_ids(request.user))
+    }
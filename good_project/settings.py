@@ -77,6 +77,7 @@ TEMPLATES = [
                 'django.contrib.messages.context_processors.messages',
                 'django.template.context_processors.i18n',
                 'good_project.context_processor.get_current_year_context_processor',
+                'good_project.context_processor.favorite_ids_context_processor',
                 'django.template.context_processors.media',
             ],
         },
@@ -98,6 +99,14 @@ DATABASES = {
     }
 }
 
+# Memoria local por defecto, solo válida con un único proceso. En producción (servidor web
+# más translation_worker) hace falta un caché compartido: las invalidaciones de páginas,
+# estanterías y arrays de ids tienen que llegar a todos. Ver el aviso recipes.W001.
+# p. ej. CACHE_URL=redis://127.0.0.1:6379/1 o pymemcache://127.0.0.1:11211
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
 MESSAGE_TAGS = {
     messages.DEBUG: 'debug',
     messages.INFO: 'info',
@@ -1,7 +1,12 @@
 from django.contrib import admin
 from parler.admin import TranslatableAdmin
-from .models import Category, CookingMethod, Allergen, Ingredient, Recipe, RecipeIngredient, CuisineType
+from .models import Category, CookingMethod, Allergen, Ingredient, Recipe, RecipeIngredient, CuisineType, TranslationJob, TranslationMemory, SlugRegistry
 from django.db.models import Count
+from django.http import StreamingHttpResponse
+from django.template.response import TemplateResponse
+from django.urls import path
+from utils.profiling import SLOW_SAVE_MS, get_recent_profiles
+from utils.recipe_documents import iter_ndjson
   
 
 class RecipeIngredientInline(admin.TabularInline):
@@ -54,7 +59,55 @@ class RecipeAdmin(TranslatableAdmin):
     search_fields = ['translations__title']
     list_editable = ('featured',)
     autocomplete_fields = ['ingredients', 'allergens', 'category', 'author']
+    actions = ['export_ndjson']
 
     def display_meal_types(self, obj):
         return ", ".join([str(mt) for mt in obj.meal_types.all()])
-    display_meal_types.short_description = 'Meal Types'
\ No newline at end of file
+    display_meal_types.short_description = 'Meal Types'
+
+    @admin.action(description="Exportar seleccionadas (NDJSON)")
+    def export_ndjson(self, request, queryset):
+        # Respuesta en streaming: la exportación no se construye entera en memoria
+        response = StreamingHttpResponse(iter_ndjson(queryset), content_type='application/x-ndjson')
+        response['Content-Disposition'] = 'attachment; filename="recipes.ndjson"'
+        return response
+
+    def get_urls(self):
+        urls = [
+            path('save-profiles/', self.admin_site.admin_view(self.save_profiles_view), name='recipes_recipe_save_profiles'),
+        ]
+        return urls + super().get_urls()
+
+    def save_profiles_view(self, request):
+        # Últimos guardados medidos por utils.profiling en este proceso
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Tiempos de guardado de recetas',
+            'profiles': get_recent_profiles(),
+            'slow_ms': SLOW_SAVE_MS,
+        }
+        return TemplateResponse(request, 'admin/recipes/save_profiles.html', context)
+
+
+@admin.register(TranslationJob)
+class TranslationJobAdmin(admin.ModelAdmin):
+    list_display = ['recipe', 'source_lang', 'status', 'pending_langs', 'attempts', 'run_after', 'updated_at']
+    list_filter = ['status', 'source_lang']
+    readonly_fields = ['created_at', 'updated_at']
+    raw_id_fields = ['recipe']
+
+
+@admin.register(TranslationMemory)
+class TranslationMemoryAdmin(admin.ModelAdmin):
+    list_display = ['source_text', 'source_lang', 'target_lang', 'translated_text', 'hits', 'last_used_at']
+    list_filter = ['source_lang', 'target_lang']
+    search_fields = ['source_text', 'translated_text']
+    readonly_fields = ['text_hash', 'created_at']
+
+
+@admin.register(SlugRegistry)
+class SlugRegistryAdmin(admin.ModelAdmin):
+    list_display = ['slug', 'model_label', 'language_code', 'object_id', 'created_at']
+    list_filter = ['model_label', 'language_code']
+    search_fields = ['slug']
@@ -6,4 +6,6 @@ class RecipesConfig(AppConfig):
     name = 'recipes'
 
     def ready(self):
-        import recipes.signals
\ No newline at end of file
+        # Comprobaciones del caché compartido y receptores de slugs, traducciones, contadores y cachés
+        import recipes.checks  # noqa: F401
+        import recipes.receivers  # noqa: F401
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Tags, Warning, register
+
+
+def default_cache_is_local():
+    """True si el caché por defecto es la memoria de cada proceso (CACHE_URL sin definir)."""
+    return isinstance(caches['default'], LocMemCache)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    # Las versiones de páginas de detalle, fichas, estanterías, arrays de ids y favoritas viven
+    # en el caché: si es local, lo que invalida un proceso (p. ej. translation_worker) no llega a los demás
+    if settings.DEBUG or not default_cache_is_local():
+        return []
+    return [Warning(
+        "El caché por defecto es local a cada proceso: las invalidaciones no se comparten entre procesos.",
+        hint="Define CACHE_URL con un caché compartido (redis://..., pymemcache://...).",
+        id='recipes.W001',
+    )]
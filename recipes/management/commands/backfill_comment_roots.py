@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from recipes.models import Comment
+
+
+class Command(BaseCommand):
+    help = (
+        "Rellena Comment.root en las respuestas creadas antes de existir el campo. "
+        "Lee (id, parent_id) de todas las respuestas, resuelve la raíz en memoria y escribe por bloques."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help="Solo cuenta las respuestas sin raíz.")
+
+    def handle(self, *args, **options):
+        pending = Comment.objects.filter(parent__isnull=False, root__isnull=True)
+        total = pending.count()
+        if not total or options['dry_run']:
+            self.stdout.write(f"{total} respuestas sin raíz.")
+            return
+
+        # padre de cada respuesta (los comentarios raíz no aparecen: son su propia raíz)
+        parents = dict(Comment.objects.filter(parent__isnull=False).values_list('id', 'parent_id').iterator(chunk_size=5000))
+
+        def find_root(comment_id):
+            seen = set()
+            while comment_id in parents and comment_id not in seen:
+                seen.add(comment_id)
+                comment_id = parents[comment_id]
+            return comment_id
+
+        batch_size = options['batch_size']
+        updated = 0
+        ids = list(pending.values_list('id', flat=True))
+        for start in range(0, len(ids), batch_size):
+            batch = [Comment(id=pk, root_id=find_root(pk)) for pk in ids[start:start + batch_size]]
+            with transaction.atomic():
+                Comment.objects.bulk_update(batch, ['root'])
+            updated += len(batch)
+            self.stdout.write(f"{updated}/{total}")
+
+        self.stdout.write(self.style.SUCCESS(f"{updated} respuestas enlazadas a su comentario raíz."))
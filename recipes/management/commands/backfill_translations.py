@@ -0,0 +1,215 @@
+import json
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from recipes.models import (
+    TRANSLATION_LANGS,
+    Allergen,
+    Category,
+    CookingMethod,
+    CuisineType,
+    Ingredient,
+    IngredientCategory,
+    MealType,
+    Recipe,
+    Tag,
+    Theme,
+    Unit,
+)
+from utils.services import bulk_write_translations, generate_unique_slugs
+from utils.translation import (
+    TranslationClient,
+    TranslationUnavailable,
+    get_translation_client,
+    handle_translations_for_recipe,
+    set_translation_client,
+)
+from utils.translation_memory import TranslationCache
+
+TRANSLATED_MODELS = [
+    Recipe, Ingredient, Category, CuisineType, Tag, MealType,
+    Allergen, CookingMethod, Theme, Unit, IngredientCategory,
+]
+
+MISSING = 'missing'
+UNTRANSLATED = 'untranslated'
+
+
+class Command(BaseCommand):
+    help = (
+        "Busca recetas, ingredientes y taxonomías sin traducción (o con una copia del texto original) "
+        "y las traduce por bloques, guardando el progreso para poder reanudar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--models', help="Modelos a revisar, separados por comas (por defecto, todos).")
+        parser.add_argument('--languages', help="Idiomas a completar, separados por comas (por defecto, TRANSLATION_LANGS).")
+        parser.add_argument('--chunk-size', type=int, default=200)
+        parser.add_argument('--workers', type=int, default=8, help="Peticiones de traducción en paralelo.")
+        parser.add_argument('--checkpoint', default=os.path.join(settings.BASE_DIR, '.backfill_translations.json'))
+        parser.add_argument('--reset', action='store_true', help="Ignora el checkpoint y empieza desde el principio.")
+        parser.add_argument('--dry-run', action='store_true', help="Solo cuenta lo que falta por idioma, sin traducir.")
+
+    def handle(self, *args, **options):
+        models = TRANSLATED_MODELS
+        if options['models']:
+            names = {name.strip().lower() for name in options['models'].split(',')}
+            models = [model for model in TRANSLATED_MODELS if model.__name__.lower() in names]
+            if not models:
+                raise CommandError(f"Ningún modelo coincide con: {options['models']}")
+
+        languages = TRANSLATION_LANGS
+        if options['languages']:
+            languages = [lang.strip() for lang in options['languages'].split(',') if lang.strip() in TRANSLATION_LANGS]
+
+        self.dry_run = options['dry_run']
+        self.checkpoint_path = options['checkpoint']
+        self.checkpoint = {} if options['reset'] or self.dry_run else self._load_checkpoint()
+
+        previous = None
+        if not self.dry_run:
+            previous = set_translation_client(TranslationClient(max_workers=options['workers'], memory=TranslationCache()))
+
+        try:
+            for model in models:
+                counts = self._process_model(model, languages, options['chunk_size'])
+                self._report(model, counts)
+        finally:
+            if not self.dry_run:
+                set_translation_client(previous)
+
+        if not self.dry_run and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+    def _process_model(self, model, languages, chunk_size):
+        label = model._meta.label
+        last_pk = self.checkpoint.get(label, 0)
+        counts = {lang: {MISSING: 0, UNTRANSLATED: 0} for lang in languages}
+        counts['pending'] = 0
+
+        while True:
+            chunk = list(
+                model.objects.filter(pk__gt=last_pk).order_by('pk').prefetch_related('translations')[:chunk_size]
+            )
+            if not chunk:
+                break
+
+            work = []
+            for obj in chunk:
+                source_lang, gaps = self._find_gaps(model, obj, languages)
+                for lang, kind in gaps.items():
+                    counts[lang][kind] += 1
+                if gaps:
+                    work.append((obj, source_lang, list(gaps)))
+
+            if not self.dry_run and work:
+                if model is Recipe:
+                    counts['pending'] += self._translate_recipes(work)
+                else:
+                    counts['pending'] += self._translate_objects(model, work)
+
+            last_pk = chunk[-1].pk
+            if not self.dry_run:
+                self._save_checkpoint(label, last_pk)
+
+        return counts
+
+    def _find_gaps(self, model, obj, languages):
+        """Devuelve (idioma origen, {idioma: 'missing' | 'untranslated'})."""
+        rows = {tr.language_code: tr for tr in obj.translations.all()}
+        if not rows:
+            return None, {}
+
+        field = 'title' if model is Recipe else 'name'
+        preferred = obj.source_lang if model is Recipe else settings.PARLER_DEFAULT_LANGUAGE_CODE
+        source_lang = preferred if preferred in rows else next(
+            (lang for lang in TRANSLATION_LANGS if lang in rows), next(iter(rows))
+        )
+        source_text = getattr(rows[source_lang], field)
+
+        gaps = {}
+        for lang in languages:
+            if lang == source_lang:
+                continue
+            row = rows.get(lang)
+            if row is None or not getattr(row, field):
+                gaps[lang] = MISSING
+            elif getattr(row, field) == source_text:
+                gaps[lang] = UNTRANSLATED
+        return source_lang, gaps
+
+    def _translate_recipes(self, work):
+        pending = 0
+        for recipe, source_lang, langs in work:
+            recipe.set_current_language(source_lang)
+            try:
+                handle_translations_for_recipe(recipe, source_lang, target_langs=langs)
+            except TranslationUnavailable as e:
+                pending += len(e.languages)
+        return pending
+
+    def _translate_objects(self, model, work):
+        translation_model = model._parler_meta.root_model
+        field_names = [f.name for f in translation_model._meta.concrete_fields]
+        text_fields = [name for name in field_names if name not in ('id', 'master', 'language_code', 'slug')]
+        has_slug = 'slug' in field_names
+
+        client_items, targets = [], []
+        for obj, source_lang, langs in work:
+            source_row = next(tr for tr in obj.translations.all() if tr.language_code == source_lang)
+            for lang in langs:
+                for field in text_fields:
+                    text = getattr(source_row, field) or ''
+                    targets.append((obj.pk, lang, field, text))
+                    client_items.append((text, source_lang, lang))
+
+        results = get_translation_client().translate_batch(client_items)
+
+        values, failed = {}, set()
+        for (pk, lang, field, text), translated in zip(targets, results):
+            if text and translated is None:
+                failed.add((pk, lang))
+                continue
+            values.setdefault((pk, lang), {})[field] = translated or ''
+
+        # Una traducción a medias no se guarda: queda pendiente para la próxima ejecución
+        for key in failed:
+            values.pop(key, None)
+
+        if has_slug:
+            by_lang = {}
+            for (pk, lang), data in values.items():
+                by_lang.setdefault(lang, []).append((pk, data))
+            for lang, rows in by_lang.items():
+                slugs = generate_unique_slugs(model, [data['name'] for _, data in rows], lang, [pk for pk, _ in rows])
+                for (_, data), slug in zip(rows, slugs):
+                    data['slug'] = slug
+
+        bulk_write_translations(model, values)
+        return len(failed)
+
+    def _load_checkpoint(self):
+        if not os.path.exists(self.checkpoint_path):
+            return {}
+        with open(self.checkpoint_path) as f:
+            checkpoint = json.load(f)
+        self.stdout.write(f"Reanudando desde {self.checkpoint_path}: {checkpoint}")
+        return checkpoint
+
+    def _save_checkpoint(self, label, last_pk):
+        self.checkpoint[label] = last_pk
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.checkpoint, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _report(self, model, counts):
+        pending = counts.pop('pending')
+        summary = ', '.join(
+            f"{lang}: {c[MISSING]} sin traducción / {c[UNTRANSLATED]} copia del original"
+            for lang, c in counts.items() if c[MISSING] or c[UNTRANSLATED]
+        )
+        line = f"{model.__name__}: {summary or 'completo'}"
+        if not self.dry_run and pending:
+            line += f" ({pending} pendiente(s) por fallos del traductor)"
+        self.stdout.write(line)
@@ -0,0 +1,143 @@
+import asyncio
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from statistics import median, quantiles
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from django.urls import reverse
+from django.utils import translation
+from recipes.models import Recipe
+
+ENDPOINTS = ['random', 'favorite', 'rate', 'comment']
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el rendimiento de los endpoints JSON (receta aleatoria, favorita, valoración y comentario) "
+        "servidos por el manejador WSGI (hilos) y por el ASGI (corrutinas) en este mismo proceso. "
+        "Crea usuarios de prueba y los borra al terminar; las valoraciones, favoritas y comentarios "
+        "que generan se borran con ellos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help="Peticiones por endpoint y modo.")
+        parser.add_argument('--concurrency', type=int, default=20, help="Hilos (WSGI) o corrutinas (ASGI) simultáneos.")
+        parser.add_argument('--endpoints', default=','.join(ENDPOINTS), help=f"Separados por comas: {', '.join(ENDPOINTS)}.")
+        parser.add_argument('--language', default='es')
+
+    def handle(self, *args, **options):
+        endpoints = [name.strip() for name in options['endpoints'].split(',') if name.strip()]
+        unknown = set(endpoints) - set(ENDPOINTS)
+        if unknown:
+            raise CommandError(f"Endpoints desconocidos: {', '.join(sorted(unknown))}")
+
+        lang = options['language']
+        translation.activate(lang)
+        recipe = Recipe.objects.language(lang).filter(translations__language_code=lang).exclude(photo='').first()
+        if recipe is None:
+            raise CommandError(f"No hay recetas con foto en '{lang}' con las que medir.")
+        slug = recipe.safe_translation_getter('slug', language_code=lang)
+
+        # Usuarios nuevos en cada pasada (uno por petición concurrente): el formulario limita
+        # los comentarios por usuario y receta, y así las dos pasadas parten del mismo estado
+        token = uuid.uuid4().hex[:8]
+        created = []
+
+        def make_users(prefix):
+            users = [
+                get_user_model().objects.create(username=f"{prefix}-{n}", email=f"{prefix}-{n}@example.com")
+                for n in range(options['concurrency'])
+            ]
+            created.extend(user.pk for user in users)
+            return users
+
+        self.requests = self._build_requests(slug)
+
+        rows = []
+        try:
+            for name in endpoints:
+                for mode, run in (('wsgi', self._run_wsgi), ('asgi', self._run_asgi)):
+                    users = make_users(f"bench-{token}-{name}-{mode}")
+                    rows.append((name, mode, *run(name, users, options['requests'])))
+        finally:
+            get_user_model().objects.filter(pk__in=created).delete()
+
+        self._report(rows)
+
+    def _build_requests(self, slug):
+        # URLs resueltas aquí: el idioma activo no se hereda en los hilos del pool
+        urls = {
+            'random': reverse('recipes:random_recipe_json'),
+            'favorite': reverse('recipes:toggle_favorite'),
+            'rate': reverse('recipes:rate_recipe', kwargs={'slug': slug}),
+            'comment': reverse('recipes:add_comment', kwargs={'slug': slug}),
+        }
+        json_headers = {'headers': {'Accept': 'application/json'}}
+        return {
+            'random': lambda n: ('get', urls['random'], {}, {}),
+            'favorite': lambda n: ('post', urls['favorite'], {'slug': slug}, {}),
+            'rate': lambda n: ('post', urls['rate'], {'rating': n % 5 + 1}, json_headers),
+            'comment': lambda n: ('post', urls['comment'], {'content': f"Comentario de prueba número {n}"}, json_headers),
+        }
+
+    def _run_wsgi(self, name, users, total):
+        clients = []
+        for user in users:
+            client = Client(raise_request_exception=False)
+            client.force_login(user)
+            clients.append(client)
+
+        def call(n):
+            method, url, data, extra = self.requests[name](n)
+            start = time.perf_counter()
+            response = getattr(clients[n % len(clients)], method)(url, data, **extra)
+            return time.perf_counter() - start, response.status_code
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(clients)) as pool:
+            results = list(pool.map(call, range(total)))
+        return self._summary(start, results)
+
+    def _run_asgi(self, name, users, total):
+        async def run():
+            clients = []
+            for user in users:
+                client = AsyncClient(raise_request_exception=False)
+                await client.aforce_login(user)
+                clients.append(client)
+            semaphore = asyncio.Semaphore(len(clients))
+
+            async def call(n):
+                method, url, data, extra = self.requests[name](n)
+                async with semaphore:
+                    start = time.perf_counter()
+                    response = await getattr(clients[n % len(clients)], method)(url, data, **extra)
+                    return time.perf_counter() - start, response.status_code
+
+            start = time.perf_counter()
+            results = await asyncio.gather(*(call(n) for n in range(total)))
+            return start, results
+
+        start, results = asyncio.run(run())
+        return self._summary(start, results)
+
+    def _summary(self, start, results):
+        elapsed = time.perf_counter() - start
+        latencies = [latency for latency, _ in results]
+        # 4xx: validaciones (p. ej. el límite de comentarios por usuario y receta); 5xx: fallos
+        rejected = sum(1 for _, status in results if 400 <= status < 500)
+        errors = sum(1 for _, status in results if status >= 500)
+        return elapsed, latencies, rejected, errors
+
+    def _report(self, rows):
+        self.stdout.write(
+            f"{'endpoint':<10} {'modo':<5} {'peticiones/s':>13} {'p50 ms':>8} {'p95 ms':>8} {'4xx':>6} {'5xx':>6}"
+        )
+        for name, mode, elapsed, latencies, rejected, errors in rows:
+            p95 = quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+            self.stdout.write(
+                f"{name:<10} {mode:<5} {len(latencies) / elapsed:>13.1f} "
+                f"{median(latencies) * 1000:>8.1f} {p95 * 1000:>8.1f} {rejected:>6} {errors:>6}"
+            )
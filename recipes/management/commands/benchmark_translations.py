@@ -0,0 +1,128 @@
+import time
+import uuid
+from statistics import mean
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from recipes.models import Ingredient, Recipe, RecipeIngredient
+from utils.translation import (
+    RECIPE_FIELDS,
+    TRANSLATE_API_URL,
+    TranslationClient,
+    TranslationUnavailable,
+    handle_translations_for_recipe,
+    set_translation_client,
+)
+from utils.translation_memory import TranslationCache
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide handle_translations_for_recipe sobre recetas sintéticas: tiempo, llamadas HTTP "
+        "y consultas por guardado. Todo se hace en una transacción que se deshace al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default=TRANSLATE_API_URL, help="Endpoint /translate (p. ej. el de fake_translate_server).")
+        parser.add_argument('--sizes', default='1,5,20', help="Número de párrafos por campo, separados por comas.")
+        parser.add_argument('--ingredients', type=int, default=10, help="Ingredientes nuevos por receta.")
+        parser.add_argument('--recipes', type=int, default=3, help="Recetas por tamaño.")
+        parser.add_argument('--source-lang', default='es')
+        parser.add_argument('--no-memory', action='store_true', help="Desactiva la memoria de traducción.")
+        parser.add_argument('--update', action='store_true', help="Mide también una edición de un párrafo por receta.")
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        source_lang = options['source_lang']
+
+        memory = None if options['no_memory'] else TranslationCache()
+        self.client = TranslationClient(api_url=options['url'], memory=memory)
+        previous = set_translation_client(self.client)
+
+        rows = []
+        try:
+            with transaction.atomic():
+                token = uuid.uuid4().hex[:8]
+                author = get_user_model().objects.create(username=f"benchmark-{token}", email=f"benchmark-{token}@example.com")
+
+                for size in sizes:
+                    for n in range(options['recipes']):
+                        recipe = self._make_recipe(author, size, options['ingredients'], source_lang, f"{token}-{size}-{n}")
+                        rows.append(self._measure('create', size, lambda: handle_translations_for_recipe(recipe, source_lang)))
+
+                        if options['update']:
+                            recipe.set_current_language(source_lang)
+                            original_data = {field: getattr(recipe, field) for field in RECIPE_FIELDS}
+                            recipe.instructions = recipe.instructions.replace('Paso 0 ', 'Paso cero ', 1)
+                            recipe.save()
+                            rows.append(self._measure(
+                                'update', size,
+                                lambda: handle_translations_for_recipe(recipe, source_lang, original_data=original_data),
+                            ))
+
+                transaction.set_rollback(True)
+        finally:
+            set_translation_client(previous)
+
+        self._report(rows, memory)
+
+    def _make_recipe(self, author, size, ingredients, source_lang, token):
+        paragraphs = lambda field: ''.join(
+            f"<p>Paso {i} ({field} {token}): mezclar los ingredientes y cocinar a fuego lento.</p>" for i in range(size)
+        )
+        recipe = Recipe(author=author, difficulty='easy', prep_time=10, source_lang=source_lang)
+        recipe.set_current_language(source_lang)
+        recipe.title = f"Receta de prueba {token}"
+        recipe.slug = f"receta-de-prueba-{token}"
+        recipe.description = paragraphs('description')
+        recipe.instructions = paragraphs('instructions')
+        recipe.tips = paragraphs('tips')
+        recipe.save()
+
+        for order in range(ingredients):
+            ingredient = Ingredient()
+            ingredient.set_current_language(source_lang)
+            ingredient.name = f"ingrediente {token} {order}"
+            ingredient.slug = f"ingrediente-{token}-{order}"
+            ingredient.save()
+            RecipeIngredient.objects.create(recipe=recipe, ingredient=ingredient, order=order)
+        return recipe
+
+    def _measure(self, kind, size, func):
+        calls_before = self.client.http_calls
+        pending = 0
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            try:
+                func()
+            except TranslationUnavailable as e:
+                pending = len(e.languages)
+            elapsed = time.perf_counter() - start
+
+        return {
+            'kind': kind,
+            'size': size,
+            'ms': elapsed * 1000,
+            'http': self.client.http_calls - calls_before,
+            'queries': len(queries),
+            'pending': pending,
+        }
+
+    def _report(self, rows, memory):
+        self.stdout.write(f"{'tipo':<8}{'párrafos':>10}{'ms':>10}{'http':>8}{'consultas':>11}{'pendientes':>12}")
+        for row in rows:
+            self.stdout.write(
+                f"{row['kind']:<8}{row['size']:>10}{row['ms']:>10.0f}{row['http']:>8}{row['queries']:>11}{row['pending']:>12}"
+            )
+
+        self.stdout.write('')
+        for kind in ('create', 'update'):
+            subset = [row for row in rows if row['kind'] == kind]
+            if subset:
+                self.stdout.write(self.style.SUCCESS(
+                    f"{kind}: {len(subset)} guardado(s), media {mean(r['ms'] for r in subset):.0f} ms, "
+                    f"{mean(r['http'] for r in subset):.1f} llamadas HTTP, {mean(r['queries'] for r in subset):.1f} consultas"
+                ))
+        if memory:
+            self.stdout.write(f"Memoria de traducción: {memory.stats}")
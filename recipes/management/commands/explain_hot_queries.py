@@ -0,0 +1,78 @@
+import json
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from recipes.models import Comment, Favorite, Ingredient, Recipe
+
+
+class Command(BaseCommand):
+    help = (
+        "Muestra el EXPLAIN de las consultas más frecuentes (detalle, búsqueda, ingredientes, "
+        "comentarios, valoraciones y favoritos). Para comparar antes/después de migrar índices: "
+        "--save plan.json antes y --compare plan.json después."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--language', default=settings.PARLER_DEFAULT_LANGUAGE_CODE)
+        parser.add_argument('--save', help="Guarda los planes en este fichero JSON.")
+        parser.add_argument('--compare', help="Muestra junto a cada plan el guardado previamente en este fichero.")
+
+    def handle(self, *args, **options):
+        lang = options['language']
+        recipe = Recipe.objects.language(lang).filter(translations__language_code=lang).first()
+        if recipe is None:
+            raise CommandError(f"No hay recetas en '{lang}' con las que construir las consultas.")
+
+        previous = {}
+        if options['compare']:
+            with open(options['compare']) as f:
+                previous = json.load(f)
+
+        plans = {}
+        for name, queryset in self._hot_queries(recipe, lang):
+            plans[name] = queryset.explain()
+
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            if name in previous:
+                self.stdout.write(self.style.WARNING("antes:"))
+                self.stdout.write(previous[name])
+                self.stdout.write(self.style.SUCCESS("ahora:"))
+            self.stdout.write(plans[name])
+            self.stdout.write('')
+
+        if options['save']:
+            with open(options['save'], 'w') as f:
+                json.dump(plans, f, indent=2, ensure_ascii=False)
+            self.stdout.write(f"Planes guardados en {options['save']}")
+
+    def _hot_queries(self, recipe, lang):
+        slug = recipe.safe_translation_getter('slug', language_code=lang) or ''
+        title = recipe.safe_translation_getter('title', language_code=lang) or ''
+        ingredient = Ingredient.objects.language(lang).filter(translations__language_code=lang).first()
+        ingredient_name = ingredient.safe_translation_getter('name', language_code=lang) if ingredient else ''
+        user_id = recipe.author_id
+
+        return [
+            ('recipe_detail (translations__slug)',
+             Recipe.objects.language(lang).filter(translations__slug=slug)),
+            ('search_recipes (title por idioma)',
+             Recipe.objects.filter(translations__language_code=lang, translations__title__icontains=title[:5])),
+            ('search_recipes (título exacto por idioma)',
+             Recipe.objects.filter(translations__language_code=lang, translations__title=title)),
+            ('search_recipes (ingrediente por idioma)',
+             Recipe.objects.filter(
+                 ingredients__translations__language_code=lang,
+                 ingredients__translations__name__icontains=ingredient_name[:4],
+             ).distinct()),
+            ('process_ingredients_formset (translations__name)',
+             Ingredient.objects.filter(translations__name=ingredient_name)),
+            ('recipe_detail (comentarios raíz)',
+             recipe.comments.select_related('user').filter(parent__isnull=True).order_by('-created_at', '-id')[:21]),
+            ('recipe_detail (respuestas por hilo)',
+             Comment.objects.filter(root__in=list(recipe.comments.filter(parent__isnull=True).values_list('id', flat=True)[:20])).order_by('root_id', 'created_at')),
+            ('recipe_list (mejor valoradas)',
+             Recipe.objects.top_rated()[:10]),
+            ('recipe_detail (¿favorita?)',
+             Favorite.objects.filter(recipe=recipe, user_id=user_id)),
+            ('recipe_list (recetas populares)',
+             Recipe.objects.most_favorited()[:10]),
+        ]
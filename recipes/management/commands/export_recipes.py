@@ -0,0 +1,37 @@
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from recipes.models import Recipe
+from utils.recipe_documents import iter_ndjson
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta las recetas a NDJSON, un documento autocontenido por línea (traducciones, taxonomías, "
+        "ingredientes y unidades), con memoria constante. La salida se puede volver a cargar con import_recipes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', '-o', default='-', help="Fichero de salida ('-' para la salida estándar).")
+        parser.add_argument('--chunk-size', type=int, default=500, help="Recetas por bloque leído de la base de datos.")
+        parser.add_argument('--ids', help="Solo estas recetas (ids separados por comas).")
+
+    def handle(self, *args, **options):
+        queryset = Recipe.objects.all()
+        if options['ids']:
+            try:
+                ids = [int(pk) for pk in options['ids'].split(',') if pk.strip()]
+            except ValueError:
+                raise CommandError(f"--ids debe ser una lista de ids numéricos separados por comas: {options['ids']}")
+            queryset = queryset.filter(pk__in=ids)
+
+        stream = sys.stdout if options['output'] == '-' else open(options['output'], 'w', encoding='utf-8')
+        count = 0
+        try:
+            for line in iter_ndjson(queryset, chunk_size=options['chunk_size']):
+                stream.write(line)
+                count += 1
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+
+        self.stderr.write(self.style.SUCCESS(f"{count} recetas exportadas"))
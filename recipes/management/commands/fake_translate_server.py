@@ -0,0 +1,89 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from django.core.management.base import BaseCommand
+from utils.throttling import TokenBucket
+
+
+class FakeTranslateHandler(BaseHTTPRequestHandler):
+    """Imita el endpoint /translate de LibreTranslate: devuelve el texto con el prefijo [idioma]."""
+
+    protocol_version = 'HTTP/1.1'  # keep-alive, como el servicio real
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if self.path.rstrip('/') != '/translate':
+            return self._send(404, {'error': 'Not found'})
+
+        server = self.server
+        with server.lock:
+            server.requests += 1
+
+        if not server.bucket.acquire(timeout=0):
+            return self._send(429, {'error': 'Too many requests'})
+
+        time.sleep(max(0.0, random.gauss(server.latency, server.jitter)))
+
+        if random.random() < server.error_rate:
+            return self._send(500, {'error': 'Simulated failure'})
+
+        try:
+            payload = json.loads(body)
+            q, target = payload['q'], payload['target']
+        except (ValueError, KeyError):
+            return self._send(400, {'error': 'Invalid request'})
+
+        if isinstance(q, list):
+            translated = [f"[{target}] {text}" for text in q]
+        else:
+            translated = f"[{target}] {q}"
+        self._send(200, {'translatedText': translated})
+
+    def _send(self, status, data):
+        content = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class Command(BaseCommand):
+    help = "Servidor local que imita LibreTranslate (/translate) con latencia, errores y límite de ritmo configurables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=5005)
+        parser.add_argument('--latency', type=float, default=200, help="Latencia media por petición en ms.")
+        parser.add_argument('--jitter', type=float, default=50, help="Desviación típica de la latencia en ms.")
+        parser.add_argument('--error-rate', type=float, default=0.0, help="Fracción de peticiones que responden 500 (0-1).")
+        parser.add_argument('--max-rps', type=float, default=0, help="Peticiones por segundo admitidas; el resto recibe 429 (0 = sin límite).")
+        parser.add_argument('--verbose', action='store_true', help="Muestra cada petición.")
+
+    def handle(self, *args, **options):
+        server = ThreadingHTTPServer((options['host'], options['port']), FakeTranslateHandler)
+        server.daemon_threads = True
+        server.latency = options['latency'] / 1000
+        server.jitter = options['jitter'] / 1000
+        server.error_rate = options['error_rate']
+        server.bucket = TokenBucket(options['max_rps'])
+        server.verbose = options['verbose']
+        server.lock = threading.Lock()
+        server.requests = 0
+
+        url = f"http://{options['host']}:{options['port']}/translate"
+        self.stdout.write(self.style.SUCCESS(f"Fake LibreTranslate en {url}"))
+        self.stdout.write(f"Usa TRANSLATE_API_URL={url} o benchmark_translations --url {url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"{server.requests} petición(es) atendida(s).")
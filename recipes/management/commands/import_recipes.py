@@ -0,0 +1,58 @@
+import sys
+import time
+from django.core.management.base import BaseCommand, CommandError
+from utils.recipe_documents import RecipeImporter, read_documents
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa recetas desde NDJSON (un documento por línea, el formato de export_recipes) o CSV, "
+        "por lotes y sin cargar el fichero en memoria. Los idiomas que falten se encolan para el worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Fichero a importar ('-' para la entrada estándar).")
+        parser.add_argument('--format', choices=['ndjson', 'csv'], help="Por defecto, según la extensión del fichero.")
+        parser.add_argument('--author', help="Usuario (username o email) para los documentos sin autor.")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--no-create-taxonomy', action='store_true', help="No crea categorías, etiquetas, unidades... que no existan.")
+        parser.add_argument('--no-translate', action='store_true', help="No encola trabajos de traducción para los idiomas que falten.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('csv' if path.lower().endswith('.csv') else 'ndjson')
+
+        importer = RecipeImporter(
+            default_author=options['author'],
+            batch_size=options['batch_size'],
+            create_taxonomy=not options['no_create_taxonomy'],
+            enqueue_translations=not options['no_translate'],
+        )
+
+        start = time.monotonic()
+
+        def progress(stats):
+            elapsed = time.monotonic() - start
+            rate = stats['imported'] / elapsed * 60 if elapsed else 0
+            self.stdout.write(f"{stats['imported']} importadas, {stats['skipped']} descartadas ({rate:.0f} recetas/min)")
+
+        try:
+            stream = sys.stdin if path == '-' else open(path, encoding='utf-8', newline='')
+        except OSError as e:
+            raise CommandError(str(e))
+
+        with stream:
+            stats = importer.import_documents(read_documents(stream, fmt), progress=progress)
+
+        for lineno, error in importer.errors[:20]:
+            self.stderr.write(f"línea {lineno}: {error}")
+        if len(importer.errors) > 20:
+            self.stderr.write(f"... y {len(importer.errors) - 20} errores más")
+
+        created = {field: resolver.created for field, resolver in importer.resolvers.items() if resolver.created}
+        created.update({'ingredients': importer.ingredients.created, 'units': importer.units.created})
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['imported']} recetas importadas en {time.monotonic() - start:.1f}s, "
+            f"{stats['skipped']} descartadas, {stats['jobs']} trabajos de traducción encolados. "
+            f"Creados: {', '.join(f'{k}={v}' for k, v in created.items() if v) or 'nada'}"
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from utils.translation_memory import TranslationCache
+
+
+class Command(BaseCommand):
+    help = "Elimina de la memoria de traducción las entradas que no se usan desde hace más del TTL."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ttl-days', type=int, default=None, help="TTL en días (por defecto TRANSLATION_MEMORY_TTL_DAYS).")
+
+    def handle(self, *args, **options):
+        cache = TranslationCache() if options['ttl_days'] is None else TranslationCache(ttl_days=options['ttl_days'])
+        deleted = cache.prune()
+        self.stdout.write(self.style.SUCCESS(f"{deleted} entrada(s) eliminada(s)."))
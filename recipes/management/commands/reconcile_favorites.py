@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from recipes.models import Favorite, Recipe
+
+
+class Command(BaseCommand):
+    help = "Recalcula favorite_count de las recetas a partir de Favorite y corrige las que se hayan desviado."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help="Solo muestra las recetas desviadas.")
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        checked = fixed = 0
+        last_pk = 0
+
+        while True:
+            recipes = list(Recipe.objects.filter(pk__gt=last_pk).order_by('pk').only('pk', 'favorite_count')[:chunk_size])
+            if not recipes:
+                break
+            last_pk = recipes[-1].pk
+
+            counts = dict(
+                Favorite.objects.filter(recipe__in=recipes)
+                .values('recipe').annotate(count=Count('id')).values_list('recipe', 'count')
+            )
+
+            drifted = []
+            for recipe in recipes:
+                count = counts.get(recipe.pk, 0)
+                if recipe.favorite_count != count:
+                    self.stdout.write(f"Receta {recipe.pk}: {recipe.favorite_count} -> {count} favoritas")
+                    recipe.favorite_count = count
+                    drifted.append(recipe)
+
+            checked += len(recipes)
+            fixed += len(drifted)
+            if drifted and not options['dry_run']:
+                with transaction.atomic():
+                    Recipe.objects.bulk_update(drifted, ['favorite_count'])
+
+        verb = "desviadas" if options['dry_run'] else "corregidas"
+        self.stdout.write(self.style.SUCCESS(f"{checked} recetas revisadas, {fixed} {verb}."))
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+from recipes.models import Rating, Recipe
+from utils.detail_cache import invalidate_recipe_details
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula rating_count, rating_sum y rating_avg de las recetas a partir de Rating "
+        "y corrige las que se hayan desviado (ediciones a mano, cargas masivas...)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help="Solo muestra las recetas desviadas.")
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        checked = fixed = 0
+        last_pk = 0
+
+        while True:
+            recipes = list(
+                Recipe.objects.filter(pk__gt=last_pk).order_by('pk')
+                .only('pk', 'rating_count', 'rating_sum', 'rating_avg')[:chunk_size]
+            )
+            if not recipes:
+                break
+            last_pk = recipes[-1].pk
+
+            totals = {
+                row['recipe']: (row['count'], row['total'])
+                for row in Rating.objects.filter(recipe__in=recipes)
+                .values('recipe').annotate(count=Count('id'), total=Sum('score'))
+            }
+
+            drifted = []
+            for recipe in recipes:
+                count, total = totals.get(recipe.pk, (0, 0))
+                average = total / count if count else 0
+                if (recipe.rating_count, recipe.rating_sum) != (count, total) or abs(recipe.rating_avg - average) > 1e-9:
+                    self.stdout.write(
+                        f"Receta {recipe.pk}: {recipe.rating_count} votos / {recipe.rating_sum} puntos "
+                        f"-> {count} votos / {total} puntos"
+                    )
+                    recipe.rating_count, recipe.rating_sum, recipe.rating_avg = count, total, average
+                    drifted.append(recipe)
+
+            checked += len(recipes)
+            fixed += len(drifted)
+            if drifted and not options['dry_run']:
+                with transaction.atomic():
+                    Recipe.objects.bulk_update(drifted, ['rating_count', 'rating_sum', 'rating_avg'])
+                # bulk_update no envía señales: páginas de detalle y fichas se invalidan a mano
+                invalidate_recipe_details(recipe.pk for recipe in drifted)
+
+        verb = "desviadas" if options['dry_run'] else "corregidas"
+        self.stdout.write(self.style.SUCCESS(f"{checked} recetas revisadas, {fixed} {verb}."))
@@ -0,0 +1,54 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from recipes.checks import default_cache_is_local
+from recipes.models import TranslationJobStatus
+from utils.translation_jobs import claim_next_job, requeue_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = "Procesa la cola de traducciones de recetas (TranslationJob)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Procesa los trabajos disponibles y termina.")
+        parser.add_argument('--sleep', type=float, default=5.0, help="Segundos de espera cuando la cola está vacía.")
+        parser.add_argument('--max-jobs', type=int, default=0, help="Termina tras procesar N trabajos (0 = sin límite).")
+        parser.add_argument(
+            '--allow-local-cache', action='store_true',
+            help="Arranca aunque el caché sea local (solo desarrollo: las páginas cacheadas del servidor web no se invalidan).",
+        )
+
+    def handle(self, *args, **options):
+        # Cada traducción invalida páginas de detalle, fichas y arrays de ids en el caché:
+        # con uno local a este proceso, el servidor web seguiría sirviendo las versiones viejas
+        if default_cache_is_local() and not options['allow_local_cache']:
+            raise CommandError(
+                "El caché por defecto es local (locmem): las invalidaciones de este worker no llegarían "
+                "al servidor web. Define CACHE_URL con un caché compartido o usa --allow-local-cache."
+            )
+
+        processed = 0
+        try:
+            while True:
+                close_old_connections()
+                requeue_stale_jobs()
+
+                job = claim_next_job()
+                if job is None:
+                    if options['once']:
+                        break
+                    time.sleep(options['sleep'])
+                    continue
+
+                run_job(job)
+                processed += 1
+
+                style = self.style.SUCCESS if job.status == TranslationJobStatus.DONE else self.style.WARNING
+                self.stdout.write(style(f"Job {job.pk} (recipe {job.recipe_id}): {job.status}"))
+
+                if options['max_jobs'] and processed >= options['max_jobs']:
+                    break
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(f"{processed} trabajo(s) procesado(s).")
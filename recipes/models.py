@@ -6,19 +6,25 @@ from parler.models import TranslatableModel, TranslatedFields
 from django.utils.translation import gettext_lazy as _
 from tinymce.models import HTMLField
 from django.core.exceptions import ValidationError
-from django.db.models import Avg
+from django.db.models import F
 from django.utils.text import slugify
 from django.urls import reverse_lazy
+from django.utils import timezone
 from parler.managers import TranslatableManager
+from utils.services import save_with_unique_slug
     
 TRANSLATION_LANGS = ['es', 'en', 'it', 'ca', 'hu', 'pt']
 
 class RecipeQuerySet(TranslatableQuerySet):
     def with_average_rating(self):
-        return self.annotate(average_rating=Avg('ratings__score'))
+        # La media ya está desnormalizada en rating_avg (ver utils.ratings)
+        return self.annotate(avg_rating=F('rating_avg'))
     
     def top_rated(self, min_score=4):
-        return self.with_average_rating().filter(average_rating__gte=min_score)
+        return self.filter(rating_avg__gte=min_score).order_by('-rating_avg', '-rating_count')
+
+    def most_favorited(self):
+        return self.filter(favorite_count__gt=0).order_by('-favorite_count')
     
     def recent(self, limit=5):
         return self.order_by('-created_at')[:limit]
@@ -45,6 +51,9 @@ class RecipeManager(TranslatableManager):
     
     def top_rated(self, min_score=4) -> 'RecipeQuerySet':
         return self.get_queryset().top_rated(min_score)
+
+    def most_favorited(self) -> 'RecipeQuerySet':
+        return self.get_queryset().most_favorited()
     
     def recent(self, limit=5) -> 'RecipeQuerySet':
         return self.get_queryset().recent(limit)
@@ -66,6 +75,7 @@ class CuisineType(TranslatableModel):
     translations = TranslatedFields(
         name = models.CharField(max_length=100),
         slug=models.SlugField(max_length=200, blank=True, null=True, allow_unicode=True),
+        meta={'indexes': [models.Index(fields=['language_code', 'slug'])]},
     )
 
     def __str__(self):
@@ -85,15 +95,7 @@ class MealType(TranslatableModel):
     def save(self, *args, **kwargs):
         if not self.slug:
             name = self.safe_translation_getter('name', any_language=True) or ''
-            base_slug = slugify(str(name))
-            slug = base_slug
-            counter = 1
-            ModelClass = self.__class__
-            qs = ModelClass.objects.get_queryset()
-            while qs.translated(slug=slug).exclude(pk=self.pk).exists():  # type: ignore
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            self.slug = slug
+            return save_with_unique_slug(self, name, lambda: super(MealType, self).save(*args, **kwargs))
         super().save(*args, **kwargs)
         
     def __str__(self) -> str:
@@ -124,6 +126,7 @@ class Theme(TranslatableModel):
         name = models.CharField(max_length=100),
         slug = models.SlugField(max_length=100, unique=True, allow_unicode=True),
         description = models.TextField(blank=True),
+        meta={'indexes': [models.Index(fields=['language_code', 'name'])]},
     )
 
     class Meta:
@@ -162,6 +165,13 @@ class Recipe(TranslatableModel):
     themes = models.ManyToManyField(Theme, blank=True, related_name='recipes')
     featured = models.BooleanField(default=False, verbose_name=_("Destacada"))
 
+    # Agregados de Rating mantenidos al escribir (utils.ratings); reconcile_ratings corrige desvíos
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_avg = models.FloatField(default=0, editable=False)
+    # Número de Favorite, mantenido por los receptores de Favorite (recipes.receivers)
+    favorite_count = models.PositiveIntegerField(default=0, editable=False)
+
     ingredients = models.ManyToManyField(
         'Ingredient',
         through='RecipeIngredient',
@@ -175,6 +185,11 @@ class Recipe(TranslatableModel):
         description=HTMLField(blank=True),
         tips = HTMLField(blank=True),
         instructions=models.TextField(blank=True),
+        # Búsquedas y detalle por idioma (el slug ya tiene su propio índice para las búsquedas sin idioma)
+        meta={'indexes': [
+            models.Index(fields=['language_code', 'slug']),
+            models.Index(fields=['language_code', 'title']),
+        ]},
     )
     source_lang = models.CharField(
         max_length=5,
@@ -191,6 +206,11 @@ class Recipe(TranslatableModel):
         verbose_name = _("Receta")
         verbose_name_plural = _("Recetas")
         ordering = ['-created_at']
+        indexes = [
+            # Mejor valoradas como recorrido de índice en lugar de GROUP BY sobre Rating
+            models.Index(fields=['-rating_avg', '-rating_count']),
+            models.Index(fields=['-favorite_count']),
+        ]
 
     def __str__(self):
         return self.safe_translation_getter('title', any_language=True)
@@ -202,13 +222,7 @@ class Recipe(TranslatableModel):
     def average_rating(self):
         if hasattr(self, 'avg_rating'):
             return self.avg_rating or 0 # type: ignore
-        
-        if hasattr(self, '_average_rating_cache'):
-            return self._average_rating_cache
-        
-        avg = self.ratings.aggregate(avg_score=Avg('score'))['avg_score'] or 0  # type: ignore
-        self._average_rating_cache = avg
-        return avg
+        return self.rating_avg
 
     @property
     def total_time(self):
@@ -218,7 +232,7 @@ class Recipe(TranslatableModel):
     
     @property
     def total_votes(self):
-        return self.ratings.count() # type: ignore
+        return self.rating_count
 
     @property
     def ingredients_list(self):
@@ -230,7 +244,11 @@ class Category(TranslatableModel):
 
     translations = TranslatedFields(
         slug=models.SlugField(max_length=200, blank=True, null=True, allow_unicode=True),
-        name=models.CharField(max_length=100)
+        name=models.CharField(max_length=100),
+        meta={'indexes': [
+            models.Index(fields=['language_code', 'slug']),
+            models.Index(fields=['language_code', 'name']),
+        ]},
     )
 
     def __str__(self):
@@ -281,7 +299,12 @@ class Ingredient(TranslatableModel):
     )
     translations = TranslatedFields(
         slug=models.SlugField(max_length=200, blank=True, null=True, allow_unicode=True),
-        name=models.CharField(max_length=100)
+        name=models.CharField(max_length=100),
+        # process_ingredients_formset busca por nombre en cualquier idioma; el buscador, por idioma
+        meta={'indexes': [
+            models.Index(fields=['name']),
+            models.Index(fields=['language_code', 'name']),
+        ]},
     )
 
     def __str__(self):
@@ -301,15 +324,7 @@ class IngredientCategory(TranslatableModel):
     def save(self, *args, **kwargs):
         if not self.slug:
             name = self.safe_translation_getter('name', any_language=True) or ''
-            base_slug = slugify(str(name))
-            slug = base_slug
-            counter = 1
-            ModelClass = self.__class__
-            qs = ModelClass.objects.get_queryset()
-            while qs.translated(slug=slug).exclude(pk=self.pk).exists():  # type: ignore
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            self.slug = slug
+            return save_with_unique_slug(self, name, lambda: super(IngredientCategory, self).save(*args, **kwargs))
         super().save(*args, **kwargs)
 
     def __str__(self) -> str:
@@ -353,6 +368,8 @@ class Comment(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='comments')
     recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='comments')
     parent = models.ForeignKey('self', null=True, blank=True, on_delete=models.CASCADE, related_name='replies')
+    # Comentario raíz del hilo (vacío en los propios comentarios raíz): un hilo entero se lee por root
+    root = models.ForeignKey('self', null=True, blank=True, editable=False, on_delete=models.CASCADE, related_name='thread')
 
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
@@ -363,6 +380,18 @@ class Comment(models.Model):
     class Meta:
         verbose_name = _("Comentario")
         ordering = ['-created_at']
+        indexes = [
+            # Comentarios raíz / respuestas de una receta, del más reciente al más antiguo
+            models.Index(fields=['recipe', 'parent', '-created_at']),
+            # Respuestas de un hilo en orden cronológico
+            models.Index(fields=['root', 'created_at']),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.parent_id and not self.root_id:
+            parent = self.parent
+            self.root_id = parent.root_id or parent.pk  # type: ignore
+        super().save(*args, **kwargs)
         
     def is_reply(self):
         return self.parent is not None
@@ -384,6 +413,10 @@ class Rating(models.Model):
     class Meta:
         verbose_name = _("Valoración")
         unique_together = ('user', 'recipe') 
+        indexes = [
+            # Media y número de votos por receta sin leer la tabla (índice cubriente)
+            models.Index(fields=['recipe', 'score']),
+        ]
 
     def __str__(self):
         return f"{self.score} estrellas por {self.user} en {self.recipe}"
@@ -402,6 +435,111 @@ class Favorite(models.Model):
 
     class Meta:
         unique_together = ("user", "recipe")
+        indexes = [
+            # Recuentos por receta y "¿es favorita de este usuario?" desde la receta
+            models.Index(fields=['recipe', 'user']),
+        ]
+
+    def __str__(self):
+        return f"{self.user} favorito {self.recipe}"
+
+class TranslationJobStatus(models.TextChoices):
+    PENDING = 'pending', _('Pendiente')
+    RUNNING = 'running', _('En curso')
+    DONE = 'done', _('Completada')
+    FAILED = 'failed', _('Fallida')
+
+
+class TranslationJob(models.Model):
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='translation_jobs')
+    source_lang = models.CharField(max_length=5, choices=[(lang, lang) for lang in TRANSLATION_LANGS])
+    # Valores de los campos antes de la edición (None = traducir todo, como en una creación)
+    original_data = models.JSONField(null=True, blank=True)
+    # Idiomas que quedaron sin traducir en el último intento (None = todos)
+    pending_langs = models.JSONField(null=True, blank=True)
+
+    status = models.CharField(max_length=10, choices=TranslationJobStatus.choices, default=TranslationJobStatus.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    last_error = models.TextField(blank=True)
+    run_after = models.DateTimeField(default=timezone.now)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("Trabajo de traducción")
+        verbose_name_plural = _("Trabajos de traducción")
+        ordering = ['run_after', 'pk']
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+        ]
+
+    def __str__(self):
+        return f"{self.recipe_id} [{self.source_lang}] {self.status}" # type: ignore
+
+
+class TranslationMemory(models.Model):
+    source_lang = models.CharField(max_length=5)
+    target_lang = models.CharField(max_length=5)
+    text_hash = models.CharField(max_length=64)  # sha256 del texto normalizado
+    source_text = models.TextField()
+    translated_text = models.TextField()
+
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = _("Memoria de traducción")
+        verbose_name_plural = _("Memoria de traducción")
+        constraints = [
+            models.UniqueConstraint(fields=['source_lang', 'target_lang', 'text_hash'], name='unique_translation_memory'),
+        ]
+        indexes = [
+            models.Index(fields=['last_used_at']),
+        ]
+
+    def __str__(self):
+        return f"[{self.source_lang}→{self.target_lang}] {self.source_text[:50]}"
+
+
+class RecipeSnapshot(models.Model):
+    # Ficha de detalle desnormalizada por idioma (utils.snapshots): texto traducido, ingredientes
+    # formateados, nombres de taxonomías y valoraciones. Se borra cuando cambia algo de lo que
+    # contiene (utils.detail_cache.invalidate_recipe_detail) y se reconstruye en la siguiente visita.
+    key = models.CharField(max_length=255, primary_key=True)  # "idioma:slug", el de la URL
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='snapshots')
+    language_code = models.CharField(max_length=15)
+    data = models.JSONField()
+    built_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("Ficha de receta")
+        verbose_name_plural = _("Fichas de recetas")
+
+    def __str__(self):
+        return self.key
+
+
+class SlugRegistry(models.Model):
+    # Reserva de slugs de los modelos traducidos: la restricción única impide que
+    # dos guardados simultáneos se queden con el mismo (ver utils.services.generate_unique_slugs)
+    model_label = models.CharField(max_length=100)
+    language_code = models.CharField(max_length=15)
+    slug = models.CharField(max_length=255)
+    object_id = models.PositiveBigIntegerField(null=True, blank=True)  # None mientras el objeto no tiene pk
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Slug reservado")
+        verbose_name_plural = _("Slugs reservados")
+        constraints = [
+            models.UniqueConstraint(fields=['model_label', 'slug'], name='unique_registry_slug'),
+        ]
+        indexes = [
+            models.Index(fields=['model_label', 'object_id', 'language_code']),
+        ]
 
     def __str__(self):
-        return f"{self.user} favorito {self.recipe}"
\ No newline at end of file
+        return f"{self.model_label} [{self.language_code}] {self.slug}"
@@ -0,0 +1,239 @@
+from django.apps import apps
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from recipes.models import (
+    Allergen, Category, Comment, CookingMethod, CuisineType, Favorite, Ingredient, MealType,
+    Rating, Recipe, RecipeIngredient, SlugRegistry, Tag, Theme, Unit,
+)
+from utils.detail_cache import invalidate_recipe_detail, invalidate_recipe_details
+from utils.favorites import change_favorite_count, invalidate_favorite_ids
+from utils.ratings import apply_rating_delta
+from utils.recipe_save import recipe_saved
+from utils.sampling import BY_THEME, POOLS, RANDOM_BY_LANGUAGE
+from utils.services import translations_bulk_written
+from utils.shelves import invalidate_shelves
+from utils.translation_jobs import enqueue_recipe_translation
+
+
+def _slug_translation_models():
+    # Modelos de traducción de parler con campo slug (Recipe, Ingredient, Category...)
+    for model in apps.get_app_config('recipes').get_models():
+        parler_meta = getattr(model, '_parler_meta', None)
+        if parler_meta is None:
+            continue
+        translation_model = parler_meta.root_model
+        if any(field.name == 'slug' for field in translation_model._meta.concrete_fields):
+            yield model, translation_model
+
+
+def _master_label(translation_model):
+    return translation_model._meta.get_field('master').related_model._meta.label
+
+
+def claim_translation_slug(sender, instance, **kwargs):
+    """Mantiene SlugRegistry al día cuando se guarda una traducción (formularios, admin...)."""
+    if kwargs.get('raw'):
+        return
+    label = _master_label(sender)
+    registry = SlugRegistry.objects.filter(model_label=label)
+
+    # El slug anterior de este idioma queda libre
+    registry.filter(object_id=instance.master_id, language_code=instance.language_code).exclude(slug=instance.slug).delete()
+    if not instance.slug:
+        return
+
+    # Reserva hecha antes de tener pk (object_id vacío) o ya propia
+    claimed = registry.filter(slug=instance.slug).filter(
+        Q(object_id__isnull=True) | Q(object_id=instance.master_id)
+    ).update(object_id=instance.master_id, language_code=instance.language_code)
+    if not claimed:
+        try:
+            with transaction.atomic():
+                SlugRegistry.objects.create(
+                    model_label=label, language_code=instance.language_code,
+                    slug=instance.slug, object_id=instance.master_id,
+                )
+        except IntegrityError:
+            # Slug duplicado introducido a mano: se deja como está
+            pass
+
+
+def release_translation_slug(sender, instance, **kwargs):
+    SlugRegistry.objects.filter(
+        model_label=_master_label(sender),
+        object_id=instance.master_id,
+        language_code=instance.language_code,
+    ).delete()
+
+
+for _model, _translation_model in _slug_translation_models():
+    post_save.connect(claim_translation_slug, sender=_translation_model, dispatch_uid=f'claim_slug_{_model._meta.label}')
+    post_delete.connect(release_translation_slug, sender=_translation_model, dispatch_uid=f'release_slug_{_model._meta.label}')
+
+
+@receiver(recipe_saved, sender=Recipe, dispatch_uid='enqueue_recipe_translation')
+def enqueue_translation_on_save(sender, recipe, source_lang, original_data=None, **kwargs):
+    # Las traducciones y slugs de los demás idiomas los genera el worker
+    enqueue_recipe_translation(recipe, source_lang, original_data=original_data)
+
+
+@receiver(post_delete, sender=Rating, dispatch_uid='discount_deleted_rating')
+def discount_deleted_rating(sender, instance, **kwargs):
+    # Altas y cambios pasan por utils.ratings.set_rating; los borrados (admin, cascada de usuario) llegan aquí
+    apply_rating_delta(instance.recipe_id, count=-1, total=-instance.score)
+
+
+@receiver(post_save, sender=Favorite, dispatch_uid='count_added_favorite')
+def count_added_favorite(sender, instance, created, **kwargs):
+    if created and not kwargs.get('raw'):
+        change_favorite_count(instance.recipe_id, 1)
+        transaction.on_commit(lambda: invalidate_favorite_ids(instance.user_id))
+
+
+@receiver(post_delete, sender=Favorite, dispatch_uid='discount_deleted_favorite')
+def discount_deleted_favorite(sender, instance, **kwargs):
+    change_favorite_count(instance.recipe_id, -1)
+    transaction.on_commit(lambda: invalidate_favorite_ids(instance.user_id))
+
+
+def invalidate_recipe_shelves(sender, **kwargs):
+    # Al confirmar: antes, otra petición podría volver a llenar el caché con el estado anterior
+    if not kwargs.get('raw'):
+        transaction.on_commit(invalidate_shelves)
+
+
+for _model in (Recipe, Rating, Favorite):
+    post_save.connect(invalidate_recipe_shelves, sender=_model, dispatch_uid=f'invalidate_shelves_save_{_model._meta.label}')
+    post_delete.connect(invalidate_recipe_shelves, sender=_model, dispatch_uid=f'invalidate_shelves_delete_{_model._meta.label}')
+
+
+@receiver(post_save, sender=Recipe, dispatch_uid='add_recipe_to_id_pools')
+def add_recipe_to_id_pools(sender, instance, raw=False, **kwargs):
+    # Las recetas que dejan de cumplir un filtro se quitan solas al muestrear
+    if raw:
+        return
+
+    def add():
+        for pool in POOLS:
+            for params in pool.members(instance) if pool.members else []:
+                pool.add(instance.pk, *params)
+    transaction.on_commit(add)
+
+
+@receiver(post_delete, sender=Recipe, dispatch_uid='discard_recipe_from_id_pools')
+def discard_recipe_from_id_pools(sender, instance, **kwargs):
+    pk = instance.pk
+
+    def discard():
+        for pool in POOLS:
+            for params in pool.members(instance) if pool.members else []:
+                pool.discard(pk, *params)
+    transaction.on_commit(discard)
+
+
+@receiver(m2m_changed, sender=Recipe.themes.through, dispatch_uid='sync_theme_id_pools')
+def sync_theme_id_pools(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove') or not pk_set:
+        return
+    # reverse: se ha cambiado desde el tema (instance es un Theme y pk_set son recetas)
+    pairs = [(pk, instance.pk) for pk in pk_set] if reverse else [(instance.pk, pk) for pk in pk_set]
+    update = BY_THEME.add if action == 'post_add' else BY_THEME.discard
+
+    def sync():
+        for recipe_id, theme_id in pairs:
+            update(recipe_id, theme_id)
+    transaction.on_commit(sync)
+
+
+@receiver(post_save, sender=Recipe._parler_meta.root_model, dispatch_uid='add_translation_to_random_pool')
+def add_translation_to_random_pool(sender, instance, created, raw=False, **kwargs):
+    # Una receta entra en el array de su idioma cuando tiene traducción (y foto)
+    if created and not raw:
+        transaction.on_commit(lambda: RANDOM_BY_LANGUAGE.add_if_member(instance.master_id, instance.language_code))
+
+
+@receiver(post_delete, sender=Recipe._parler_meta.root_model, dispatch_uid='discard_translation_from_random_pool')
+def discard_translation_from_random_pool(sender, instance, **kwargs):
+    transaction.on_commit(lambda: RANDOM_BY_LANGUAGE.discard(instance.master_id, instance.language_code))
+
+
+def invalidate_recipe_detail_page(sender, instance, **kwargs):
+    # Receta, traducción, ingrediente, valoración o comentario: la página y la ficha de su receta quedan obsoletas
+    if kwargs.get('raw'):
+        return
+    if sender is Recipe:
+        recipe_id = instance.pk
+    elif sender is Recipe._parler_meta.root_model:
+        recipe_id = instance.master_id
+    else:
+        recipe_id = instance.recipe_id
+    transaction.on_commit(lambda: invalidate_recipe_detail(recipe_id))
+
+
+for _model in (Recipe, Recipe._parler_meta.root_model, RecipeIngredient, Rating, Comment):
+    post_save.connect(invalidate_recipe_detail_page, sender=_model, dispatch_uid=f'invalidate_detail_save_{_model._meta.label}')
+    post_delete.connect(invalidate_recipe_detail_page, sender=_model, dispatch_uid=f'invalidate_detail_delete_{_model._meta.label}')
+
+
+# Nombres que aparecen en la ficha de detalle: al renombrar uno se invalidan sus recetas
+_DETAIL_NAME_LOOKUPS = {
+    Category: 'category',
+    CuisineType: 'cuisine_type',
+    MealType: 'meal_types',
+    Tag: 'tags',
+    Theme: 'themes',
+    CookingMethod: 'cooking_methods',
+    Allergen: 'allergens',
+    Ingredient: 'recipe_ingredients__ingredient',
+    Unit: 'recipe_ingredients__unit',
+}
+
+
+def invalidate_named_recipe_details(sender, instance, **kwargs):
+    if kwargs.get('raw'):
+        return
+    lookup = _DETAIL_NAME_LOOKUPS[sender._meta.get_field('master').related_model]
+    object_id = instance.master_id
+
+    def invalidate():
+        invalidate_recipe_details(Recipe.objects.filter(**{lookup: object_id}).values_list('pk', flat=True).distinct())
+    transaction.on_commit(invalidate)
+
+
+for _model in _DETAIL_NAME_LOOKUPS:
+    _translation_model = _model._parler_meta.root_model
+    post_save.connect(invalidate_named_recipe_details, sender=_translation_model, dispatch_uid=f'invalidate_detail_names_save_{_model._meta.label}')
+    post_delete.connect(invalidate_named_recipe_details, sender=_translation_model, dispatch_uid=f'invalidate_detail_names_delete_{_model._meta.label}')
+
+
+@receiver(translations_bulk_written, dispatch_uid='invalidate_bulk_named_recipe_details')
+def invalidate_bulk_named_recipe_details(sender, master_ids, **kwargs):
+    # Nombres escritos en bloque (worker de traducción, backfill, importación): sin post_save
+    lookup = _DETAIL_NAME_LOOKUPS.get(sender)
+    if lookup is None:
+        return
+    master_ids = list(master_ids)
+
+    def invalidate():
+        invalidate_recipe_details(Recipe.objects.filter(**{f'{lookup}__in': master_ids}).values_list('pk', flat=True).distinct())
+    transaction.on_commit(invalidate)
+
+
+def invalidate_recipe_detail_m2m(sender, instance, action, reverse, pk_set, **kwargs):
+    # Taxonomías añadidas o quitadas fuera del formulario de receta (admin de la taxonomía, shell...)
+    if action in ('post_add', 'post_remove'):
+        recipe_ids = list(pk_set) if reverse else [instance.pk]
+    elif action == 'pre_clear':
+        # Desde la taxonomía, las recetas se leen antes de que desaparezca el enlace
+        recipe_ids = list(instance.recipes.values_list('pk', flat=True)) if reverse else [instance.pk]
+    else:
+        return
+    if not recipe_ids:
+        return
+    transaction.on_commit(lambda: invalidate_recipe_details(recipe_ids))
+
+
+for _field in ('cooking_methods', 'allergens', 'meal_types', 'tags', 'themes'):
+    m2m_changed.connect(invalidate_recipe_detail_m2m, sender=getattr(Recipe, _field).through, dispatch_uid=f'invalidate_detail_m2m_{_field}')
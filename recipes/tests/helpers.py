@@ -0,0 +1,74 @@
+import re
+from django.contrib.auth import get_user_model
+from django.utils.text import slugify
+from recipes.models import Category, Recipe
+
+
+def make_user(username, **fields):
+    return get_user_model().objects.create_user(
+        username=username, email=f"{username}@example.com", password='secret', **fields
+    )
+
+
+def make_recipe(author, title, language='es', slug=None, **fields):
+    """Receta mínima en un idioma, guardada con save() (envía las señales normales)."""
+    fields.setdefault('difficulty', 'easy')
+    fields.setdefault('prep_time', 10)
+    fields.setdefault('cook_time', 5)
+    recipe = Recipe(author=author, **fields)
+    recipe.set_current_language(language)
+    recipe.title = title
+    recipe.slug = slug or slugify(title)
+    recipe.description = f"<p>{title}</p>"
+    recipe.instructions = "<p>Mezclar.</p>"
+    recipe.save()
+    return recipe
+
+
+def add_translation(recipe, language, title, slug=None):
+    recipe.set_current_language(language)
+    recipe.title = title
+    recipe.slug = slug or slugify(title)
+    recipe.save()
+    return recipe
+
+
+_block_open_re = re.compile(r'<(p|li|h[1-6])\b[^>]*>')
+
+
+class FakeTranslationClient:
+    """Cliente de traducción sin red: antepone el idioma de destino ("[en] Hola", "<p>[en] Hola</p>")."""
+
+    def __init__(self, fail_langs=()):
+        self.fail_langs = set(fail_langs)
+        self.http_calls = 0
+        self.batches = 0
+        self.calls = []
+
+    def translate(self, text, source_lang, target_lang):
+        return self.translate_batch([(text, source_lang, target_lang)])[0]
+
+    def translate_batch(self, items):
+        self.batches += 1
+        self.calls.extend(items)
+        results = []
+        for text, source_lang, target_lang in items:
+            if not text or source_lang == target_lang:
+                results.append(text)
+            elif target_lang in self.fail_langs:
+                results.append(None)
+            elif _block_open_re.match(text):
+                # Dentro de cada bloque, como un traductor real: se conserva la estructura del HTML
+                results.append(_block_open_re.sub(lambda m: f"{m.group(0)}[{target_lang}] ", text))
+            else:
+                results.append(f"[{target_lang}] {text}")
+        return results
+
+
+def make_category(name, language='es'):
+    category = Category()
+    category.set_current_language(language)
+    category.name = name
+    category.slug = slugify(name)
+    category.save()
+    return category
@@ -0,0 +1,76 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import translation
+from recipes.models import Comment
+from recipes.tests.helpers import make_recipe, make_user
+
+JSON = {'Accept': 'application/json'}
+
+
+class AsyncEndpointTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        translation.activate('es')
+        self.author = make_user('ana')
+        self.recipe = make_recipe(self.author, "Sopa de ajo")
+        self.reader = make_user('berta')
+
+    def url(self, name, **kwargs):
+        return reverse(f'recipes:{name}', kwargs={'slug': 'sopa-de-ajo', **kwargs})
+
+    async def test_toggle_favorite(self):
+        await self.async_client.aforce_login(self.reader)
+
+        first = await self.async_client.post(reverse('recipes:toggle_favorite'), {'slug': 'sopa-de-ajo'})
+        second = await self.async_client.post(reverse('recipes:toggle_favorite'), {'slug': 'sopa-de-ajo'})
+        missing = await self.async_client.post(reverse('recipes:toggle_favorite'), {'slug': 'no-existe'})
+
+        self.assertEqual(first.json(), {'status': 'added', 'favorite_count': 1})
+        self.assertEqual(second.json(), {'status': 'removed', 'favorite_count': 0})
+        self.assertEqual(missing.status_code, 404)
+
+    async def test_rate_recipe(self):
+        await self.async_client.aforce_login(self.reader)
+
+        response = await self.async_client.post(self.url('rate_recipe'), {'rating': '4'}, headers=JSON)
+        invalid = await self.async_client.post(self.url('rate_recipe'), {'rating': '9'}, headers=JSON)
+
+        self.assertEqual(response.json(), {'score': 4, 'average': 4.0, 'votes': 1})
+        self.assertEqual(invalid.status_code, 400)
+
+    async def test_authors_cannot_rate_their_own_recipe(self):
+        await self.async_client.aforce_login(self.author)
+
+        response = await self.async_client.post(self.url('rate_recipe'), {'rating': '5'}, headers=JSON)
+
+        self.assertEqual(response.status_code, 400)
+
+    async def test_add_comment_and_reply(self):
+        await self.async_client.aforce_login(self.reader)
+
+        root = await self.async_client.post(self.url('add_comment'), {'content': "¡Muy rica!"}, headers=JSON)
+        reply = await self.async_client.post(
+            self.url('add_comment'), {'content': "¡Gracias por probarla!", 'parent_id': root.json()['id']}, headers=JSON,
+        )
+
+        self.assertEqual(root.status_code, 201)
+        self.assertEqual(reply.json()['root_id'], root.json()['id'])
+        self.assertEqual(await Comment.objects.filter(recipe=self.recipe).acount(), 2)
+
+    async def test_user_state(self):
+        anonymous = await self.async_client.get(self.url('recipe_user_state_json'))
+        await self.async_client.aforce_login(self.author)
+        author = await self.async_client.get(self.url('recipe_user_state_json'))
+
+        self.assertEqual(
+            {key: anonymous.json()[key] for key in ('is_favorited', 'selected_rating', 'is_author')},
+            {'is_favorited': False, 'selected_rating': None, 'is_author': False},
+        )
+        self.assertTrue(author.json()['is_author'])
+        self.assertIn('private', anonymous['Cache-Control'])
+
+    async def test_login_is_required(self):
+        response = await self.async_client.post(self.url('rate_recipe'), {'rating': '4'})
+
+        self.assertEqual(response.status_code, 302)
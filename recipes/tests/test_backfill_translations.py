@@ -0,0 +1,65 @@
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+from django.core.management import call_command
+from django.test import TestCase
+from recipes.models import Category
+from recipes.tests.helpers import FakeTranslationClient, make_category
+
+
+class BackfillTranslationsTests(TestCase):
+    def setUp(self):
+        self.checkpoint = os.path.join(tempfile.mkdtemp(), 'backfill.json')
+        patcher = mock.patch(
+            'recipes.management.commands.backfill_translations.TranslationClient',
+            lambda **kwargs: FakeTranslationClient(),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def backfill(self, *args):
+        out = io.StringIO()
+        call_command(
+            'backfill_translations', '--models=category', '--languages=en,it',
+            f'--checkpoint={self.checkpoint}', *args, stdout=out,
+        )
+        return out.getvalue()
+
+    def languages(self, category):
+        return set(Category._parler_meta.root_model.objects.filter(master_id=category.pk).values_list('language_code', flat=True))
+
+    def names(self, category, lang):
+        return Category.objects.get(pk=category.pk).safe_translation_getter('name', language_code=lang)
+
+    def test_dry_run_counts_missing_and_copied_translations(self):
+        category = make_category("Postres")
+        category.set_current_language('en')
+        category.name = "Postres"
+        category.save()
+
+        output = self.backfill('--dry-run')
+
+        self.assertIn("en: 0 sin traducción / 1 copia del original", output)
+        self.assertIn("it: 1 sin traducción / 0 copia del original", output)
+        self.assertFalse('it' in self.languages(category))
+
+    def test_fills_missing_languages_and_removes_the_checkpoint(self):
+        category = make_category("Postres")
+
+        self.backfill()
+
+        self.assertEqual((self.names(category, 'en'), self.names(category, 'it')), ("[en] Postres", "[it] Postres"))
+        self.assertEqual(Category.objects.get(pk=category.pk).safe_translation_getter('slug', language_code='en'), 'en-postres')
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_resumes_after_the_checkpoint(self):
+        done, pending = make_category("Postres"), make_category("Sopas")
+        with open(self.checkpoint, 'w') as f:
+            json.dump({Category._meta.label: done.pk}, f)
+
+        self.backfill()
+
+        self.assertFalse('en' in self.languages(done))
+        self.assertEqual(self.names(pending, 'en'), "[en] Sopas")
@@ -0,0 +1,48 @@
+import io
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from recipes.checks import check_shared_cache
+from recipes.models import TranslationJob, TranslationJobStatus
+from recipes.tests.helpers import FakeTranslationClient, make_recipe, make_user
+from utils.translation import set_translation_client
+from utils.translation_jobs import enqueue_recipe_translation
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+SHARED = {'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'cache_table'}}
+
+
+class SharedCacheCheckTests(TestCase):
+    @override_settings(DEBUG=False, CACHES=LOCMEM)
+    def test_local_cache_is_reported_outside_debug(self):
+        self.assertEqual([warning.id for warning in check_shared_cache(None)], ['recipes.W001'])
+
+    @override_settings(DEBUG=True, CACHES=LOCMEM)
+    def test_local_cache_is_fine_in_debug(self):
+        self.assertEqual(check_shared_cache(None), [])
+
+    @override_settings(DEBUG=False, CACHES=SHARED)
+    def test_shared_cache_passes(self):
+        self.assertEqual(check_shared_cache(None), [])
+
+
+@override_settings(CACHES=LOCMEM)
+class TranslationWorkerTests(TestCase):
+    def setUp(self):
+        previous = set_translation_client(FakeTranslationClient())
+        self.addCleanup(set_translation_client, previous)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe = make_recipe(make_user('ana'), "Sopa de ajo")
+        enqueue_recipe_translation(self.recipe, 'es')
+
+    def test_worker_refuses_a_local_cache(self):
+        with self.assertRaisesMessage(CommandError, "locmem"):
+            call_command('translation_worker', '--once', stdout=io.StringIO())
+
+        self.assertEqual(TranslationJob.objects.get().status, TranslationJobStatus.PENDING)
+
+    def test_worker_runs_with_explicit_opt_in(self):
+        out = io.StringIO()
+        call_command('translation_worker', '--once', '--allow-local-cache', stdout=out)
+
+        self.assertEqual(TranslationJob.objects.get().status, TranslationJobStatus.DONE)
+        self.assertIn("1 trabajo(s) procesado(s)", out.getvalue())
@@ -0,0 +1,102 @@
+import io
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone, translation
+from recipes.models import Comment
+from recipes.tests.helpers import make_recipe, make_user
+from utils.comments import decode_cursor, encode_cursor, load_comment_threads, load_more_replies
+
+
+class CommentThreadTests(TestCase):
+    def setUp(self):
+        self.user = make_user('ana')
+        self.recipe = make_recipe(self.user, "Sopa de ajo")
+
+    def comment(self, content, parent=None):
+        return Comment.objects.create(user=self.user, recipe=self.recipe, parent=parent, content=content)
+
+    def test_root_pages_follow_the_keyset_without_gaps_on_equal_dates(self):
+        roots = [self.comment(f"raíz {n}") for n in range(5)]
+        Comment.objects.update(created_at=timezone.now())
+
+        seen, cursor = [], None
+        while True:
+            page, cursor = load_comment_threads(self.recipe, decode_cursor(cursor), per_page=2)
+            seen.extend(comment.content for comment in page)
+            if cursor is None:
+                break
+
+        self.assertEqual(seen, [root.content for root in reversed(roots)])
+
+    def test_threads_include_first_replies_and_a_cursor_for_the_rest(self):
+        root = self.comment("raíz")
+        first = self.comment("r1", parent=root)
+        nested = self.comment("r1.1", parent=first)
+        for n in range(2, 5):
+            self.comment(f"r{n}", parent=root)
+
+        self.assertEqual(nested.root_id, root.pk)  # type: ignore
+
+        (loaded,), _ = load_comment_threads(self.recipe, replies_per_thread=3)
+        self.assertEqual(loaded.replies_total, 5)
+        self.assertEqual([(reply.content, [c.content for c in reply.children]) for reply in loaded.thread_replies],
+                         [("r1", ["r1.1"]), ("r2", [])])
+
+        more, next_cursor = load_more_replies(root, decode_cursor(loaded.replies_cursor), limit=1)
+        self.assertEqual([reply.content for reply in more], ["r3"])
+        more, next_cursor = load_more_replies(root, decode_cursor(next_cursor), limit=5)
+        self.assertEqual(([reply.content for reply in more], next_cursor), (["r4"], None))
+
+    def test_replies_endpoint(self):
+        root = self.comment("raíz")
+        for n in range(3):
+            self.comment(f"r{n}", parent=root)
+        translation.activate('es')
+        url = reverse('recipes:comment_replies_json', kwargs={'slug': 'sopa-de-ajo', 'comment_id': root.pk})
+
+        data = self.client.get(url).json()
+        response = self.client.get(url, {'after': encode_cursor(Comment.objects.get(content="r0"))})
+
+        self.assertEqual([reply['content'] for reply in data['replies']], ["r0", "r1", "r2"])
+        self.assertEqual([reply['content'] for reply in response.json()['replies']], ["r1", "r2"])
+
+    def test_invalid_cursor_is_ignored(self):
+        self.assertIsNone(decode_cursor("nope"))
+        self.assertIsNone(decode_cursor(None))
+
+    def test_backfill_comment_roots(self):
+        root = self.comment("raíz")
+        reply = self.comment("r1", parent=root)
+        nested = self.comment("r1.1", parent=reply)
+        Comment.objects.filter(parent__isnull=False).update(root=None)
+
+        call_command('backfill_comment_roots', stdout=io.StringIO())
+
+        self.assertEqual(set(Comment.objects.filter(pk__in=[reply.pk, nested.pk]).values_list('root_id', flat=True)), {root.pk})
+
+
+class ProfileCommentPagesTests(TestCase):
+    def setUp(self):
+        translation.activate('es')
+        self.user = make_user('ana')
+        recipe = make_recipe(self.user, "Sopa de ajo")
+        self.comments = [
+            Comment.objects.create(user=self.user, recipe=recipe, content=f"Comentario {n}") for n in range(25)
+        ]
+        self.client.force_login(self.user)
+
+    def test_my_comments_are_paginated_with_a_cursor(self):
+        first = self.client.get(reverse('accounts:profile'), {'replies': 'x'})
+        cursor = first.context['my_comments_cursor']
+        second = self.client.get(reverse('accounts:profile'), {'my_comments': cursor})
+
+        self.assertEqual(len(first.context['my_comments']), 20)
+        # El enlace conserva los cursores de las otras listas
+        self.assertContains(first, f"?replies=x&amp;my_comments={cursor}#comments")
+        self.assertContains(second, "Comentario 0")
+        self.assertEqual(
+            [comment.pk for comment in first.context['my_comments'] + second.context['my_comments']],
+            [comment.pk for comment in reversed(self.comments)],
+        )
+        self.assertIsNone(second.context['my_comments_cursor'])
@@ -0,0 +1,84 @@
+import io
+import json
+import os
+import tempfile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from recipes.models import Recipe
+from recipes.tests.helpers import make_user
+from recipes.tests.test_import_recipes import DOCUMENT
+from utils.recipe_documents import iter_documents
+
+
+class ExportRecipesTests(TestCase):
+    def setUp(self):
+        make_user('ana')
+        self.dir = tempfile.mkdtemp()
+
+    def export(self, name, *args):
+        path = os.path.join(self.dir, name)
+        call_command('export_recipes', f'--output={path}', *args, stderr=io.StringIO())
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+
+    def import_lines(self, content):
+        path = os.path.join(self.dir, 'import.ndjson')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('import_recipes', path, '--no-translate', stdout=io.StringIO())
+
+    def test_ndjson_round_trip(self):
+        self.import_lines(json.dumps(DOCUMENT) + "\n")
+
+        exported = self.export('first.ndjson')
+        self.assertEqual([json.loads(line) for line in exported.splitlines()], [DOCUMENT])
+
+        # Sin recetas (las taxonomías e ingredientes se quedan), la exportación se vuelve a cargar igual
+        Recipe.objects.all().delete()
+        self.import_lines(exported)
+        self.assertEqual(self.export('second.ndjson'), exported)
+
+    def test_queries_do_not_grow_with_the_number_of_recipes(self):
+        def count_queries(recipes):
+            Recipe.objects.all().delete()
+            self.import_lines("".join(
+                json.dumps({**DOCUMENT, 'translations': {'es': {'title': f"Receta {n}"}}}) + "\n" for n in range(recipes)
+            ))
+            with CaptureQueriesContext(connection) as queries:
+                documents = list(iter_documents(chunk_size=100))
+            self.assertEqual(len(documents), recipes)
+            return len(queries)
+
+        self.assertEqual(count_queries(2), count_queries(20))
+
+    def test_recipes_are_read_in_keyset_pages(self):
+        self.import_lines("".join(
+            json.dumps({**DOCUMENT, 'translations': {'es': {'title': f"Receta {n}"}}}) + "\n" for n in range(5)
+        ))
+        recipe_table = connection.ops.quote_name(Recipe._meta.db_table)
+
+        with CaptureQueriesContext(connection) as queries:
+            titles = [document['translations']['es']['title'] for document in iter_documents(chunk_size=2)]
+
+        self.assertEqual(titles, [f"Receta {n}" for n in range(5)])
+        pages = [query['sql'] for query in queries if query['sql'].startswith('SELECT') and f'FROM {recipe_table}' in query['sql']]
+        self.assertEqual(len(pages), 3)
+        self.assertTrue(all('LIMIT 2' in sql for sql in pages))
+        self.assertTrue(all('> ' in sql for sql in pages[1:]))
+
+    def test_ids_filter(self):
+        self.import_lines("".join(
+            json.dumps({**DOCUMENT, 'translations': {'es': {'title': title}}}) + "\n" for title in ("Uno", "Dos")
+        ))
+        pk = Recipe.objects.translated('es', title="Dos").get().pk
+
+        exported = self.export('ids.ndjson', f'--ids={pk}')
+
+        self.assertEqual([json.loads(line)['translations']['es']['title'] for line in exported.splitlines()], ["Dos"])
+
+    def test_invalid_ids_are_rejected(self):
+        with self.assertRaisesMessage(CommandError, "--ids debe ser una lista de ids numéricos"):
+            self.export('ids.ndjson', '--ids=1,a')
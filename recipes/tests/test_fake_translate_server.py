@@ -0,0 +1,40 @@
+import threading
+from http.server import ThreadingHTTPServer
+from django.test import SimpleTestCase
+from recipes.management.commands.fake_translate_server import FakeTranslateHandler
+from utils.throttling import TokenBucket
+from utils.translation import TranslationClient
+
+
+class FakeTranslateServerTests(SimpleTestCase):
+    def start_server(self, max_rps=0):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), FakeTranslateHandler)
+        server.daemon_threads = True
+        server.latency, server.jitter, server.error_rate = 0, 0, 0
+        server.bucket = TokenBucket(max_rps)
+        server.verbose = False
+        server.lock = threading.Lock()
+        server.requests = 0
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server, f"http://127.0.0.1:{server.server_address[1]}/translate"
+
+    def test_client_translates_against_the_fake_server(self):
+        server, url = self.start_server()
+        client = TranslationClient(api_url=url, batch_size=2)
+
+        results = client.translate_batch([("uno", 'es', 'en'), ("dos", 'es', 'en'), ("tres", 'es', 'en'), ("uno", 'es', 'it')])
+
+        self.assertEqual(results, ["[en] uno", "[en] dos", "[en] tres", "[it] uno"])
+        self.assertEqual(server.requests, 3)
+
+    def test_requests_above_the_limit_get_429(self):
+        server, url = self.start_server(max_rps=1)
+        client = TranslationClient(api_url=url, max_workers=1)
+
+        with self.assertLogs(level='WARNING') as logs:
+            results = [client.translate(text, 'es', 'en') for text in ("uno", "dos")]
+
+        self.assertEqual(results, ["[en] uno", None])
+        self.assertIn('[429]', logs.output[0])
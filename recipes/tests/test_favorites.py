@@ -0,0 +1,57 @@
+import io
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from recipes.models import Recipe
+from recipes.tests.helpers import make_recipe, make_user
+from utils.favorites import get_favorite_ids, toggle_recipe_favorite
+
+
+class FavoriteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.recipe = make_recipe(make_user('ana'), "Sopa de ajo")
+        self.users = [make_user(name) for name in ('berta', 'carlos')]
+
+    def favorite_count(self):
+        return Recipe.objects.values_list('favorite_count', flat=True).get(pk=self.recipe.pk)
+
+    def test_toggle_keeps_the_counter_in_step(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(toggle_recipe_favorite(self.recipe.pk, self.users[0]))
+            self.assertTrue(toggle_recipe_favorite(self.recipe.pk, self.users[1]))
+        self.assertEqual(self.favorite_count(), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertFalse(toggle_recipe_favorite(self.recipe.pk, self.users[0]))
+        self.assertEqual(self.favorite_count(), 1)
+
+        # En cascada al borrar el usuario
+        with self.captureOnCommitCallbacks(execute=True):
+            self.users[1].delete()
+        self.assertEqual(self.favorite_count(), 0)
+
+    def test_cached_favorite_ids_are_invalidated_on_toggle(self):
+        user = self.users[0]
+        self.assertEqual(get_favorite_ids(user), frozenset())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            toggle_recipe_favorite(self.recipe.pk, user)
+        self.assertEqual(get_favorite_ids(user), {self.recipe.pk})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            toggle_recipe_favorite(self.recipe.pk, user)
+        self.assertEqual(get_favorite_ids(user), frozenset())
+
+    def test_reconcile_favorites_fixes_drifted_counters(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            toggle_recipe_favorite(self.recipe.pk, self.users[0])
+        Recipe.objects.filter(pk=self.recipe.pk).update(favorite_count=9)
+
+        out = io.StringIO()
+        call_command('reconcile_favorites', '--dry-run', stdout=out)
+        self.assertIn("9 -> 1 favoritas", out.getvalue())
+        self.assertEqual(self.favorite_count(), 9)
+
+        call_command('reconcile_favorites', stdout=io.StringIO())
+        self.assertEqual(self.favorite_count(), 1)
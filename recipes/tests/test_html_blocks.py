@@ -0,0 +1,54 @@
+from django.test import SimpleTestCase, TestCase
+from recipes.tests.helpers import FakeTranslationClient, make_recipe, make_user
+from utils.html_blocks import assemble_blocks, block_reuse_map, plan_block_translation, split_blocks
+from utils.translation import handle_translations_for_recipe, set_translation_client
+
+
+class HtmlBlocksTests(SimpleTestCase):
+    def test_segments_rebuild_the_original_text(self):
+        text = "<p>Uno</p>\n<ul><li>Dos</li><li><br></li></ul><p>Tres <b>negrita</b></p>"
+
+        segments = split_blocks(text)
+
+        self.assertEqual("".join(chunk for _, chunk in segments), text)
+        self.assertEqual(
+            [chunk for is_block, chunk in segments if is_block],
+            ["<p>Uno</p>", "<li>Dos</li>", "<p>Tres <b>negrita</b></p>"],
+        )
+
+    def test_only_changed_blocks_are_pending(self):
+        reuse = block_reuse_map("<p>Uno</p><p>Dos</p>", "<p>One</p><p>Two</p>")
+
+        segments, pending = plan_block_translation("<p>Uno</p><p>Dos y tres</p>", reuse)
+
+        self.assertEqual(pending, ["<p>Dos y tres</p>"])
+        self.assertEqual(assemble_blocks(segments, ["<p>Two and three</p>"]), "<p>One</p><p>Two and three</p>")
+
+    def test_nothing_is_reused_when_structure_differs(self):
+        self.assertEqual(block_reuse_map("<p>Uno</p><p>Dos</p>", "<p>One. Two</p>"), {})
+
+
+class IncrementalRetranslationTests(TestCase):
+    def setUp(self):
+        self.client_api = FakeTranslationClient()
+        previous = set_translation_client(self.client_api)
+        self.addCleanup(set_translation_client, previous)
+
+    def test_update_sends_only_the_edited_paragraph(self):
+        recipe = make_recipe(make_user('ana'), "Sopa")
+        recipe.instructions = "<p>Pelar.</p><p>Hervir.</p>"
+        recipe.save()
+        handle_translations_for_recipe(recipe, 'es', target_langs=['en'])
+
+        original_data = {'title': "Sopa", 'description': recipe.description, 'instructions': recipe.instructions, 'tips': ''}
+        recipe.instructions = "<p>Pelar.</p><p>Hervir diez minutos.</p>"
+        recipe.save()
+        self.client_api.calls = []
+        handle_translations_for_recipe(recipe, 'es', original_data=original_data, target_langs=['en'])
+
+        self.assertEqual([text for text, _, _ in self.client_api.calls], ["<p>Hervir diez minutos.</p>"])
+        recipe.refresh_from_db()
+        self.assertEqual(
+            recipe.safe_translation_getter('instructions', language_code='en'),
+            "<p>[en] Pelar.</p><p>[en] Hervir diez minutos.</p>",
+        )
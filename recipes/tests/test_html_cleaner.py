@@ -0,0 +1,52 @@
+from django.test import SimpleTestCase
+from utils.html_cleaner import clean_translated_html
+
+
+class CleanTranslatedHtmlTests(SimpleTestCase):
+    def assertCleans(self, cases):
+        for source, expected in cases:
+            with self.subTest(source=source):
+                self.assertEqual(clean_translated_html(source), expected)
+
+    def test_disallowed_tags_are_unwrapped_keeping_their_text(self):
+        self.assertCleans([
+            ('<div><p class="x">A</p></div>', '<p class="x">A</p>'),
+            ('<p>Uno<script>x</script></p>', '<p>Unox</p>'),
+            # Como el limpiador anterior: los espacios junto a las etiquetas se quitan
+            ('<p>Hola <span>mundo</span></p>', '<p>Holamundo</p>'),
+        ])
+
+    def test_elements_without_text_are_removed(self):
+        self.assertCleans([
+            ('<p><br></p><p>Texto</p>', '<p>Texto</p>'),
+            ('<ul><li>A</li><li> </li></ul>', '<ul><li>A</li></ul>'),
+            ('<p><img src=x>Foto</p>', '<p>Foto</p>'),
+        ])
+
+    def test_malformed_html_and_entities(self):
+        self.assertCleans([
+            ('', ''),
+            ('<p>sin cerrar', '<p>sin cerrar</p>'),
+            ('texto</p> suelto', 'textosuelto'),
+            ('<p>a &amp; b &lt;c&gt;</p>', '<p>a &amp; b &lt;c&gt;</p>'),
+        ])
+
+    def test_stray_brackets_keep_the_whitespace_of_their_text(self):
+        # El "<" suelto parte el texto en html.parser; los espacios se deciden sobre el texto entero
+        self.assertCleans([
+            ('<b>\t<', '<b>\t&lt;</b>'),
+            ('<li>x\n\t<\n</li>', '<li>x\n\t&lt;\n</li>'),
+            ('<p>Texto<b', '<p>Texto&lt;b</p>'),
+            ('<p>Uno<b>dos', '<p>Uno<b>dos</b></p>'),
+        ])
+
+    def test_differences_with_beautifulsoup(self):
+        # Salida buscada donde el limpiador anterior no servía de referencia
+        self.assertCleans([
+            # Entidades desconocidas o sin punto y coma: como las interpreta un navegador
+            ('<p>&foo; y &nbsp;</p>', '<p>&amp;foo; y \xa0</p>'),
+            ('<p>fin &amp', '<p>fin &amp;</p>'),
+            ('<p>fin &#x41', '<p>fin A</p>'),
+            # El contenido de <script> es texto escapado, no un elemento vacío
+            ('<p><script>x</script></p>', '<p>x</p>'),
+        ])
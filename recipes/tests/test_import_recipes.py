@@ -0,0 +1,161 @@
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+from django.core.management import call_command
+from django.db import connection
+from django.db.models.signals import post_save
+from django.test import TestCase
+from recipes.models import Category, Recipe, RecipeIngredient, Tag, TranslationJob
+from recipes.tests.helpers import make_user
+
+DOCUMENT = {
+    'source_lang': 'es',
+    'author': 'ana',
+    'difficulty': 'easy',
+    'prep_time': 10,
+    'cook_time': 20,
+    'servings': 4,
+    'featured': False,
+    'photo': None,
+    'category': {'es': "Postres", 'en': "Desserts"},
+    'cuisine_type': None,
+    'tags': [{'es': "Dulce"}],
+    'meal_types': [],
+    'allergens': [],
+    'cooking_methods': [],
+    'themes': [],
+    'translations': {
+        'es': {'title': "Arroz con leche", 'slug': 'arroz-con-leche', 'description': "<p>Clásico.</p>",
+               'instructions': "<p>Cocer.</p>", 'tips': ''},
+        'en': {'title': "Rice pudding", 'slug': 'rice-pudding', 'description': "<p>Classic.</p>",
+               'instructions': "<p>Cook.</p>", 'tips': ''},
+    },
+    'ingredients': [
+        {'name': {'es': "Arroz", 'en': "Rice"}, 'quantity': '200.00', 'unit': {'es': "gramo"}, 'order': 0},
+        {'name': {'es': "Leche"}, 'quantity': '1.00', 'unit': {'es': "litro"}, 'order': 1},
+    ],
+}
+
+
+class ImportRecipesTests(TestCase):
+    def setUp(self):
+        self.author = make_user('ana')
+        self.dir = tempfile.mkdtemp()
+
+    def write(self, name, content):
+        path = os.path.join(self.dir, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def import_file(self, path, *args):
+        out, err = io.StringIO(), io.StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('import_recipes', path, *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_ndjson_documents_are_imported_with_their_graph(self):
+        second = {**DOCUMENT, 'translations': {'es': {'title': "Natillas"}}, 'ingredients': []}
+        path = self.write('recetas.ndjson', "\n".join([json.dumps(DOCUMENT), "{no es json", json.dumps(second)]))
+
+        with self.assertLogs(level='WARNING'):
+            out, err = self.import_file(path, '--batch-size=1')
+
+        self.assertIn("2 recetas importadas", out)
+        self.assertIn("1 descartadas", out)
+        self.assertIn("línea 2: JSON no válido", err)
+
+        recipe = Recipe.objects.translated('es', slug='arroz-con-leche').get()
+        self.assertEqual((recipe.author, recipe.prep_time, recipe.servings), (self.author, 10, 4))
+        self.assertEqual(recipe.safe_translation_getter('title', language_code='en'), "Rice pudding")
+        self.assertEqual(recipe.category.safe_translation_getter('name', language_code='en'), "Desserts")  # type: ignore
+        self.assertEqual([str(tag) for tag in recipe.tags.all()], ["Dulce"])
+        self.assertEqual(
+            [(str(ri.ingredient), str(ri.quantity), str(ri.unit)) for ri in RecipeIngredient.objects.filter(recipe=recipe)],
+            [("Arroz", "200.00", "gramo"), ("Leche", "1.00", "litro")],
+        )
+        # Los idiomas que faltan quedan encolados para el worker
+        self.assertEqual(
+            TranslationJob.objects.get(recipe=recipe).pending_langs,
+            ['it', 'ca', 'hu', 'pt'],
+        )
+
+    def test_taxonomy_is_reused_between_batches(self):
+        path = self.write('recetas.ndjson', "\n".join(json.dumps({
+            **DOCUMENT, 'translations': {'es': {'title': f"Receta {n}"}},
+        }) for n in range(3)))
+
+        self.import_file(path, '--batch-size=2', '--no-translate')
+
+        self.assertEqual(Recipe.objects.count(), 3)
+        self.assertEqual((Category.objects.count(), Tag.objects.count()), (1, 1))
+        self.assertFalse(TranslationJob.objects.exists())
+
+    def test_csv_rows_and_unknown_authors(self):
+        path = self.write('recetas.csv', (
+            "author,title,difficulty,prep_time,category,tags,ingredients\n"
+            "ana,Gazpacho,easy,15,Sopas,Verano|Frío,tomate;1000;gramo|pepino;1;\n"
+            "nadie,Salmorejo,easy,15,Sopas,,\n"
+        ))
+
+        with self.assertLogs(level='WARNING'):
+            out, _ = self.import_file(path, '--no-translate')
+
+        self.assertIn("1 recetas importadas", out)
+        recipe = Recipe.objects.translated('es', slug='gazpacho').get()
+        self.assertEqual(sorted(str(tag) for tag in recipe.tags.all()), ["Frío", "Verano"])
+        self.assertEqual(
+            [(str(ri.ingredient), ri.unit_id is None) for ri in RecipeIngredient.objects.filter(recipe=recipe)],
+            [("tomate", False), ("pepino", True)],
+        )
+
+    def test_documents_with_unexpected_shapes_are_skipped(self):
+        malformed = [
+            {**DOCUMENT, 'translations': [{'title': "Natillas"}]},
+            {**DOCUMENT, 'translations': {'es': "Natillas"}},
+            {**DOCUMENT, 'translations': {'es': {'title': ["Natillas"]}}},
+            {**DOCUMENT, 'ingredients': {'name': "Leche"}},
+            {**DOCUMENT, 'ingredients': ["Leche"]},
+            {**DOCUMENT, 'ingredients': [{'name': {'es': ["Leche"]}}]},
+            {**DOCUMENT, 'ingredients': [{'name': "Leche", 'quantity': "Infinity"}]},
+            {**DOCUMENT, 'ingredients': [{'name': "Leche", 'order': "primero"}]},
+            {**DOCUMENT, 'tags': "Dulce"},
+            {**DOCUMENT, 'category': ["Postres"]},
+            {**DOCUMENT, 'author': {'username': 'ana'}},
+            ["no", "es", "un", "objeto"],
+        ]
+        path = self.write('recetas.ndjson', "\n".join(json.dumps(document) for document in [*malformed, DOCUMENT]))
+
+        with self.assertLogs(level='WARNING'):
+            out, err = self.import_file(path, '--no-translate')
+
+        self.assertIn("1 recetas importadas", out)
+        self.assertIn(f"{len(malformed)} descartadas", out)
+        self.assertIn("línea 1: translations debe ser un objeto", err)
+        self.assertEqual(Recipe.objects.count(), 1)
+
+    def test_row_by_row_inserts_do_not_run_receivers(self):
+        # MySQL no devuelve los ids de un INSERT múltiple
+        saves = []
+
+        def record(sender, raw=False, **kwargs):
+            saves.append((sender, raw))
+        post_save.connect(record, sender=Recipe)
+        self.addCleanup(post_save.disconnect, record, sender=Recipe)
+        path = self.write('recetas.ndjson', "\n".join(json.dumps({
+            **DOCUMENT, 'translations': {'es': {'title': f"Receta {n}"}},
+        }) for n in range(3)))
+
+        features = mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', new_callable=mock.PropertyMock, return_value=False)
+        with features:
+            self.import_file(path)
+
+        self.assertEqual(saves, [(Recipe, True)] * 3)
+        recipes = list(Recipe.objects.order_by('pk'))
+        self.assertEqual([recipe.safe_translation_getter('title', language_code='es') for recipe in recipes],
+                         ["Receta 0", "Receta 1", "Receta 2"])
+        self.assertTrue(all(recipe.created_at for recipe in recipes))
+        # Un solo trabajo por receta: el del importador, no el de un receptor
+        self.assertEqual(TranslationJob.objects.count(), 3)
@@ -0,0 +1,50 @@
+import io
+import json
+import os
+import tempfile
+from unittest import skipUnless
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from recipes.tests.helpers import make_recipe, make_user
+
+# Consultas que deben resolverse con un índice (sin recorrer la tabla)
+INDEXED_QUERIES = [
+    'recipe_detail (translations__slug)',
+    'search_recipes (título exacto por idioma)',
+    'process_ingredients_formset (translations__name)',
+    'recipe_detail (comentarios raíz)',
+    'recipe_list (mejor valoradas)',
+    'recipe_detail (¿favorita?)',
+    'recipe_list (recetas populares)',
+]
+
+
+class ExplainHotQueriesTests(TestCase):
+    def setUp(self):
+        make_recipe(make_user('ana'), "Sopa de ajo")
+        self.path = os.path.join(tempfile.mkdtemp(), 'plans.json')
+
+    def explain(self, *args):
+        out = io.StringIO()
+        call_command('explain_hot_queries', '--language=es', *args, stdout=out)
+        return out.getvalue()
+
+    def test_plans_are_saved_and_compared(self):
+        self.explain(f'--save={self.path}')
+        with open(self.path) as f:
+            plans = json.load(f)
+
+        self.assertTrue(set(INDEXED_QUERIES) <= set(plans))
+        self.assertIn("antes:", self.explain(f'--compare={self.path}'))
+
+    @skipUnless(connection.vendor == 'sqlite', "El formato del EXPLAIN depende de la base de datos")
+    def test_hot_lookups_use_indexes(self):
+        self.explain(f'--save={self.path}')
+        with open(self.path) as f:
+            plans = json.load(f)
+
+        for name in INDEXED_QUERIES:
+            with self.subTest(query=name):
+                self.assertIn("USING INDEX", plans[name])
+                self.assertNotIn("SCAN", plans[name])
@@ -0,0 +1,62 @@
+from django.test import TestCase
+from recipes.models import Ingredient
+from recipes.tests.helpers import FakeTranslationClient
+from utils.helpers import resolve_ingredients
+from utils.translation import set_translation_client, translate_ingredient_names
+
+
+class IngredientTranslationTests(TestCase):
+    def setUp(self):
+        self.client_api = FakeTranslationClient()
+        previous = set_translation_client(self.client_api)
+        self.addCleanup(set_translation_client, previous)
+
+    def test_names_are_translated_in_one_batch_and_only_where_missing(self):
+        ingredients = list(resolve_ingredients(["Ajo", "Cebolla", "Sal"], 'es').values())
+        sal = ingredients[2]
+        sal.set_current_language('en')
+        sal.name = "Salt"
+        sal.save()
+
+        pending = translate_ingredient_names(ingredients, 'es', ['en', 'it'])
+
+        self.assertEqual(pending, set())
+        self.assertEqual((self.client_api.batches, len(self.client_api.calls)), (1, 5))
+        names = {
+            (ingredient.pk, lang): ingredient.safe_translation_getter('name', language_code=lang)
+            for ingredient in Ingredient.objects.prefetch_related('translations')
+            for lang in ('en', 'it')
+        }
+        self.assertEqual(names[(sal.pk, 'en')], "Salt")
+        self.assertEqual(names[(ingredients[0].pk, 'it')], "[it] Ajo")
+
+    def test_failed_languages_are_reported(self):
+        self.client_api.fail_langs = {'it'}
+        ingredients = list(resolve_ingredients(["Ajo"], 'es').values())
+
+        self.assertEqual(translate_ingredient_names(ingredients, 'es', ['en', 'it']), {'it'})
+        self.assertFalse(ingredients[0].has_translation('it'))
+
+
+class ResolveIngredientsTests(TestCase):
+    def test_existing_names_are_matched_in_any_language(self):
+        existing = resolve_ingredients(["Ajo"], 'es')["Ajo"]
+        existing.set_current_language('en')
+        existing.name = "Garlic"
+        existing.save()
+
+        # Un IN sobre los nombres y la carga de los ingredientes
+        with self.assertNumQueries(2):
+            resolved = resolve_ingredients(["Ajo", "Garlic", "Garlic"], 'es')
+
+        self.assertEqual({name: ingredient.pk for name, ingredient in resolved.items()}, {"Ajo": existing.pk, "Garlic": existing.pk})
+
+    def test_missing_names_are_created_once_with_slugs(self):
+        resolved = resolve_ingredients(["Sal", "Pimienta", "sal"], 'es')
+
+        self.assertEqual(Ingredient.objects.count(), 2)
+        self.assertEqual(resolved["Sal"].pk, resolved["sal"].pk)
+        self.assertEqual(
+            sorted(Ingredient._parler_meta.root_model.objects.values_list('language_code', 'name', 'slug')),
+            [('es', 'Pimienta', 'pimienta'), ('es', 'Sal', 'sal')],
+        )
@@ -0,0 +1,54 @@
+import threading
+from django.test import SimpleTestCase
+from recipes.tests.test_translation_client import make_client
+from utils.profiling import profile_save, stage
+from utils.translation import set_translation_client
+
+
+class SaveProfileTests(SimpleTestCase):
+    def test_http_calls_are_counted_per_stage(self):
+        client = make_client(batch_size=1)
+
+        with profile_save('update', recipe_id=1) as profile:
+            with stage('translate_fields'):
+                client.translate_batch([("uno", 'es', 'en'), ("dos", 'es', 'en')])
+            with stage('write_translations'):
+                pass
+
+        self.assertEqual(profile.http, 2)
+        self.assertEqual([(s['stage'], s['http']) for s in profile.stages], [('translate_fields', 2), ('write_translations', 0)])
+
+    def test_concurrent_saves_only_count_their_own_calls(self):
+        client = make_client(batch_size=1)
+        profiles = {}
+        barrier = threading.Barrier(2)
+
+        def save(name, texts):
+            with profile_save('update') as profile:
+                barrier.wait()
+                client.translate_batch([(text, 'es', 'en') for text in texts])
+                barrier.wait()
+            profiles[name] = profile.http
+
+        threads = [
+            threading.Thread(target=save, args=('a', ["uno"])),
+            threading.Thread(target=save, args=('b', ["dos", "tres", "cuatro"])),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(profiles, {'a': 1, 'b': 3})
+        self.assertEqual(client.http_calls, 4)
+
+    def test_profiling_does_not_create_the_translation_client(self):
+        previous = set_translation_client(None)
+        try:
+            with profile_save('create'):
+                with stage('form_save'):
+                    pass
+        finally:
+            created = set_translation_client(previous)
+
+        self.assertIsNone(created)
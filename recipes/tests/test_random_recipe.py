@@ -0,0 +1,56 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import translation
+from recipes.models import Recipe
+from recipes.tests.helpers import FakeTranslationClient, add_translation, make_recipe, make_user
+from utils.translation import handle_translations_for_recipe, set_translation_client
+
+PHOTO = 'recipes/photos/sopa.jpg'
+
+
+class RandomRecipeJsonTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = make_user('ana')
+
+    def random_recipe(self, language='es'):
+        with translation.override(language):
+            return self.client.get(reverse('recipes:random_recipe_json'))
+
+    def test_new_recipe_is_served_once_saved(self):
+        self.assertEqual(self.random_recipe().status_code, 404)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_recipe(self.author, "Sopa de ajo", photo=PHOTO)
+
+        data = self.random_recipe().json()
+        self.assertEqual(data['title'], "Sopa de ajo")
+        self.assertTrue(data['url'].endswith('/sopa-de-ajo/'))
+        self.assertTrue(data['image_url'].endswith(PHOTO))
+
+    def test_recipes_join_the_pool_of_each_new_language(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe = make_recipe(self.author, "Sopa de ajo", photo=PHOTO)
+        self.assertEqual(self.random_recipe('en').status_code, 404)
+        self.assertEqual(self.random_recipe('it').status_code, 404)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            add_translation(recipe, 'en', "Garlic soup")
+        self.assertEqual(self.random_recipe('en').json()['title'], "Garlic soup")
+
+        # Las traducciones del worker se escriben en bloque, sin señales
+        previous = set_translation_client(FakeTranslationClient())
+        self.addCleanup(set_translation_client, previous)
+        with self.captureOnCommitCallbacks(execute=True):
+            handle_translations_for_recipe(recipe, 'es', target_langs=['it'])
+        self.assertEqual(self.random_recipe('it').json()['title'], "[it] Sopa de ajo")
+
+    def test_recipes_without_photo_are_skipped_and_dropped(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe = make_recipe(self.author, "Sopa de ajo", photo=PHOTO)
+        self.random_recipe()
+        Recipe.objects.filter(pk=recipe.pk).update(photo='')
+
+        self.assertEqual(self.random_recipe().status_code, 404)
+        self.assertIn('no-cache', self.random_recipe()['Cache-Control'])
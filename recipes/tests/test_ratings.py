@@ -0,0 +1,48 @@
+import io
+from django.core.management import call_command
+from django.test import TestCase
+from recipes.models import Rating, Recipe
+from recipes.tests.helpers import make_recipe, make_user
+from utils.ratings import set_rating
+
+
+class RatingAggregateTests(TestCase):
+    def setUp(self):
+        self.recipe = make_recipe(make_user('ana'), "Sopa de ajo")
+        self.voters = [make_user(name) for name in ('berta', 'carlos')]
+
+    def aggregates(self):
+        return Recipe.objects.values_list('rating_count', 'rating_sum', 'rating_avg').get(pk=self.recipe.pk)
+
+    def test_votes_and_changes_update_the_aggregates(self):
+        set_rating(self.recipe, self.voters[0], 5)
+        _, created = set_rating(self.recipe, self.voters[1], 2)
+        self.assertTrue(created)
+        self.assertEqual(self.aggregates(), (2, 7, 3.5))
+
+        _, created = set_rating(self.recipe, self.voters[1], 4)
+        self.assertFalse(created)
+        self.assertEqual(self.aggregates(), (2, 9, 4.5))
+
+    def test_deleted_ratings_are_discounted(self):
+        set_rating(self.recipe, self.voters[0], 5)
+        set_rating(self.recipe, self.voters[1], 2)
+
+        Rating.objects.get(user=self.voters[0]).delete()
+        self.assertEqual(self.aggregates(), (1, 2, 2.0))
+
+        # En cascada al borrar el usuario
+        self.voters[1].delete()
+        self.assertEqual(self.aggregates(), (0, 0, 0.0))
+
+    def test_reconcile_ratings_fixes_drifted_recipes(self):
+        set_rating(self.recipe, self.voters[0], 4)
+        Recipe.objects.filter(pk=self.recipe.pk).update(rating_count=7, rating_sum=3, rating_avg=1)
+
+        out = io.StringIO()
+        call_command('reconcile_ratings', '--dry-run', stdout=out)
+        self.assertIn("1 desviadas", out.getvalue())
+        self.assertEqual(self.aggregates(), (7, 3, 1.0))
+
+        call_command('reconcile_ratings', stdout=io.StringIO())
+        self.assertEqual(self.aggregates(), (1, 4, 4.0))
@@ -0,0 +1,77 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import translation
+from recipes.tests.helpers import make_category, make_recipe, make_user
+from utils.detail_cache import get_detail_page
+
+JSON = {'Accept': 'application/json'}
+
+
+class RecipeDetailPageTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        translation.activate('es')
+        self.author = make_user('ana')
+        self.reader = make_user('berta')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe = make_recipe(self.author, "Sopa de ajo", category=make_category("Sopas"))
+        self.url = reverse('recipes:recipe_detail', kwargs={'slug': 'sopa-de-ajo'})
+
+    def get(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_cached_page_is_served_without_loading_the_recipe(self):
+        self.assertIn("Sopa de ajo", self.get())
+
+        # Página cacheada: solo la versión de la receta (caché) y la sesión, sin consultas de la receta
+        with self.assertNumQueries(0):
+            self.assertIn("Sopa de ajo", self.get())
+
+    def test_posted_comment_shows_up_on_the_next_visit(self):
+        self.get()
+        self.client.force_login(self.reader)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('recipes:add_comment', kwargs={'slug': 'sopa-de-ajo'}),
+                {'content': "¡Me ha encantado esta sopa!"}, headers=JSON,
+            )
+        self.assertEqual(response.status_code, 201)
+
+        self.assertIn("¡Me ha encantado esta sopa!", self.get())
+        self.client.logout()
+        self.assertIn("¡Me ha encantado esta sopa!", self.get())
+
+    def test_rating_shows_up_on_the_next_visit(self):
+        self.assertNotIn("1 voto", self.get())
+        self.client.force_login(self.reader)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('recipes:rate_recipe', kwargs={'slug': 'sopa-de-ajo'}), {'rating': '4'}, headers=JSON)
+
+        self.client.logout()
+        self.assertIn("1 voto", self.get())
+
+    def test_edited_recipe_shows_up_on_the_next_visit(self):
+        self.get()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe.instructions = "<p>Tostar el pan.</p>"
+            self.recipe.save()
+
+        self.assertIn("Tostar el pan.", self.get())
+
+    def test_user_state_is_not_part_of_the_cached_page(self):
+        self.client.force_login(self.author)
+        self.get()
+
+        state = self.client.get(reverse('recipes:recipe_user_state_json', kwargs={'slug': 'sopa-de-ajo'})).json()
+
+        # El token y los datos del autor los pone la página con recipe_user_state_json
+        page = get_detail_page('es', 'sopa-de-ajo', authenticated=True)
+        self.assertNotIn(state['csrf_token'], page['body'])
+        self.assertIn('name="csrfmiddlewaretoken" value=""', page['body'])
+        self.assertTrue(state['is_author'])
@@ -0,0 +1,90 @@
+import io
+import shutil
+import tempfile
+from PIL import Image
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import translation
+from recipes.models import Recipe, TranslationJob, TranslationJobStatus
+from recipes.tests.helpers import make_category, make_recipe, make_user
+
+MEDIA_ROOT = tempfile.mkdtemp()
+# Ediciones que no tocan los ingredientes
+NO_INGREDIENTS = {'ingredients-TOTAL_FORMS': '0'}
+
+
+def recipe_post(title, category, **extra):
+    data = {
+        'title': title,
+        'category': str(category.pk),
+        'difficulty': 'easy',
+        'prep_time': '15',
+        'cook_time': '10',
+        'servings': '2',
+        'description': '<p>Plato de prueba.</p>',
+        'instructions': '<p>Mezclar y servir.</p>',
+        'tips': '',
+        'ingredients-TOTAL_FORMS': '1',
+        'ingredients-INITIAL_FORMS': '0',
+        'ingredients-MIN_NUM_FORMS': '0',
+        'ingredients-MAX_NUM_FORMS': '1000',
+        'ingredients-0-ingredient_name': 'Arroz',
+        'ingredients-0-quantity': '200',
+        'ingredients-0-unit': '',
+    }
+    data.update(extra)
+    return data
+
+
+def photo():
+    buffer = io.BytesIO()
+    Image.new('RGB', (600, 400), 'white').save(buffer, 'PNG')
+    return SimpleUploadedFile('plato.png', buffer.getvalue(), content_type='image/png')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class SaveRecipeTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.author = make_user('ana')
+        self.client.force_login(self.author)
+        self.category = make_category("Arroces")
+        translation.activate('es')
+
+    def test_creating_a_recipe_enqueues_its_translation(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('recipes:recipe_create'), recipe_post("Arroz blanco", self.category, photo=photo()))
+
+        self.assertEqual(response.status_code, 302)
+        recipe = Recipe.objects.translated('es', slug='arroz-blanco').get()
+        job = TranslationJob.objects.get(recipe=recipe)
+        self.assertEqual((job.status, job.source_lang, job.original_data), (TranslationJobStatus.PENDING, 'es', None))
+        self.assertEqual([ri.ingredient.safe_translation_getter('name', any_language=True) for ri in recipe.recipe_ingredients.all()], ['Arroz'])  # type: ignore
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.role, 'author')
+
+    def test_editing_a_recipe_enqueues_a_job_with_the_original_text(self):
+        recipe = make_recipe(self.author, "Arroz blanco", category=self.category)
+        url = reverse('recipes:recipe_update', kwargs={'slug': 'arroz-blanco'})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, recipe_post("Arroz blanco", self.category, instructions='<p>Cocer.</p>', **NO_INGREDIENTS))
+
+        self.assertEqual(response.status_code, 302)
+        job = TranslationJob.objects.get(recipe=recipe)
+        self.assertEqual(job.original_data['instructions'], '<p>Mezclar.</p>')  # type: ignore
+
+    def test_pending_job_is_reused_by_later_edits(self):
+        recipe = make_recipe(self.author, "Arroz blanco", category=self.category)
+        url = reverse('recipes:recipe_update', kwargs={'slug': 'arroz-blanco'})
+
+        for instructions in ('<p>Cocer.</p>', '<p>Cocer y reposar.</p>'):
+            self.client.post(url, recipe_post("Arroz blanco", self.category, instructions=instructions, **NO_INGREDIENTS))
+
+        job = TranslationJob.objects.get(recipe=recipe)
+        self.assertEqual(job.original_data['instructions'], '<p>Mezclar.</p>')  # type: ignore
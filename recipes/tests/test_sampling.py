@@ -0,0 +1,88 @@
+import time
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase
+from recipes.models import Recipe, Theme
+from recipes.tests.helpers import make_category, make_recipe, make_user
+from utils.sampling import BY_CATEGORY, BY_THEME, EASY, FEATURED, POOL_CACHE_SECONDS, invalidate_pools
+
+
+class IdPoolTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = make_user('ana')
+        self.category = make_category("Sopas")
+
+    def recipe(self, title, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            return make_recipe(self.author, title, category=self.category, **fields)
+
+    def test_saved_recipes_join_existing_pools_without_a_rebuild(self):
+        first = self.recipe("Sopa de ajo")
+        self.assertEqual(list(EASY.ids()), [first.pk])
+
+        second = self.recipe("Gazpacho", featured=True, photo='recipes/photos/gazpacho.jpg')
+        self.recipe("Cocido", difficulty='hard')
+
+        with self.assertNumQueries(0):
+            self.assertEqual(sorted(EASY.ids()), [first.pk, second.pk])
+        self.assertEqual(list(FEATURED.ids()), [second.pk])
+        self.assertEqual(sorted(BY_CATEGORY.ids(self.category.pk)), sorted(Recipe.objects.values_list('pk', flat=True)))
+
+    def test_changes_keep_the_expiry_of_the_built_array(self):
+        first = self.recipe("Sopa de ajo")
+        EASY.ids()
+        built = time.time()
+
+        with mock.patch('time.time', return_value=built + POOL_CACHE_SECONDS / 2):
+            second = self.recipe("Gazpacho")
+            self.assertEqual(sorted(EASY.ids()), [first.pk, second.pk])
+
+        # El alta no renueva la caducidad: pasado el plazo original, el array se reconstruye
+        EASY._local.clear()
+        with mock.patch('time.time', return_value=built + POOL_CACHE_SECONDS + 1), self.assertNumQueries(1):
+            self.assertEqual(sorted(EASY.ids()), [first.pk, second.pk])
+
+    def test_samples_are_validated_and_stale_ids_dropped(self):
+        kept = self.recipe("Sopa de ajo")
+        changed = self.recipe("Gazpacho")
+        EASY.ids()
+        # Un UPDATE en bloque no envía señales: el id sigue en el array hasta que se muestrea
+        Recipe.objects.filter(pk=changed.pk).update(difficulty='hard')
+
+        self.assertEqual(EASY.sample_ids(5), [kept.pk])
+        self.assertEqual(list(EASY.ids()), [kept.pk])
+
+    def test_deleted_recipes_leave_the_pools(self):
+        recipe = self.recipe("Sopa de ajo")
+        EASY.ids()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.delete()
+
+        self.assertEqual(list(EASY.ids()), [])
+
+    def test_theme_pools_follow_m2m_changes(self):
+        recipe = self.recipe("Sopa de ajo")
+        theme = Theme.objects.create(name="Invierno", slug='invierno')
+        self.assertEqual(list(BY_THEME.ids(theme.pk)), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.themes.add(theme)
+        self.assertEqual(list(BY_THEME.ids(theme.pk)), [recipe.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            theme.recipes.remove(recipe)
+        self.assertEqual(list(BY_THEME.ids(theme.pk)), [])
+
+    def test_sample_excludes_and_invalidate_rebuilds(self):
+        recipes = [self.recipe(f"Sopa {n}") for n in range(4)]
+        EASY.ids()
+
+        sample = EASY.sample(3, exclude=[recipes[0].pk])
+        self.assertEqual(len(sample), 3)
+        self.assertNotIn(recipes[0], sample)
+
+        Recipe.objects.filter(pk=recipes[1].pk).update(difficulty='hard')
+        invalidate_pools()
+        self.assertNotIn(recipes[1].pk, EASY.ids())
@@ -0,0 +1,86 @@
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import translation
+from recipes.models import Theme
+from recipes.tests.helpers import make_recipe, make_user
+from utils import shelves
+from utils.ratings import set_rating
+from utils.shelves import get_shelves
+
+
+class ShelfCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = make_user('ana')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe = make_recipe(self.author, "Sopa de ajo")
+
+    def shelf(self, name):
+        return [recipe.pk for recipe in get_shelves('es', [])[name]]
+
+    def test_warm_shelves_are_read_from_the_cache(self):
+        get_shelves('es', [])
+
+        # Tarjetas y sus traducciones; las estanterías salen del caché
+        with self.assertNumQueries(2):
+            get_shelves('es', [])
+
+    def test_new_recipe_shows_up_on_its_shelves(self):
+        self.assertEqual(self.shelf('recent_recipes'), [self.recipe.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            new = make_recipe(self.author, "Gazpacho")
+
+        self.assertEqual(self.shelf('recent_recipes')[0], new.pk)
+        self.assertIn(new.pk, self.shelf('easy_recipes'))
+
+    def test_ratings_reorder_the_top_shelf(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            other = make_recipe(self.author, "Gazpacho")
+        self.shelf('top_recipes')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            set_rating(other, make_user('berta'), 5)
+
+        self.assertEqual(self.shelf('top_recipes')[0], other.pk)
+
+    def test_deleted_recipe_leaves_the_shelves(self):
+        self.shelf('recent_recipes')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe.delete()
+
+        self.assertEqual(self.shelf('recent_recipes'), [])
+
+
+class RecipeListViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        translation.activate('es')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe = make_recipe(make_user('ana'), "Sopa de ajo", photo='recipes/photos/sopa.jpg')
+            theme = Theme.objects.language('es').create(name="Navidad", slug='navidad')
+            theme.translations.create(language_code='en', name="Christmas", slug='christmas')
+            self.recipe.themes.add(theme)
+
+    def get(self, language='es'):
+        with translation.override(language), \
+                mock.patch('views.recipes_views.get_current_theme_slugs', return_value=['navidad']):
+            response = self.client.get(reverse('recipes:recipe_list'))
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_second_request_is_served_from_the_shelf_cache(self):
+        with mock.patch.object(shelves, '_build_shelves', wraps=shelves._build_shelves) as build:
+            first = self.get()
+            second = self.get()
+
+        build.assert_called_once()
+        self.assertEqual(first.context['theme_name'], "Navidad")
+        self.assertEqual(second.context['theme_name'], "Navidad")
+        self.assertEqual([recipe.pk for recipe in second.context['actualidad_recipes']], [self.recipe.pk])
+
+    def test_theme_name_follows_the_language(self):
+        self.assertEqual(self.get('en').context['theme_name'], "Christmas")
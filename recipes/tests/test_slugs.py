@@ -0,0 +1,41 @@
+from django.test import TestCase
+from recipes.models import Recipe, SlugRegistry
+from recipes.tests.helpers import add_translation, make_recipe, make_user
+from utils.services import generate_unique_slug
+
+
+class SlugRegistryTests(TestCase):
+    def setUp(self):
+        self.author = make_user('ana')
+
+    def _registry(self, slug):
+        return SlugRegistry.objects.filter(model_label=Recipe._meta.label, slug=slug)
+
+    def test_reservation_gets_object_id_when_translation_is_saved(self):
+        slug = generate_unique_slug(Recipe, "Tortilla de patatas", 'es')
+        self.assertEqual(list(self._registry(slug).values_list('object_id', flat=True)), [None])
+
+        recipe = make_recipe(self.author, "Tortilla de patatas", slug=slug)
+
+        self.assertEqual(list(self._registry(slug).values_list('object_id', 'language_code')), [(recipe.pk, 'es')])
+
+    def test_recipe_keeps_its_own_slug_on_later_saves(self):
+        recipe = make_recipe(self.author, "Paella", slug=generate_unique_slug(Recipe, "Paella", 'es'))
+
+        self.assertEqual(generate_unique_slug(Recipe, "Paella", 'es', object_id=recipe.pk), 'paella')
+
+    def test_taken_slug_gets_next_suffix(self):
+        first = generate_unique_slug(Recipe, "Paella", 'es')
+        second = generate_unique_slug(Recipe, "Paella", 'es')
+
+        self.assertEqual((first, second), ('paella', 'paella-1'))
+
+    def test_renamed_and_deleted_slugs_are_released(self):
+        recipe = make_recipe(self.author, "Gazpacho")
+        add_translation(recipe, 'es', "Gazpacho andaluz")
+
+        self.assertFalse(self._registry('gazpacho').exists())
+        self.assertTrue(self._registry('gazpacho-andaluz').exists())
+
+        recipe.delete()
+        self.assertFalse(self._registry('gazpacho-andaluz').exists())
@@ -0,0 +1,100 @@
+from datetime import timedelta
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone, translation
+from recipes.models import Ingredient, Recipe, RecipeIngredient, RecipeSnapshot, Tag
+from recipes.tests.helpers import make_category, make_recipe, make_user
+from utils.detail_cache import invalidate_recipe_detail
+from utils.helpers import resolve_ingredients
+from utils.services import bulk_write_translations
+from utils.snapshots import SNAPSHOT_MAX_AGE, build_snapshot, get_snapshot
+
+
+class RecipeSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        translation.activate('es')
+        self.category = make_category("Sopas")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe = make_recipe(make_user('ana'), "Sopa de ajo", category=self.category)
+        self.url = reverse('recipes:recipe_detail', kwargs={'slug': 'sopa-de-ajo'})
+
+    def visit(self):
+        # Sin la página cacheada, para que la vista lea la ficha
+        cache.clear()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_first_visit_builds_the_snapshot_and_later_ones_read_it(self):
+        self.visit()
+        snapshot = get_snapshot('es', 'sopa-de-ajo')
+        self.assertEqual((snapshot.recipe_id, snapshot.data['title'], snapshot.data['category']['name']),  # type: ignore
+                         (self.recipe.pk, "Sopa de ajo", "Sopas"))
+
+        with self.assertNumQueries(3):
+            # Ficha, ids de la categoría para las recomendadas y comentarios: nada de la carga completa
+            self.assertIn("Sopa de ajo", self.visit())
+
+    def test_saving_the_recipe_deletes_its_snapshots(self):
+        self.visit()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe.prep_time = 45
+            self.recipe.save()
+
+        self.assertFalse(RecipeSnapshot.objects.exists())
+        self.visit()
+        self.assertEqual(get_snapshot('es', 'sopa-de-ajo').data['prep_time'], 45)  # type: ignore
+
+    def test_renamed_taxonomy_refreshes_the_snapshots_that_show_it(self):
+        tag = Tag.objects.create(name="Invierno", slug='invierno')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe.tags.add(tag)
+        self.visit()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = "Sopas y cremas"
+            self.category.save()
+        self.assertIn("Sopas y cremas", self.visit())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tag.name = "Invierno frío"
+            tag.save()
+        self.assertEqual(get_snapshot('es', 'sopa-de-ajo'), None)
+        self.assertIn("Invierno frío", self.visit())
+
+    def test_bulk_written_ingredient_names_refresh_the_detail_page(self):
+        ingredient = resolve_ingredients(["Ajo"], 'es')["Ajo"]
+        with self.captureOnCommitCallbacks(execute=True):
+            RecipeIngredient.objects.create(recipe=self.recipe, ingredient=ingredient, quantity=2)
+        self.assertIn("Ajo", self.client.get(self.url).content.decode())
+        self.assertTrue(RecipeSnapshot.objects.exists())
+
+        # Como el worker o el backfill: filas de traducción escritas en bloque, sin save()
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_write_translations(Ingredient, {(ingredient.pk, 'es'): {'name': "Ajo morado"}})
+
+        self.assertFalse(RecipeSnapshot.objects.exists())
+        # Sin cache.clear(): la página cacheada también queda obsoleta
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Ajo morado", response.content.decode())
+
+    def test_expired_snapshots_are_ignored(self):
+        self.visit()
+        RecipeSnapshot.objects.update(built_at=timezone.now() - timedelta(seconds=SNAPSHOT_MAX_AGE + 1))
+
+        self.assertIsNone(get_snapshot('es', 'sopa-de-ajo'))
+
+    def test_snapshot_is_not_stored_when_the_recipe_changes_while_building(self):
+        recipe = Recipe.objects.get(pk=self.recipe.pk)
+
+        # La receta cambia mientras se leen sus relaciones
+        with mock.patch('utils.snapshots._names', side_effect=lambda manager: invalidate_recipe_detail(recipe.pk) or []):
+            snapshot = build_snapshot(recipe, 'es', 'sopa-de-ajo')
+
+        self.assertEqual(snapshot.data['title'], "Sopa de ajo")
+        self.assertFalse(RecipeSnapshot.objects.exists())
@@ -0,0 +1,89 @@
+import time
+from django.test import SimpleTestCase
+from recipes.tests.test_translation_client import FakeSession, make_client
+from utils.throttling import CircuitBreaker, TokenBucket
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def test_opens_after_threshold_and_closes_after_successful_probe(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.01)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+
+        time.sleep(0.02)
+        self.assertTrue(breaker.allow())
+        # Una sola llamada de prueba a la vez
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_released_probe_lets_the_next_call_probe(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+        breaker.record_failure()
+        time.sleep(0.02)
+
+        self.assertTrue(breaker.allow())
+        breaker.release()
+
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertTrue(breaker.allow())
+
+
+class TokenBucketTests(SimpleTestCase):
+    def test_acquire_times_out_without_tokens(self):
+        bucket = TokenBucket(rate=1, capacity=1)
+
+        self.assertTrue(bucket.acquire(timeout=0))
+        self.assertFalse(bucket.acquire(timeout=0.01))
+
+    def test_zero_rate_is_unlimited(self):
+        bucket = TokenBucket(rate=0)
+
+        self.assertTrue(all(bucket.acquire(timeout=0) for _ in range(100)))
+
+
+class ClientBreakerTests(SimpleTestCase):
+    def test_client_recovers_after_rate_limited_probe(self):
+        session = FakeSession(status_code=503)
+        client = make_client(
+            session,
+            timeout=0.01,
+            breaker=CircuitBreaker(failure_threshold=1, reset_timeout=0.01),
+            rate_limiter=TokenBucket(rate=50, capacity=1),
+        )
+
+        # El servicio falla: circuito abierto y fallos inmediatos sin petición HTTP
+        with self.assertLogs(level='WARNING'):
+            self.assertIsNone(client.translate("Sal", 'es', 'en'))
+        self.assertEqual(client.breaker.state, CircuitBreaker.OPEN)
+        self.assertIsNone(client.translate("Sal", 'es', 'en'))
+        self.assertEqual(len(session.requests), 1)
+
+        # Pasado el reset, la llamada de prueba se queda sin cupo del limitador
+        time.sleep(0.02)
+        client.rate_limiter.tokens = 0
+        client.rate_limiter.updated_at = time.monotonic()
+        client.rate_limiter.rate = 1
+        with self.assertLogs(level='WARNING'):
+            self.assertIsNone(client.translate("Sal", 'es', 'en'))
+        self.assertEqual(client.breaker.state, CircuitBreaker.OPEN)
+
+        # Con cupo y el servicio de vuelta, la siguiente llamada prueba y cierra el circuito
+        client.rate_limiter.rate = 0
+        session.status_code = 200
+        self.assertEqual(client.translate("Sal", 'es', 'en'), "[en] Sal")
+        self.assertEqual(client.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_wrong_number_of_texts_does_not_leave_the_circuit_half_open(self):
+        class ShortSession(FakeSession):
+            def post(self, url, json, timeout):
+                return super().post(url, {**json, 'q': json['q'][:1]}, timeout)
+
+        client = make_client(ShortSession(), breaker=CircuitBreaker(failure_threshold=1, reset_timeout=0))
+        client.breaker.record_failure()
+
+        with self.assertLogs(level='WARNING'):
+            self.assertEqual(client.translate_batch([("Sal", 'es', 'en'), ("Ajo", 'es', 'en')]), [None, None])
+        self.assertEqual(client.breaker.state, CircuitBreaker.CLOSED)
@@ -0,0 +1,68 @@
+import threading
+from django.test import SimpleTestCase
+from utils.translation import TranslationClient
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self._payload = payload
+        self.text = str(payload)
+
+    def json(self):
+        return self._payload
+
+
+class FakeSession:
+    """Sustituye a requests.Session: traduce anteponiendo el idioma o responde con el código indicado."""
+
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def post(self, url, json, timeout):
+        with self._lock:
+            self.requests.append(json)
+        if self.status_code != 200:
+            return FakeResponse(self.status_code, {'error': 'fallo'})
+        texts = json['q'] if isinstance(json['q'], list) else [json['q']]
+        translated = [f"[{json['target']}] {text}" for text in texts]
+        return FakeResponse(200, {'translatedText': translated if isinstance(json['q'], list) else translated[0]})
+
+
+def make_client(session=None, **kwargs):
+    client = TranslationClient(api_url='http://translate.test/translate', **kwargs)
+    client.session = session or FakeSession()
+    return client
+
+
+class TranslationClientTests(SimpleTestCase):
+    def test_batch_keeps_order_and_groups_by_language_pair(self):
+        client = make_client(batch_size=2)
+        items = [
+            ("uno", 'es', 'en'), ("dos", 'es', 'en'), ("tres", 'es', 'en'),
+            ("uno", 'es', 'it'), ("", 'es', 'it'), ("igual", 'es', 'es'),
+        ]
+
+        results = client.translate_batch(items)
+
+        self.assertEqual(results, ["[en] uno", "[en] dos", "[en] tres", "[it] uno", "", "igual"])
+        # es→en en dos peticiones (lotes de 2) y es→it en una
+        self.assertEqual(sorted((r['target'], len(r['q']) if isinstance(r['q'], list) else 1) for r in client.session.requests),
+                         [('en', 1), ('en', 2), ('it', 1)])
+        self.assertEqual(client.http_calls, 3)
+
+    def test_repeated_texts_are_requested_once(self):
+        client = make_client()
+
+        results = client.translate_batch([("sal", 'es', 'en')] * 3)
+
+        self.assertEqual(results, ["[en] sal"] * 3)
+        self.assertEqual(len(client.session.requests), 1)
+
+    def test_http_errors_return_none(self):
+        client = make_client(FakeSession(status_code=400))
+
+        with self.assertLogs(level='WARNING'):
+            self.assertEqual(client.translate_batch([("sal", 'es', 'en'), ("azúcar", 'es', 'en')]), [None, None])
@@ -0,0 +1,92 @@
+from datetime import timedelta
+from unittest import mock
+from django.test import TestCase
+from django.utils import timezone
+from recipes.models import TranslationJob, TranslationJobStatus
+from recipes.tests.helpers import FakeTranslationClient, make_recipe, make_user
+from utils.translation import set_translation_client
+from utils.translation_jobs import RETRY_BASE_DELAY, claim_next_job, enqueue_recipe_translation, requeue_stale_jobs, run_job
+
+
+class TranslationJobTests(TestCase):
+    def setUp(self):
+        self.client_api = FakeTranslationClient()
+        previous = set_translation_client(self.client_api)
+        self.addCleanup(set_translation_client, previous)
+        self.recipe = make_recipe(make_user('ana'), "Sopa de ajo")
+        TranslationJob.objects.all().delete()
+
+    def _run_next(self):
+        job = claim_next_job()
+        with self.captureOnCommitCallbacks(execute=True):
+            run_job(job)
+        job.refresh_from_db()
+        return job
+
+    def test_job_translates_recipe_into_the_other_languages(self):
+        enqueue_recipe_translation(self.recipe, 'es')
+
+        job = self._run_next()
+
+        self.assertEqual((job.status, job.attempts), (TranslationJobStatus.DONE, 1))
+        self.recipe.set_current_language('en')
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.safe_translation_getter('title', language_code='en'), "[en] Sopa de ajo")
+        self.assertEqual(
+            sorted(self.recipe.get_available_languages()),  # type: ignore
+            sorted(['es', 'en', 'it', 'ca', 'hu', 'pt']),
+        )
+
+    def test_unavailable_languages_are_retried_later(self):
+        self.client_api.fail_langs = {'it', 'hu'}
+        enqueue_recipe_translation(self.recipe, 'es')
+
+        before = timezone.now()
+        with self.assertLogs(level='WARNING'):
+            job = self._run_next()
+
+        self.assertEqual(job.status, TranslationJobStatus.PENDING)
+        self.assertEqual(job.pending_langs, ['hu', 'it'])
+        self.assertGreaterEqual(job.run_after, before + timedelta(seconds=RETRY_BASE_DELAY))
+        self.assertIsNone(claim_next_job())
+
+        # En el reintento solo se piden los idiomas pendientes
+        TranslationJob.objects.update(run_after=timezone.now())
+        self.client_api.fail_langs = set()
+        self.client_api.calls = []
+        job = self._run_next()
+
+        self.assertEqual((job.status, job.attempts, job.pending_langs), (TranslationJobStatus.DONE, 2, None))
+        self.assertEqual({target for _, _, target in self.client_api.calls}, {'it', 'hu'})
+
+    def test_failures_back_off_exponentially_until_max_attempts(self):
+        job = enqueue_recipe_translation(self.recipe, 'es')
+        TranslationJob.objects.filter(pk=job.pk).update(max_attempts=3)
+
+        delays = []
+        with mock.patch('utils.translation_jobs.handle_translations_for_recipe', side_effect=RuntimeError("boom")), \
+                self.assertLogs(level='ERROR'):
+            for _ in range(3):
+                TranslationJob.objects.update(run_after=timezone.now())
+                started = timezone.now()
+                job = self._run_next()
+                delays.append(round((job.run_after - started).total_seconds()))
+
+        self.assertEqual(delays[:2], [RETRY_BASE_DELAY, RETRY_BASE_DELAY * 2])
+        self.assertEqual((job.status, job.attempts, job.last_error), (TranslationJobStatus.FAILED, 3, "boom"))
+        self.assertIsNone(claim_next_job())
+
+    def test_stale_running_jobs_are_requeued(self):
+        job = enqueue_recipe_translation(self.recipe, 'es')
+        claim_next_job()
+        TranslationJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(requeue_stale_jobs(), 1)
+        self.assertEqual(claim_next_job().pk, job.pk)  # type: ignore
+
+    def test_enqueue_reuses_pending_job(self):
+        first = enqueue_recipe_translation(self.recipe, 'es', original_data={'title': "Sopa"})
+        second = enqueue_recipe_translation(self.recipe, 'es', original_data={'title': "Sopa castellana"})
+
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(TranslationJob.objects.get().original_data, {'title': "Sopa"})
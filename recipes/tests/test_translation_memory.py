@@ -0,0 +1,48 @@
+from datetime import timedelta
+from django.test import TestCase
+from django.utils import timezone
+from recipes.models import TranslationMemory
+from recipes.tests.test_translation_client import make_client
+from utils.translation_memory import TranslationCache
+
+
+class TranslationMemoryTests(TestCase):
+    def test_translations_are_served_from_memory_then_database(self):
+        client = make_client(memory=TranslationCache())
+        client.translate_batch([("Sopa  de ajo", 'es', 'en')])
+
+        row = TranslationMemory.objects.get()
+        self.assertEqual((row.source_text, row.translated_text), ("Sopa de ajo", "[en] Sopa  de ajo"))
+
+        # Mismo texto con otros espacios: sin petición HTTP, desde el LRU del proceso
+        self.assertEqual(client.translate("Sopa de ajo ", 'es', 'en'), "[en] Sopa  de ajo")
+        self.assertEqual(client.http_calls, 1)
+
+        # Otro proceso (LRU vacío) la encuentra en la tabla
+        other = make_client(memory=TranslationCache())
+        self.assertEqual(other.translate("Sopa de ajo", 'es', 'en'), "[en] Sopa  de ajo")
+        self.assertEqual((other.http_calls, other.memory.stats['db_hits']), (0, 1))
+        self.assertEqual(TranslationMemory.objects.get().hits, 1)
+
+    def test_failed_translations_are_not_stored(self):
+        client = make_client(memory=TranslationCache())
+        client.session.status_code = 503
+
+        with self.assertLogs(level='WARNING'):
+            self.assertIsNone(client.translate("Sopa", 'es', 'en'))
+        self.assertFalse(TranslationMemory.objects.exists())
+
+    def test_expired_entries_are_ignored_and_pruned(self):
+        memory = TranslationCache(ttl_days=30)
+        memory.set_many({("Sopa", 'es', 'en'): "Soup"})
+        TranslationMemory.objects.update(last_used_at=timezone.now() - timedelta(days=31))
+        memory.clear()
+
+        self.assertEqual(memory.get_many([("Sopa", 'es', 'en')]), {})
+        self.assertEqual(memory.prune(), 1)
+
+    def test_lru_is_bounded(self):
+        memory = TranslationCache(maxsize=2)
+        memory.set_many({("uno", 'es', 'en'): "one", ("dos", 'es', 'en'): "two", ("tres", 'es', 'en'): "three"})
+
+        self.assertEqual(len(memory._lru), 2)
@@ -10,6 +10,8 @@ from views.recipes_views import (
     RecipeDeleteView,
     rate_recipe,
     add_comment,
+    comment_replies_json,
+    recipe_user_state_json,
     toggle_favorite,
 )
 
@@ -26,5 +28,7 @@ urlpatterns = [
     path(_('<slug:slug>/delete/'), RecipeDeleteView.as_view(), name='recipe_delete'),
     path(_('<slug:slug>/rate/'), rate_recipe, name='rate_recipe'),
     path(_('<slug:slug>/comment/'), add_comment, name='add_comment'),
+    path('<slug:slug>/comments/<int:comment_id>/replies/', comment_replies_json, name='comment_replies_json'),
+    path('<slug:slug>/state/', recipe_user_state_json, name='recipe_user_state_json'),
     path(category_prefix  + '<slug:slug>/', CategoryDetailView.as_view(), name='category_detail'),
 ]
\ No newline at end of file
@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta, timezone
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+from recipes.models import Comment
+
+# Comentarios raíz por página y respuestas que se pintan de entrada en cada hilo;
+# el resto se pide bajo demanda al endpoint JSON de respuestas.
+COMMENTS_PER_PAGE = 20
+REPLIES_PER_THREAD = 3
+REPLIES_PER_REQUEST = 20
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+# --- Cursores keyset (created_at, id) ---
+
+def encode_cursor(comment):
+    micros = (comment.created_at - EPOCH) // timedelta(microseconds=1)
+    return f"{micros}.{comment.pk}"
+
+
+def decode_cursor(value):
+    """Devuelve (created_at, id) o None si el cursor no es válido."""
+    try:
+        micros, pk = (value or '').split('.')
+        return EPOCH + timedelta(microseconds=int(micros)), int(pk)
+    except (ValueError, OverflowError, OSError):
+        return None
+
+
+def _before(queryset, cursor):
+    # Orden descendente: lo que viene "después" del cursor es más antiguo
+    created_at, pk = cursor
+    return queryset.filter(created_at__lte=created_at).exclude(created_at=created_at, pk__gte=pk)
+
+
+def _after(queryset, cursor):
+    created_at, pk = cursor
+    return queryset.filter(created_at__gte=created_at).exclude(created_at=created_at, pk__lte=pk)
+
+
+def load_comment_page(queryset, cursor=None, per_page=COMMENTS_PER_PAGE):
+    """Página keyset (-created_at, -id) de una lista de comentarios. Devuelve (comentarios, siguiente cursor)."""
+    if cursor:
+        queryset = _before(queryset, cursor)
+    comments = list(queryset.order_by('-created_at', '-id')[:per_page + 1])
+
+    next_cursor = encode_cursor(comments[per_page - 1]) if len(comments) > per_page else None
+    return comments[:per_page], next_cursor
+
+
+# --- Hilos ---
+
+def load_comment_threads(recipe, cursor=None, per_page=COMMENTS_PER_PAGE, replies_per_thread=REPLIES_PER_THREAD):
+    """Página de comentarios raíz de una receta con las primeras respuestas de cada hilo.
+
+    Dos consultas acotadas: los comentarios raíz (keyset sobre -created_at, -id) y las
+    respuestas de esos hilos por root, limitadas por hilo con ROW_NUMBER(). Cada raíz
+    lleva `thread_replies` (respuestas directas, cada una con `children`), `replies_total`
+    y `replies_cursor` si quedan respuestas por cargar. Devuelve (comentarios, siguiente cursor).
+    """
+    roots, next_cursor = load_comment_page(
+        Comment.objects.filter(recipe=recipe, parent__isnull=True).select_related('user'), cursor, per_page,
+    )
+
+    replies = []
+    if roots and replies_per_thread:
+        replies = (
+            Comment.objects.filter(root__in=roots)
+            .select_related('user')
+            .annotate(
+                position=Window(RowNumber(), partition_by=[F('root_id')], order_by=[F('created_at').asc(), F('id').asc()]),
+                thread_total=Window(Count('id'), partition_by=[F('root_id')]),
+            )
+            .filter(position__lte=replies_per_thread)
+            .order_by('root_id', 'created_at', 'id')
+        )
+
+    by_root = {}
+    for reply in replies:
+        by_root.setdefault(reply.root_id, []).append(reply)
+
+    for root in roots:
+        thread = by_root.get(root.pk, [])
+        root.thread_replies = nest_replies(root, thread)
+        root.replies_total = thread[0].thread_total if thread else 0
+        root.replies_cursor = encode_cursor(thread[-1]) if root.replies_total > len(thread) else None
+
+    return roots, next_cursor
+
+
+def nest_replies(root, replies):
+    """Agrupa las respuestas (en orden cronológico) bajo la respuesta directa a la raíz de la que cuelgan.
+
+    La plantilla pinta dos niveles: lo que esté más profundo se muestra junto a su
+    antepasado de primer nivel. Como una respuesta siempre es posterior a su padre,
+    en una lista cronológica el padre ya se ha visto.
+    """
+    top_level = []
+    ancestor = {}
+    for reply in replies:
+        reply.children = []
+        if reply.parent_id == root.pk or reply.parent_id not in ancestor:
+            ancestor[reply.pk] = reply
+            top_level.append(reply)
+        else:
+            ancestor[reply.pk] = ancestor[reply.parent_id]
+            ancestor[reply.pk].children.append(reply)
+    return top_level
+
+
+def load_more_replies(root, cursor=None, limit=REPLIES_PER_REQUEST):
+    """Siguientes respuestas de un hilo en orden cronológico. Devuelve (respuestas, siguiente cursor)."""
+    replies = Comment.objects.filter(root=root).select_related('user')
+    if cursor:
+        replies = _after(replies, cursor)
+    replies = list(replies.order_by('created_at', 'id')[:limit + 1])
+
+    next_cursor = encode_cursor(replies[limit - 1]) if len(replies) > limit else None
+    return replies[:limit], next_cursor
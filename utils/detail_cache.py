@@ -0,0 +1,58 @@
+import os
+import time
+from django.core.cache import cache
+from recipes.models import RecipeSnapshot
+
+# Página de detalle ya renderizada, por slug, idioma y variante (anónimo / con sesión).
+# El cuerpo se renderiza sin request: no lleva nada propio de un usuario ni token CSRF.
+# Favorita, valoración propia, botones de autor y token los pide la página a
+# recipe_user_state_json. Cada receta tiene su versión; guardar la receta, sus
+# traducciones, valoraciones o comentarios la sube y deja sus entradas sin uso.
+DETAIL_CACHE_SECONDS = int(os.getenv("RECIPE_DETAIL_CACHE_SECONDS", "600"))
+
+
+def _version_key(recipe_id):
+    return f"recipe_detail:version:{recipe_id}"
+
+
+def detail_version(recipe_id):
+    key = _version_key(recipe_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_recipe_details(recipe_ids):
+    """Deja obsoletas las páginas cacheadas y las fichas (RecipeSnapshot) de las recetas."""
+    recipe_ids = list(recipe_ids)
+    # Primero las fichas: una página construida con la ficha vieja ya lleva la versión anterior
+    RecipeSnapshot.objects.filter(recipe_id__in=recipe_ids).delete()
+    for recipe_id in recipe_ids:
+        try:
+            cache.incr(_version_key(recipe_id))
+        except ValueError:
+            cache.set(_version_key(recipe_id), time.time_ns(), None)
+
+
+def invalidate_recipe_detail(recipe_id):
+    invalidate_recipe_details([recipe_id])
+
+
+def _page_key(language, slug, authenticated):
+    return f"recipe_detail:{language}:{slug}:{'auth' if authenticated else 'anon'}"
+
+
+def get_detail_page(language, slug, authenticated):
+    """Página cacheada ({'pk', 'version', 'title', 'image_url', 'body'}) o None si falta o es de otra versión."""
+    page = cache.get(_page_key(language, slug, authenticated))
+    if page is None or page['version'] != detail_version(page['pk']):
+        return None
+    return page
+
+
+def set_detail_page(language, slug, authenticated, page):
+    # page['version'] se lee antes de construir la página: si la receta cambia entre medias,
+    # la entrada nace obsoleta en lugar de guardar el estado anterior
+    cache.set(_page_key(language, slug, authenticated), page, DETAIL_CACHE_SECONDS)
@@ -0,0 +1,55 @@
+import os
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from recipes.models import Favorite, Recipe
+
+FAVORITE_IDS_CACHE_SECONDS = int(os.getenv("FAVORITE_IDS_CACHE_SECONDS", "600"))
+
+
+def toggle_recipe_favorite(recipe_id, user):
+    """Añade o quita la receta de las favoritas del usuario. Devuelve True si queda como favorita.
+
+    Un DELETE o un INSERT condicionados por la restricción única: dos clics seguidos
+    no dejan filas repetidas ni contadores descuadrados. favorite_count lo ajustan los
+    receptores de Favorite en la misma transacción.
+    """
+    with transaction.atomic():
+        deleted, _ = Favorite.objects.filter(user=user, recipe_id=recipe_id).delete()
+        if deleted:
+            return False
+        try:
+            with transaction.atomic():
+                Favorite.objects.create(user=user, recipe_id=recipe_id)
+        except IntegrityError:
+            # Otra petición del mismo usuario la ha añadido entre medias
+            pass
+        return True
+
+
+def change_favorite_count(recipe_id, delta):
+    # Al restar no se baja de cero aunque el contador se haya desviado
+    Recipe.objects.filter(pk=recipe_id, favorite_count__gte=max(0, -delta)).update(
+        favorite_count=F('favorite_count') + delta
+    )
+
+
+# --- Ids de favoritas por usuario (estado del corazón en los listados) ---
+
+def _favorite_ids_key(user_id):
+    return f"favorite_ids:{user_id}"
+
+
+def get_favorite_ids(user):
+    """Ids de las recetas favoritas del usuario como un set, cacheado hasta que cambien."""
+    if not user.is_authenticated:
+        return frozenset()
+    return cache.get_or_set(
+        _favorite_ids_key(user.pk),
+        lambda: frozenset(Favorite.objects.filter(user=user).values_list('recipe_id', flat=True)),
+        FAVORITE_IDS_CACHE_SECONDS,
+    )
+
+
+def invalidate_favorite_ids(user_id):
+    cache.delete(_favorite_ids_key(user_id))
@@ -1,11 +1,8 @@
 from fractions import Fraction
 from datetime import date, timedelta
 from django.utils.timezone import now
-from parler.utils.context import switch_language
-from utils.services import generate_unique_slug
-from utils.translation import get_or_create_translated_ingredient, handle_translations_for_recipe
-from recipes.models import Ingredient, Recipe
-from django.utils.translation import get_language
+from utils.services import bulk_create_with_pks, bulk_write_translations, generate_unique_slugs
+from recipes.models import Ingredient
 
 def format_quantity(qty):
     qty_float = float(qty)  # Convertir Decimal a float para usar is_integer()
@@ -29,57 +26,54 @@ format_quantity(0.5)  # '1/2'
 format_quantity(0.25) # '1/4'
 format_quantity(1.0)  # '1'
 
-def save_recipe_object(form, request, is_update=False):
-    recipe = form.save(commit=False)
-    recipe.author = request.user
-    
-    source_lang = get_language()[:2]
-    recipe.set_current_language(source_lang)
-
-    if not is_update and request.user.role == 'reader':  # type: ignore
-       request.user.role = 'author'   # type: ignore
-       request.user.save()
-       
-    # Guardar datos originales si es update (para traducciones diferenciales)
-    original_data = None
-    if is_update:
-        original_data = {
-            field: getattr(recipe, field)
-            for field in ['title', 'description', 'instructions', 'tips']
-        }
-
-    if not is_update or 'title' in form.changed_data:
-        recipe.slug = generate_unique_slug(Recipe, recipe.title, source_lang)
-        
-    recipe.save()
-    form.save_m2m()
-    
-    # Generar traducciones y slugs para otros idiomas
-    handle_translations_for_recipe(recipe, source_lang, original_data=original_data)
-    return recipe
-
-def save_photo_if_exists(obj, form):
-    photo = form.cleaned_data.get('photo')
-    if photo:
-        obj.photo = photo
-        obj.save()
-        
+def resolve_ingredients(names, source_lang):
+    """Devuelve {nombre: Ingredient} para todos los nombres con un número fijo de consultas.
+
+    Los existentes se buscan con un único IN sobre los nombres (en cualquier idioma);
+    los que faltan se crean en bloque con su traducción en source_lang.
+    """
+    names = list(dict.fromkeys(name for name in names if name))
+    if not names:
+        return {}
+
+    # El primero por pk, como hacía .filter(translations__name=name).first().
+    # Se compara sin mayúsculas porque la colación de MySQL tampoco las distingue.
+    found = {}
+    rows = (
+        Ingredient._parler_meta.root_model.objects
+        .filter(name__in=names)
+        .order_by('master_id')
+        .values_list('name', 'master_id')
+    )
+    for name, master_id in rows:
+        found.setdefault(name.casefold(), master_id)
+
+    missing = list({name.casefold(): name for name in reversed(names) if name.casefold() not in found}.values())[::-1]
+    if missing:
+        created = bulk_create_with_pks(Ingredient, [Ingredient() for _ in missing])
+        ids = [ingredient.pk for ingredient in created]
+        slugs = generate_unique_slugs(Ingredient, missing, source_lang, ids)
+        bulk_write_translations(Ingredient, {
+            (pk, source_lang): {'name': name, 'slug': slug}
+            for pk, name, slug in zip(ids, missing, slugs)
+        })
+        for name, pk in zip(missing, ids):
+            found.setdefault(name.casefold(), pk)
+
+    ingredients = Ingredient.objects.in_bulk(set(found.values()))
+    return {name: ingredients[found[name.casefold()]] for name in names}
+
 def process_ingredients_formset(formset, source_lang):
+    forms = []
     for form_ingredient in formset:
         if form_ingredient.cleaned_data and not form_ingredient.cleaned_data.get('DELETE', False):
             name = (form_ingredient.cleaned_data.get('ingredient_name') or '').strip()
-            if not name:
-                continue
-            ingredient = Ingredient.objects.filter(translations__name=name).first()
-            if not ingredient:
-                ingredient = Ingredient.objects.create()
-                with switch_language(ingredient, source_lang):
-                    setattr(ingredient, "name", name)
-                    setattr(ingredient, "slug", generate_unique_slug(Ingredient, name, source_lang))
-                    ingredient.save()
-            
-            get_or_create_translated_ingredient(ingredient, source_lang)
-            form_ingredient.instance.ingredient = ingredient
+            if name:
+                forms.append((form_ingredient, name))
+
+    resolved = resolve_ingredients([name for _, name in forms], source_lang)
+    for form_ingredient, name in forms:
+        form_ingredient.instance.ingredient = resolved[name]
 
 def calcular_pascua(year):
     """Algoritmo de Meeus para calcular la fecha de Pascua (domingo)."""
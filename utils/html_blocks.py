@@ -0,0 +1,104 @@
+import re
+from utils.translation_memory import hash_text
+
+BLOCK_TAGS = {"p", "li", "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "pre"}
+
+_tag_re = re.compile(r"<(/?)([a-zA-Z][a-zA-Z0-9]*)\b[^>]*>")
+_empty_re = re.compile(r"(<[^>]*>|&nbsp;|\s|\xa0)+")
+
+
+def has_text(html_text: str) -> bool:
+    return bool(_empty_re.sub("", html_text))
+
+
+def _append_loose(segments, chunk):
+    # Lo que queda entre bloques (<ul>, espacios...) se copia tal cual salvo que tenga texto
+    if chunk:
+        segments.append((has_text(chunk), chunk))
+
+
+def split_blocks(text: str):
+    """Divide el HTML en segmentos (es_bloque, html) de párrafos y elementos de lista.
+
+    Concatenar los segmentos devuelve exactamente el texto original. Los bloques
+    sin texto (p. ej. <p><br></p>) no se consideran bloques: no hay nada que traducir.
+    """
+    if not text:
+        return []
+
+    segments = []
+    pos = 0
+    block_start = None
+    depth = 0
+
+    for match in _tag_re.finditer(text):
+        closing, name = match.group(1) == "/", match.group(2).lower()
+        if name not in BLOCK_TAGS:
+            continue
+
+        if block_start is None:
+            if not closing:
+                _append_loose(segments, text[pos:match.start()])
+                block_start, depth = match.start(), 1
+            continue
+
+        depth += -1 if closing else 1
+        if depth == 0:
+            block = text[block_start:match.end()]
+            segments.append((has_text(block), block))
+            block_start, pos = None, match.end()
+
+    if block_start is not None:
+        block = text[block_start:]
+        segments.append((has_text(block), block))
+    else:
+        _append_loose(segments, text[pos:])
+
+    return segments
+
+
+def text_blocks(text: str):
+    return [chunk for is_block, chunk in split_blocks(text) if is_block]
+
+
+def fingerprint(block: str) -> str:
+    return hash_text(block)
+
+
+def block_reuse_map(old_source: str, old_translated: str):
+    """Relaciona cada bloque del original anterior con su traducción existente.
+
+    Solo es fiable si la traducción conserva la misma estructura de bloques;
+    si no coinciden en número no se reutiliza nada.
+    """
+    source_blocks = text_blocks(old_source)
+    translated_blocks = text_blocks(old_translated)
+    if not source_blocks or len(source_blocks) != len(translated_blocks):
+        return {}
+
+    reuse = {}
+    for source, translated in zip(source_blocks, translated_blocks):
+        reuse.setdefault(fingerprint(source), translated)
+    return reuse
+
+
+def plan_block_translation(text: str, reuse=None):
+    """Devuelve (segmentos, pendientes): cada segmento es html literal o el índice
+    en `pendientes` del bloque que hay que traducir."""
+    reuse = reuse or {}
+    segments, pending = [], []
+
+    for is_block, chunk in split_blocks(text):
+        if not is_block:
+            segments.append(chunk)
+        elif fingerprint(chunk) in reuse:
+            segments.append(reuse[fingerprint(chunk)])
+        else:
+            segments.append(len(pending))
+            pending.append(chunk)
+
+    return segments, pending
+
+
+def assemble_blocks(segments, translations) -> str:
+    return "".join(translations[s] if isinstance(s, int) else s for s in segments)
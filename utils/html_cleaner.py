@@ -1,8 +1,124 @@
-from bs4 import BeautifulSoup
-import bs4
+from html import escape
+from html.parser import HTMLParser
 
 ALLOWED_TAGS = ["p", "ul", "ol", "li", "p", "strong", "em", "b", "i", "u", "br"]
 
+# Elementos sin contenido: nunca tienen texto, así que siempre se eliminan
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr"}
+PRESERVE_WHITESPACE_TAGS = {"pre", "textarea"}
+ASCII_SPACES = str.maketrans("", "", "\x20\x0a\x09\x0c\x0d")
+
+
+def _quote_attribute(value: str) -> str:
+    value = value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    if '"' in value:
+        if "'" in value:
+            return '"%s"' % value.replace('"', "&quot;")
+        return "'%s'" % value
+    return '"%s"' % value
+
+
+class _Element:
+    __slots__ = ("name", "allowed", "start", "parts", "has_text")
+
+    def __init__(self, name, allowed, start=""):
+        self.name = name
+        self.allowed = allowed
+        self.start = start
+        self.parts = []
+        self.has_text = False
+
+
+class HTMLSanitizer(HTMLParser):
+    """Limpia HTML en una sola pasada sobre el tokenizador de html.parser.
+
+    Mantiene las etiquetas de ALLOWED_TAGS (con sus atributos), desenrolla el resto
+    conservando su contenido y elimina los elementos sin texto. Cada elemento abierto
+    acumula su salida y al cerrarse se decide si se emite, sin recorrer el árbol otra vez.
+    """
+
+    def __init__(self, allowed_tags=ALLOWED_TAGS):
+        super().__init__(convert_charrefs=True)
+        self.allowed_tags = set(allowed_tags)
+        self.stack = [_Element(None, False)]
+        self.text = []
+
+    def handle_starttag(self, tag, attrs):
+        self._flush_text()
+        if tag in VOID_TAGS:
+            return
+
+        allowed = tag in self.allowed_tags
+        start = ""
+        if allowed:
+            # Atributos duplicados: gana el último valor, como en BeautifulSoup
+            values = {}
+            for name, value in attrs:
+                values[name] = value
+            start = "<%s%s>" % (tag, "".join(
+                " %s=%s" % (name, _quote_attribute(value or "")) for name, value in values.items()
+            ))
+        self.stack.append(_Element(tag, allowed, start))
+
+    def handle_startendtag(self, tag, attrs):
+        # <p/>, <br/>...: elementos vacíos, no aportan nada a la salida
+        self._flush_text()
+
+    def handle_endtag(self, tag):
+        self._flush_text()
+        for depth in range(len(self.stack) - 1, 0, -1):
+            if self.stack[depth].name == tag:
+                while len(self.stack) > depth:
+                    self._close()
+                return
+        # Etiqueta de cierre sin apertura: se ignora
+
+    def handle_data(self, data):
+        # html.parser entrega el texto en trozos (por ejemplo, al encontrar un "<" suelto):
+        # se juntan hasta la siguiente etiqueta, que es el nodo de texto de BeautifulSoup
+        self.text.append(data)
+
+    def _flush_text(self):
+        if not self.text:
+            return
+        data = "".join(self.text)
+        self.text = []
+
+        # Igual que BeautifulSoup: un hueco solo de espacios se reduce a un salto de línea o un espacio
+        if data and not data.translate(ASCII_SPACES) and not self._preserve_whitespace():
+            data = "\n" if "\n" in data else " "
+
+        current = self.stack[-1]
+        current.parts.append(escape(data, quote=False))
+        if data.strip():
+            current.has_text = True
+
+    def _preserve_whitespace(self):
+        return any(element.name in PRESERVE_WHITESPACE_TAGS for element in self.stack)
+
+    def handle_comment(self, data):
+        self._flush_text()
+        self.stack[-1].parts.append("<!--%s-->" % data)
+
+    def _close(self):
+        element = self.stack.pop()
+        parent = self.stack[-1]
+        if not element.allowed:
+            parent.parts.extend(element.parts)
+        elif element.has_text:
+            parent.parts.append("%s%s</%s>" % (element.start, "".join(element.parts), element.name))
+        else:
+            return
+        parent.has_text = parent.has_text or element.has_text
+
+    def result(self) -> str:
+        self.close()
+        self._flush_text()
+        while len(self.stack) > 1:
+            self._close()
+        return "".join(self.stack[0].parts)
+
+
 def clean_translated_html(text: str) -> str:
     if not text:
         return ""
@@ -11,17 +127,6 @@ def clean_translated_html(text: str) -> str:
     text = text.replace("< ", "<").replace(" >", ">").replace("> ", ">").replace(" <", "<")
     text = text.replace(">>", ">").replace("> >", ">")
 
-    soup = BeautifulSoup(text, "html.parser")
-
-    # Elimina o desenrolla etiquetas que no estén permitidas
-    for tag in soup.find_all():
-        if isinstance(tag, bs4.element.Tag):
-            if tag.name not in ALLOWED_TAGS:
-                tag.unwrap()
-
-    # Elimina etiquetas vacías
-    for tag in soup.find_all():
-        if isinstance(tag, bs4.element.Tag) and not tag.text.strip():
-            tag.decompose()
-
-    return str(soup).strip()
\ No newline at end of file
+    sanitizer = HTMLSanitizer()
+    sanitizer.feed(text)
+    return sanitizer.result().strip()
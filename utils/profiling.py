@@ -0,0 +1,135 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.db import connection
+from django.utils import timezone
+
+SAVE_PROFILE_BUFFER_SIZE = int(os.getenv("SAVE_PROFILE_BUFFER_SIZE", "200"))
+SLOW_SAVE_MS = float(os.getenv("SLOW_SAVE_MS", "2000"))
+
+logger = logging.getLogger("recipes.save_profile")
+
+# Últimos guardados de este proceso (el admin muestra los del servidor web;
+# los del worker se consultan en el log)
+recent_profiles = deque(maxlen=SAVE_PROFILE_BUFFER_SIZE)
+_buffer_lock = threading.Lock()
+
+_current_profile = ContextVar("save_profile", default=None)
+
+
+def count_http_call():
+    """Suma una llamada HTTP al guardado en curso; sin perfil activo no hace nada.
+
+    La llama el cliente de traducción desde sus hilos, que copian el contexto del que traduce:
+    cada guardado cuenta solo sus llamadas aunque el proceso atienda otros a la vez.
+    """
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.count_http_call()
+
+
+class SaveProfile:
+    """Tiempo, consultas y llamadas HTTP de cada etapa de un guardado de receta."""
+
+    def __init__(self, kind, recipe_id=None):
+        self.kind = kind
+        self.recipe_id = recipe_id
+        self.started_at = timezone.now()
+        self.stages = []
+        self.queries = 0
+        self.total_ms = 0.0
+        self.http = 0
+        self.error = ''
+        self._http_lock = threading.Lock()
+
+    def count_http_call(self):
+        with self._http_lock:
+            self.http += 1
+
+    def _count_query(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+    @contextmanager
+    def stage(self, name):
+        queries_before, http_before = self.queries, self.http
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append({
+                'stage': name,
+                'ms': round((time.perf_counter() - start) * 1000, 1),
+                'queries': self.queries - queries_before,
+                'http': self.http - http_before,
+            })
+
+    def as_dict(self):
+        return {
+            'kind': self.kind,
+            'recipe_id': self.recipe_id,
+            'started_at': self.started_at.isoformat(),
+            'ms': round(self.total_ms, 1),
+            'queries': self.queries,
+            'http': self.http,
+            'error': self.error,
+            'stages': self.stages,
+        }
+
+
+@contextmanager
+def profile_save(kind, recipe_id=None):
+    """Mide un guardado completo; las etapas se marcan con `stage()` en cualquier punto de la pila."""
+    if _current_profile.get() is not None:
+        # Guardado anidado (p. ej. el worker llamado desde otro perfil): se mide en el exterior
+        yield _current_profile.get()
+        return
+
+    profile = SaveProfile(kind, recipe_id)
+    token = _current_profile.set(profile)
+    start = time.perf_counter()
+    try:
+        with connection.execute_wrapper(profile._count_query):
+            yield profile
+    except Exception as e:
+        profile.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_profile.reset(token)
+        profile.total_ms = (time.perf_counter() - start) * 1000
+        _record(profile)
+
+
+@contextmanager
+def stage(name):
+    """Etapa del guardado en curso; sin perfil activo no hace nada."""
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+    with profile.stage(name):
+        yield
+
+
+def _record(profile):
+    data = profile.as_dict()
+    with _buffer_lock:
+        recent_profiles.append(data)
+
+    summary = ", ".join(f"{s['stage']}={s['ms']:.0f}ms/{s['queries']}q/{s['http']}http" for s in profile.stages)
+    level = logging.WARNING if profile.total_ms >= SLOW_SAVE_MS else logging.INFO
+    logger.log(
+        level,
+        f"Recipe save ({profile.kind}) recipe={profile.recipe_id}: {profile.total_ms:.0f}ms, "
+        f"{profile.queries} queries, {profile.http} HTTP calls [{summary}]",
+        extra={'save_profile': data},
+    )
+
+
+def get_recent_profiles():
+    with _buffer_lock:
+        return list(reversed(recent_profiles))
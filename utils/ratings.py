@@ -0,0 +1,51 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.functions import Cast
+from recipes.models import Rating, Recipe
+
+
+def set_rating(recipe, user, score):
+    """Crea o cambia la valoración de un usuario y actualiza los agregados de la receta en la misma transacción.
+
+    Devuelve (rating, created).
+    """
+    with transaction.atomic():
+        rating = Rating.objects.select_for_update().filter(recipe=recipe, user=user).first()
+        created = rating is None
+        if created:
+            try:
+                with transaction.atomic():
+                    rating = Rating.objects.create(recipe=recipe, user=user, score=score)
+            except IntegrityError:
+                # Otra petición del mismo usuario la ha creado entre medias
+                rating = Rating.objects.select_for_update().get(recipe=recipe, user=user)
+                created = False
+
+        if created:
+            apply_rating_delta(recipe.pk, count=1, total=score)
+        elif rating.score != score:
+            previous = rating.score
+            rating.score = score
+            rating.save(update_fields=['score'])
+            apply_rating_delta(recipe.pk, total=score - previous)
+
+    return rating, created
+
+
+def apply_rating_delta(recipe_id, count=0, total=0):
+    """Suma (o resta) a rating_count/rating_sum con UPDATE atómicos y recalcula rating_avg."""
+    if not count and not total:
+        return
+    # Al restar no se baja de cero aunque los contadores se hayan desviado
+    recipes = Recipe.objects.filter(pk=recipe_id, rating_count__gte=max(0, -count), rating_sum__gte=max(0, -total))
+    # Dos sentencias: MySQL evalúa las asignaciones del SET en orden y las demás bases no
+    if recipes.update(rating_count=F('rating_count') + count, rating_sum=F('rating_sum') + total):
+        Recipe.objects.filter(pk=recipe_id).update(rating_avg=average_expression())
+
+
+def average_expression():
+    return Case(
+        When(rating_count=0, then=Value(0.0)),
+        default=Cast(F('rating_sum'), FloatField()) / F('rating_count'),
+        output_field=FloatField(),
+    )
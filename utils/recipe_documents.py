@@ -0,0 +1,544 @@
+import csv
+import json
+import logging
+from decimal import Decimal, InvalidOperation
+from django.contrib.auth import get_user_model
+from django.db import reset_queries, transaction
+from django.db.models import Prefetch
+from recipes.models import (
+    TRANSLATION_LANGS,
+    Allergen,
+    Category,
+    CookingMethod,
+    CuisineType,
+    Difficulty,
+    Ingredient,
+    MealType,
+    Recipe,
+    RecipeIngredient,
+    Tag,
+    Theme,
+    TranslationJob,
+    Unit,
+)
+from utils.services import bulk_create_with_pks, bulk_write_translations, generate_unique_slugs
+from utils.sampling import invalidate_pools
+from utils.shelves import invalidate_shelves
+
+# Documento de receta (una línea NDJSON), el mismo para importar y exportar:
+# {
+#   "source_lang": "es", "author": "usuario", "difficulty": "easy", "prep_time": 10, "cook_time": 0,
+#   "servings": 2, "featured": false, "photo": "recipes/photos/x.jpg",
+#   "category": {"es": "Postres", "en": "Desserts"}, "cuisine_type": {...},
+#   "tags": [{...}], "meal_types": [...], "allergens": [...], "cooking_methods": [...], "themes": [...],
+#   "translations": {"es": {"title": ..., "slug": ..., "description": ..., "instructions": ..., "tips": ...}, ...},
+#   "ingredients": [{"name": {"es": "harina", "en": "flour"}, "quantity": "200.00", "unit": {"es": "gramo"}, "order": 0}]
+# }
+# Las referencias a taxonomías e ingredientes son {idioma: nombre}; al importar también
+# se acepta un nombre suelto (en source_lang).
+
+RECIPE_TRANSLATION_FIELDS = ['title', 'slug', 'description', 'instructions', 'tips']
+FK_TAXONOMIES = {'category': Category, 'cuisine_type': CuisineType}
+M2M_TAXONOMIES = {
+    'tags': Tag,
+    'meal_types': MealType,
+    'allergens': Allergen,
+    'cooking_methods': CookingMethod,
+    'themes': Theme,
+}
+CSV_LIST_SEPARATOR = '|'
+CSV_INGREDIENT_SEPARATOR = ';'
+
+
+class InvalidDocument(ValueError):
+    pass
+
+
+def read_documents(stream, fmt='ndjson'):
+    """Genera (número de línea, documento) sin cargar el fichero entero en memoria."""
+    if fmt == 'csv':
+        for lineno, row in enumerate(csv.DictReader(stream), start=2):
+            yield lineno, document_from_csv_row(row)
+        return
+
+    for lineno, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield lineno, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield lineno, InvalidDocument(f"JSON no válido: {e}")
+
+
+def document_from_csv_row(row):
+    """Una fila CSV plana (listas separadas por '|', ingredientes 'nombre;cantidad;unidad') a documento."""
+    def split(value):
+        return [item.strip() for item in (value or '').split(CSV_LIST_SEPARATOR) if item.strip()]
+
+    source_lang = (row.get('source_lang') or 'es').strip()
+    ingredients = []
+    for order, entry in enumerate(split(row.get('ingredients'))):
+        name, quantity, unit = (entry.split(CSV_INGREDIENT_SEPARATOR) + ['', ''])[:3]
+        ingredients.append({'name': name.strip(), 'quantity': quantity.strip() or None, 'unit': unit.strip() or None, 'order': order})
+
+    document = {
+        'source_lang': source_lang,
+        'author': row.get('author') or None,
+        'difficulty': row.get('difficulty'),
+        'prep_time': row.get('prep_time'),
+        'cook_time': row.get('cook_time') or 0,
+        'servings': row.get('servings') or 1,
+        'featured': (row.get('featured') or '').strip().lower() in ('1', 'true', 'yes', 'si', 'sí'),
+        'photo': row.get('photo') or None,
+        'category': row.get('category') or None,
+        'cuisine_type': row.get('cuisine_type') or None,
+        'translations': {source_lang: {field: row.get(field) or '' for field in RECIPE_TRANSLATION_FIELDS}},
+        'ingredients': ingredients,
+    }
+    for field in M2M_TAXONOMIES:
+        document[field] = split(row.get(field))
+    return document
+
+
+def _ref(obj):
+    # Taxonomía/ingrediente -> {idioma: nombre}, a partir de las traducciones ya precargadas
+    if obj is None:
+        return None
+    return {tr.language_code: tr.name for tr in obj.translations.all()}
+
+
+def export_queryset(queryset=None):
+    """Recetas con todo su grafo precargado por lotes (ver iter_documents)."""
+    queryset = Recipe.objects.all() if queryset is None else queryset
+    return (
+        queryset
+        .order_by('pk')
+        .select_related('author')
+        .prefetch_related(
+            'translations',
+            'category__translations',
+            'cuisine_type__translations',
+            *(f'{field}__translations' for field in M2M_TAXONOMIES),
+            Prefetch(
+                'recipe_ingredients',
+                queryset=RecipeIngredient.objects.order_by('order', 'pk').select_related('ingredient', 'unit'),
+            ),
+            'recipe_ingredients__ingredient__translations',
+            'recipe_ingredients__unit__translations',
+        )
+    )
+
+
+def recipe_to_document(recipe):
+    """Documento autocontenido de una receta (el formato que lee RecipeImporter)."""
+    return {
+        'source_lang': recipe.source_lang,
+        'author': recipe.author.username,
+        'difficulty': recipe.difficulty,
+        'prep_time': recipe.prep_time,
+        'cook_time': recipe.cook_time,
+        'servings': recipe.servings,
+        'featured': recipe.featured,
+        'photo': recipe.photo.name or None,
+        'category': _ref(recipe.category),
+        'cuisine_type': _ref(recipe.cuisine_type),
+        **{field: [_ref(obj) for obj in getattr(recipe, field).all()] for field in M2M_TAXONOMIES},
+        'translations': {
+            tr.language_code: {field: getattr(tr, field) or '' for field in RECIPE_TRANSLATION_FIELDS}
+            for tr in recipe.translations.all()
+        },
+        'ingredients': [
+            {
+                'name': _ref(ri.ingredient),
+                'quantity': str(ri.quantity) if ri.quantity is not None else None,
+                'unit': _ref(ri.unit),
+                'order': ri.order,
+            }
+            for ri in recipe.recipe_ingredients.all()
+        ],
+    }
+
+
+def iter_documents(queryset=None, chunk_size=500):
+    """Genera los documentos con memoria constante: las recetas se leen por páginas de
+    chunk_size (keyset sobre el pk, cada página con sus propios prefetch). No se usa
+    iterator(): el cliente de MySQL carga el resultado entero aunque se lea por bloques."""
+    queryset = Recipe.objects.all() if queryset is None else queryset
+    last_pk = None
+    while True:
+        page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        recipes = list(export_queryset(page)[:chunk_size])
+        for recipe in recipes:
+            yield recipe_to_document(recipe)
+        if len(recipes) < chunk_size:
+            return
+        last_pk = recipes[-1].pk
+
+
+def iter_ndjson(queryset=None, chunk_size=500):
+    for document in iter_documents(queryset, chunk_size):
+        yield json.dumps(document, ensure_ascii=False) + '\n'
+
+
+def _as_ref(value, source_lang):
+    # "Postres" -> {"es": "Postres"}; {"es": ..., "en": ...} se deja como está
+    if not value:
+        return {}
+    if isinstance(value, dict):
+        if not all(isinstance(name, str) for name in value.values() if name):
+            raise InvalidDocument(f"nombres no válidos: {value}")
+        return {lang: name.strip() for lang, name in value.items() if name and name.strip()}
+    if not isinstance(value, (str, int, float)):
+        raise InvalidDocument(f"referencia no válida: {value}")
+    return {source_lang: str(value).strip()}
+
+
+def _as_list(document, field):
+    value = document.get(field) or []
+    if not isinstance(value, list):
+        raise InvalidDocument(f"{field} debe ser una lista")
+    return value
+
+
+class NameResolver:
+    """Busca objetos traducibles por nombre, en cualquier idioma y sin distinguir mayúsculas.
+
+    Los nombres ya vistos salen de la caché; el resto se busca con un IN por lote y,
+    si `create`, los que no existen se crean en bloque con todos sus nombres.
+    """
+
+    def __init__(self, model, create=True, maxsize=50000):
+        self.model = model
+        self.translation_model = model._parler_meta.root_model
+        self.create = create
+        self.maxsize = maxsize
+        self.cache = {}  # nombre.casefold() -> pk (None = no existe)
+        self.created = 0
+
+    def resolve(self, refs):
+        """Devuelve el pk de cada referencia {idioma: nombre} (None si no existe y no se crea)."""
+        if len(self.cache) > self.maxsize:
+            self.cache.clear()
+
+        unknown = {name.casefold(): name for ref in refs for name in ref.values() if name.casefold() not in self.cache}
+        if unknown:
+            rows = (
+                self.translation_model.objects
+                .filter(name__in=list(unknown.values()))
+                .order_by('master_id')
+                .values_list('name', 'master_id')
+            )
+            found = {}
+            for name, master_id in rows:
+                found.setdefault(name.casefold(), master_id)
+            for key in unknown:
+                self.cache[key] = found.get(key)
+
+        pks, missing = [], []
+        for ref in refs:
+            pks.append(self._lookup(ref))
+            if pks[-1] is None and ref and self.create:
+                missing.append(ref)
+
+        if missing:
+            self._create_many(missing)
+            pks = [self._lookup(ref) for ref in refs]
+        return pks
+
+    def _lookup(self, ref):
+        for name in ref.values():
+            pk = self.cache.get(name.casefold())
+            if pk is not None:
+                return pk
+        return None
+
+    def _create_many(self, refs):
+        # Una sola creación por nombre aunque se repita en el lote
+        pending, seen = [], set()
+        for ref in refs:
+            keys = {name.casefold() for name in ref.values()}
+            if not keys & seen:
+                pending.append(ref)
+                seen |= keys
+
+        if any(field.name == 'slug' for field in self.model._meta.concrete_fields):
+            # Slug en el propio modelo (MealType): se crea con save(), que lo calcula
+            for ref in pending:
+                obj = self.model()
+                for lang, name in ref.items():
+                    obj.set_current_language(lang)
+                    obj.name = name
+                obj.save()
+                self._remember(ref, obj.pk)
+            self.created += len(pending)
+            return
+
+        objs = bulk_create_with_pks(self.model, [self.model() for _ in pending])
+        values = {}
+        for obj, ref in zip(objs, pending):
+            for lang, name in ref.items():
+                values[(obj.pk, lang)] = {'name': name}
+            self._remember(ref, obj.pk)
+
+        if any(field.name == 'slug' for field in self.translation_model._meta.concrete_fields):
+            by_lang = {}
+            for (pk, lang), data in values.items():
+                by_lang.setdefault(lang, []).append((pk, data))
+            for lang, rows in by_lang.items():
+                slugs = generate_unique_slugs(self.model, [data['name'] for _, data in rows], lang, [pk for pk, _ in rows])
+                for (_, data), slug in zip(rows, slugs):
+                    data['slug'] = slug
+
+        bulk_write_translations(self.model, values)
+        self.created += len(pending)
+
+    def _remember(self, ref, pk):
+        for name in ref.values():
+            self.cache[name.casefold()] = pk
+
+
+class RecipeImporter:
+    """Importa documentos de receta por lotes: cada lote es una transacción con inserciones en bloque."""
+
+    def __init__(self, default_author=None, batch_size=500, create_taxonomy=True, enqueue_translations=True):
+        self.default_author = default_author
+        self.batch_size = batch_size
+        self.enqueue_translations = enqueue_translations
+        self.resolvers = {
+            field: NameResolver(model, create=create_taxonomy)
+            for field, model in {**FK_TAXONOMIES, **M2M_TAXONOMIES}.items()
+        }
+        self.ingredients = NameResolver(Ingredient)
+        self.units = NameResolver(Unit, create=create_taxonomy)
+        self.authors = {}
+        self.stats = {'imported': 0, 'skipped': 0, 'jobs': 0}
+        self.errors = []
+
+    def import_documents(self, documents, progress=None):
+        """`documents` es un iterable de (número de línea, documento), p. ej. read_documents()."""
+        batch = []
+        for lineno, document in documents:
+            try:
+                batch.append(self._clean(document))
+            except InvalidDocument as e:
+                self.stats['skipped'] += 1
+                self.errors.append((lineno, str(e)))
+                logging.warning(f"import_recipes: línea {lineno} descartada: {e}")
+                continue
+
+            if len(batch) >= self.batch_size:
+                self._import_batch(batch)
+                batch = []
+                if progress:
+                    progress(self.stats)
+        if batch:
+            self._import_batch(batch)
+            if progress:
+                progress(self.stats)
+        return self.stats
+
+    def _clean(self, document):
+        if isinstance(document, Exception):
+            raise InvalidDocument(str(document))
+        if not isinstance(document, dict):
+            raise InvalidDocument("se esperaba un objeto JSON")
+
+        source_lang = document.get('source_lang') or 'es'
+        if source_lang not in TRANSLATION_LANGS:
+            raise InvalidDocument(f"idioma no soportado: {source_lang}")
+
+        all_translations = document.get('translations') or {}
+        if not isinstance(all_translations, dict):
+            raise InvalidDocument("translations debe ser un objeto {idioma: campos}")
+        translations = {}
+        for lang, data in all_translations.items():
+            if lang not in TRANSLATION_LANGS or not data:
+                continue
+            if not isinstance(data, dict) or not all(isinstance(data.get(field) or '', str) for field in RECIPE_TRANSLATION_FIELDS):
+                raise InvalidDocument(f"traducción no válida en {lang}")
+            if (data.get('title') or '').strip():
+                translations[lang] = data
+        if source_lang not in translations:
+            raise InvalidDocument(f"falta el título en {source_lang}")
+
+        difficulty = document.get('difficulty') or Difficulty.MEDIUM
+        if difficulty not in Difficulty.values:
+            raise InvalidDocument(f"dificultad no válida: {difficulty}")
+
+        try:
+            prep_time = int(document.get('prep_time'))
+            cook_time = int(document.get('cook_time') or 0)
+            servings = int(document.get('servings') or 1)
+        except (TypeError, ValueError):
+            raise InvalidDocument("prep_time, cook_time y servings deben ser números enteros")
+        if prep_time <= 0:
+            raise InvalidDocument("prep_time debe ser mayor que cero")
+
+        ingredients, seen = [], set()
+        for order, item in enumerate(_as_list(document, 'ingredients')):
+            if not isinstance(item, dict):
+                raise InvalidDocument(f"ingrediente {order} no válido")
+            name = _as_ref(item.get('name'), source_lang)
+            if not name:
+                raise InvalidDocument(f"ingrediente {order} sin nombre")
+            key = frozenset(n.casefold() for n in name.values())
+            if key & seen:
+                continue  # (receta, ingrediente) es único: se queda la primera aparición
+            seen |= key
+            try:
+                quantity = Decimal(str(item['quantity'])) if item.get('quantity') not in (None, '') else None
+            except InvalidOperation:
+                raise InvalidDocument(f"cantidad no válida en el ingrediente {order}: {item.get('quantity')}")
+            if quantity is not None and not quantity.is_finite():
+                raise InvalidDocument(f"cantidad no válida en el ingrediente {order}: {item.get('quantity')}")
+            if not isinstance(item.get('order', order), int):
+                raise InvalidDocument(f"orden no válido en el ingrediente {order}: {item.get('order')}")
+            ingredients.append({
+                'name': name,
+                'quantity': quantity,
+                'unit': _as_ref(item.get('unit'), source_lang),
+                'order': item.get('order', order),
+            })
+
+        author = document.get('author') or self.default_author
+        if not author:
+            raise InvalidDocument("falta el autor (usa --author para un autor por defecto)")
+        if not isinstance(author, str):
+            raise InvalidDocument(f"autor no válido: {author}")
+        if not isinstance(document.get('photo') or '', str):
+            raise InvalidDocument("photo debe ser una ruta")
+
+        return {
+            'source_lang': source_lang,
+            'author': author,
+            'difficulty': difficulty,
+            'prep_time': prep_time,
+            'cook_time': cook_time,
+            'servings': servings,
+            'featured': bool(document.get('featured')),
+            'photo': document.get('photo') or None,
+            'translations': translations,
+            'ingredients': ingredients,
+            **{field: _as_ref(document.get(field), source_lang) for field in FK_TAXONOMIES},
+            **{field: [_as_ref(ref, source_lang) for ref in _as_list(document, field)] for field in M2M_TAXONOMIES},
+        }
+
+    def _resolve_authors(self, documents):
+        missing = {doc['author'] for doc in documents} - set(self.authors)
+        if missing:
+            User = get_user_model()
+            for user_id, username in User.objects.filter(username__in=missing).values_list('pk', 'username'):
+                self.authors[username] = user_id
+            for user_id, email in User.objects.filter(email__in=missing - set(self.authors)).values_list('pk', 'email'):
+                self.authors[email] = user_id
+        return [self.authors.get(doc['author']) for doc in documents]
+
+    def _import_batch(self, documents):
+        with transaction.atomic():
+            author_ids = self._resolve_authors(documents)
+            unknown = {doc['author'] for doc, author_id in zip(documents, author_ids) if author_id is None}
+            for author in unknown:
+                logging.warning(f"import_recipes: autor desconocido '{author}', se descartan sus recetas")
+            kept = [(doc, author_id) for doc, author_id in zip(documents, author_ids) if author_id is not None]
+            self.stats['skipped'] += len(documents) - len(kept)
+            if not kept:
+                return
+            documents = [doc for doc, _ in kept]
+
+            fks = {field: self.resolvers[field].resolve([doc[field] for doc in documents]) for field in FK_TAXONOMIES}
+            recipes = bulk_create_with_pks(Recipe, [
+                Recipe(
+                    author_id=author_id,
+                    category_id=fks['category'][i],
+                    cuisine_type_id=fks['cuisine_type'][i],
+                    difficulty=doc['difficulty'],
+                    prep_time=doc['prep_time'],
+                    cook_time=doc['cook_time'],
+                    servings=doc['servings'],
+                    featured=doc['featured'],
+                    photo=doc['photo'],
+                    source_lang=doc['source_lang'],
+                )
+                for i, (doc, author_id) in enumerate(kept)
+            ])
+
+            self._write_translations(recipes, documents)
+            self._write_taxonomy_links(recipes, documents)
+            self._write_ingredients(recipes, documents)
+            if self.enqueue_translations:
+                self._enqueue_missing_languages(recipes, documents)
+            # bulk_create no envía post_save: estanterías y arrays de ids se invalidan a mano
+            transaction.on_commit(invalidate_shelves)
+            transaction.on_commit(invalidate_pools)
+
+        self.stats['imported'] += len(recipes)
+        # Con DEBUG=True Django guarda todas las consultas: se vacían para que la memoria no crezca
+        reset_queries()
+
+    def _write_translations(self, recipes, documents):
+        by_lang = {}
+        for recipe, doc in zip(recipes, documents):
+            for lang, data in doc['translations'].items():
+                by_lang.setdefault(lang, []).append((recipe.pk, data))
+
+        values = {}
+        for lang, rows in by_lang.items():
+            # El slug del documento se conserva si está libre (exportaciones); si no, se calcula del título
+            slugs = generate_unique_slugs(
+                Recipe, [data.get('slug') or data['title'] for _, data in rows], lang, [pk for pk, _ in rows],
+            )
+            for (pk, data), slug in zip(rows, slugs):
+                values[(pk, lang)] = {
+                    'title': data['title'].strip(),
+                    'slug': slug,
+                    'description': data.get('description') or '',
+                    'instructions': data.get('instructions') or '',
+                    'tips': data.get('tips') or '',
+                }
+        bulk_write_translations(Recipe, values)
+
+    def _write_taxonomy_links(self, recipes, documents):
+        for field in M2M_TAXONOMIES:
+            m2m = Recipe._meta.get_field(field)
+            through = m2m.remote_field.through
+            source, target = f"{m2m.m2m_field_name()}_id", f"{m2m.m2m_reverse_field_name()}_id"
+
+            refs = [ref for doc in documents for ref in doc[field]]
+            pks = iter(self.resolvers[field].resolve(refs))
+            links = []
+            for recipe, doc in zip(recipes, documents):
+                for target_pk in {next(pks) for _ in doc[field]} - {None}:
+                    links.append(through(**{source: recipe.pk, target: target_pk}))
+            through.objects.bulk_create(links, batch_size=self.batch_size, ignore_conflicts=True)
+
+    def _write_ingredients(self, recipes, documents):
+        items = [item for doc in documents for item in doc['ingredients']]
+        ingredient_pks = iter(self.ingredients.resolve([item['name'] for item in items]))
+        unit_pks = iter(self.units.resolve([item['unit'] for item in items]))
+
+        rows = []
+        for recipe, doc in zip(recipes, documents):
+            used = set()
+            for item in doc['ingredients']:
+                ingredient_id, unit_id = next(ingredient_pks), next(unit_pks)
+                if ingredient_id in used:
+                    continue
+                used.add(ingredient_id)
+                rows.append(RecipeIngredient(
+                    recipe_id=recipe.pk,
+                    ingredient_id=ingredient_id,
+                    quantity=item['quantity'],
+                    unit_id=unit_id,
+                    order=item['order'],
+                ))
+        RecipeIngredient.objects.bulk_create(rows, batch_size=self.batch_size)
+
+    def _enqueue_missing_languages(self, recipes, documents):
+        jobs = []
+        for recipe, doc in zip(recipes, documents):
+            missing = [lang for lang in TRANSLATION_LANGS if lang not in doc['translations']]
+            if missing:
+                jobs.append(TranslationJob(recipe_id=recipe.pk, source_lang=doc['source_lang'], pending_langs=missing))
+        TranslationJob.objects.bulk_create(jobs, batch_size=self.batch_size)
+        self.stats['jobs'] += len(jobs)
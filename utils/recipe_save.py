@@ -0,0 +1,77 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils.translation import get_language
+from recipes.models import Recipe, RecipeIngredient
+from utils.helpers import process_ingredients_formset
+from utils.profiling import stage
+from utils.services import generate_unique_slug
+
+# Se envía una sola vez por guardado, al final de la transacción, con la receta,
+# sus relaciones e ingredientes ya escritos.
+# Argumentos: recipe, created, source_lang, original_data
+recipe_saved = Signal()
+
+RECIPE_INGREDIENT_FIELDS = ['ingredient', 'quantity', 'unit', 'order']
+
+
+def save_recipe(form, formset, request, original_data=None):
+    """Guarda el formulario de receta como una unidad de trabajo.
+
+    Receta (foto incluida), relaciones M2M e ingredientes se escriben en una transacción
+    y cada fila una sola vez. El formset tiene que estar ya validado: si algo falla,
+    no queda nada a medias.
+    """
+    created = form.instance.pk is None
+    source_lang = get_language()[:2]
+
+    with transaction.atomic():
+        with stage('form_save'):
+            recipe = form.save(commit=False)
+            recipe.author = request.user
+            recipe.set_current_language(source_lang)
+            if created:
+                recipe.source_lang = source_lang
+            if created or 'title' in form.changed_data:
+                recipe.slug = generate_unique_slug(Recipe, recipe.title, source_lang, object_id=recipe.pk)
+            recipe.save()
+            form.save_m2m()
+
+        if created:
+            promote_to_author(request.user)
+
+        with stage('ingredients'):
+            formset.instance = recipe
+            process_ingredients_formset(formset, source_lang)
+        with stage('formset_save'):
+            save_ingredient_rows(formset)
+
+        with stage('post_save_hooks'):
+            recipe_saved.send(
+                sender=Recipe, recipe=recipe, created=created,
+                source_lang=source_lang, original_data=original_data,
+            )
+    return recipe
+
+
+def promote_to_author(user):
+    # UPDATE de una columna en lugar de user.save() (que reescribe toda la fila)
+    if user.role == 'reader':
+        get_user_model().objects.filter(pk=user.pk, role='reader').update(role='author')
+        user.role = 'author'
+
+
+def save_ingredient_rows(formset):
+    """Escribe las filas del formset de ingredientes con un DELETE, un UPDATE y un INSERT en bloque."""
+    formset.save(commit=False)
+
+    deleted = [obj.pk for obj in formset.deleted_objects if obj.pk]
+    if deleted:
+        RecipeIngredient.objects.filter(pk__in=deleted).delete()
+
+    changed = [obj for obj, _ in formset.changed_objects]
+    if changed:
+        RecipeIngredient.objects.bulk_update(changed, RECIPE_INGREDIENT_FIELDS)
+
+    if formset.new_objects:
+        RecipeIngredient.objects.bulk_create(formset.new_objects)
@@ -0,0 +1,188 @@
+import os
+import random
+import time
+from array import array
+from django.core.cache import cache
+from recipes.models import Recipe
+
+# Muestreo aleatorio sin ORDER BY RAND(): cada filtro (destacadas, fáciles, por cocina...)
+# tiene en caché un array compacto con los ids que lo cumplen. Sacar k recetas es elegir
+# k ids del array y leerlos por clave primaria, lo mismo da que haya cien recetas que cien mil.
+#
+# Altas y cambios se añaden desde los receptores (recipes.receivers); los ids que dejan de
+# cumplir el filtro o se borran se detectan al muestrear y se quitan del array.
+#
+# add() y discard() leen, modifican y vuelven a escribir el array sin bloqueo: si dos procesos
+# lo hacen a la vez puede perderse uno de los cambios. Un id quitado que vuelve es inofensivo
+# (se descarta al validar el muestreo); uno añadido que se pierde falta hasta que el array
+# caduca. Por eso las modificaciones conservan la caducidad del array construido y no la
+# renuevan: la pérdida dura como mucho POOL_CACHE_SECONDS (más LOCAL_POOL_SECONDS en cada proceso).
+POOL_CACHE_SECONDS = int(os.getenv("ID_POOL_CACHE_SECONDS", "3600"))
+# Copia en memoria del proceso: un muestreo no deserializa el array en cada petición.
+# Los cambios hechos desde otros procesos se ven pasado este tiempo (los ids obsoletos
+# se descartan igualmente al validar el muestreo).
+LOCAL_POOL_SECONDS = float(os.getenv("ID_POOL_LOCAL_SECONDS", "30"))
+VERSION_KEY = "id_pools:version"
+# Candidatos de más por petición, para cubrir ids obsoletos sin otra vuelta
+OVERSAMPLE = 2
+
+
+def _version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def invalidate_pools():
+    """Descarta todos los arrays (cargas masivas que no envían señales)."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns(), None)
+
+
+class IdPool:
+    """Ids de las recetas que cumplen un filtro, opcionalmente parametrizado (p. ej. por categoría).
+
+    `queryset(*params)` define el filtro y `members(recipe)` devuelve los parámetros de los
+    arrays en los que entra una receta al guardarse (None si se mantiene por otra vía).
+    """
+
+    def __init__(self, name, queryset, members=None):
+        self.name = name
+        self.queryset = queryset
+        self.members = members
+        self._local = {}
+
+    def _key(self, params):
+        return f"id_pool:{_version()}:{self.name}:{':'.join(str(param) for param in params)}"
+
+    def ids(self, *params):
+        key = self._key(params)
+        local = self._local.get(params)
+        if local and local[0] == key and local[1] > time.monotonic():
+            return local[2]
+
+        cached = cache.get(key)
+        if cached is None:
+            ids = array('q', self.queryset(*params).order_by().values_list('pk', flat=True))
+            cache.set(key, (time.time() + POOL_CACHE_SECONDS, ids), POOL_CACHE_SECONDS)
+        else:
+            ids = cached[1]
+        self._remember(key, params, ids)
+        return ids
+
+    def _remember(self, key, params, ids):
+        self._local[params] = (key, time.monotonic() + LOCAL_POOL_SECONDS, ids)
+
+    def _store(self, key, params, expires, ids):
+        # Caducidad del array original (ver arriba)
+        timeout = expires - time.time()
+        if timeout > 0:
+            cache.set(key, (expires, ids), timeout)
+            self._remember(key, params, ids)
+        else:
+            cache.delete(key)
+            self._local.pop(params, None)
+
+    def add(self, pk, *params):
+        # Solo si el array ya existe: si no, se construirá completo cuando alguien lo pida
+        key = self._key(params)
+        cached = cache.get(key)
+        if cached is not None and pk not in cached[1]:
+            expires, ids = cached
+            ids.append(pk)
+            self._store(key, params, expires, ids)
+
+    def add_if_member(self, pk, *params):
+        if self.queryset(*params).filter(pk=pk).exists():
+            self.add(pk, *params)
+
+    def discard(self, pk, *params):
+        self.discard_many([pk], *params)
+
+    def discard_many(self, pks, *params):
+        key = self._key(params)
+        cached = cache.get(key)
+        if cached is None:
+            return
+        expires, ids = cached
+        pks = set(pks)
+        kept = array('q', (pk for pk in ids if pk not in pks))
+        if len(kept) != len(ids):
+            self._store(key, params, expires, kept)
+
+    def choice(self, *params):
+        """Un id al azar, sin validar (quien lo use debe descartarlo si ya no cumple el filtro)."""
+        ids = self.ids(*params)
+        return random.choice(ids) if ids else None
+
+    def _candidates(self, k, params, exclude):
+        ids = self.ids(*params)
+        wanted = min(len(ids), (k + len(exclude)) * OVERSAMPLE)
+        return [pk for pk in random.sample(ids, wanted) if pk not in exclude]
+
+    def _validate(self, k, params, candidates, found):
+        # Los candidatos que ya no cumplen el filtro salen del array
+        stale = [pk for pk in candidates if pk not in found]
+        if stale:
+            self.discard_many(stale, *params)
+        return [found[pk] for pk in candidates if pk in found][:k]
+
+    def sample(self, k, *params, exclude=()):
+        """Hasta k recetas al azar (instancias, en orden aleatorio) con una consulta por pk."""
+        candidates = self._candidates(k, params, set(exclude))
+        if not candidates:
+            return []
+        found = self.queryset(*params).prefetch_related('translations').in_bulk(candidates)
+        return self._validate(k, params, candidates, found)
+
+    def sample_ids(self, k, *params, exclude=()):
+        """Como sample(), pero solo los ids (para cachearlos y cargar las tarjetas después)."""
+        candidates = self._candidates(k, params, set(exclude))
+        if not candidates:
+            return []
+        found = {pk: pk for pk in self.queryset(*params).filter(pk__in=candidates).values_list('pk', flat=True)}
+        return self._validate(k, params, candidates, found)
+
+
+def _if(condition, *params):
+    return [params] if condition else []
+
+
+FEATURED = IdPool(
+    'featured',
+    lambda: Recipe.objects.filter(featured=True).exclude(photo=''),
+    lambda recipe: _if(recipe.featured and recipe.photo),
+)
+EASY = IdPool(
+    'easy',
+    lambda: Recipe.objects.filter(difficulty='easy'),
+    lambda recipe: _if(recipe.difficulty == 'easy'),
+)
+BY_CATEGORY = IdPool(
+    'category',
+    lambda category_id: Recipe.objects.filter(category_id=category_id),
+    lambda recipe: _if(recipe.category_id, recipe.category_id),
+)
+BY_CUISINE = IdPool(
+    'cuisine',
+    lambda cuisine_id: Recipe.objects.filter(cuisine_type_id=cuisine_id),
+    lambda recipe: _if(recipe.cuisine_type_id, recipe.cuisine_type_id),
+)
+# M2M: lo mantiene m2m_changed sobre Recipe.themes
+BY_THEME = IdPool(
+    'theme',
+    lambda theme_id: Recipe.objects.filter(themes=theme_id),
+)
+
+# Receta aleatoria (random_recipe_json): con foto y traducida al idioma
+RANDOM_BY_LANGUAGE = IdPool(
+    'random',
+    lambda language: Recipe.objects.filter(translations__language_code=language).exclude(photo='').exclude(photo__isnull=True),
+    lambda recipe: [(language,) for language in recipe.get_available_languages()] if recipe.photo else [],
+)
+
+POOLS = [FEATURED, EASY, BY_CATEGORY, BY_CUISINE, BY_THEME, RANDOM_BY_LANGUAGE]
@@ -1,5 +1,15 @@
 import unicodedata
+from django.core.cache import cache
+from django.apps import apps
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+from django.dispatch import Signal
 from django.utils.text import slugify
+from parler.cache import get_translation_cache_key
+
+# bulk_write_translations no pasa por save(): se envía al terminar, con el modelo traducible
+# como sender. Argumentos: master_ids
+translations_bulk_written = Signal()
 
 def normalize_text(text: str) -> str:
     """Normaliza un texto: sin tildes, minúsculas, sin espacios extra."""
@@ -8,12 +18,198 @@ def normalize_text(text: str) -> str:
     text = "".join(c for c in text if unicodedata.category(c) != "Mn")
     return text
 
-def generate_unique_slug(model, value, language_code):
-    clean_value = normalize_text(value)
-    base_slug = slugify(clean_value, allow_unicode=False)
-    slug = base_slug
+SLUG_ALLOCATION_ATTEMPTS = 10
+SLUG_PREFIX_CHUNK = 200
+
+def _base_slug(value):
+    return slugify(normalize_text(value or ''), allow_unicode=False)
+
+def _slug_prefix_query(bases, field='slug'):
+    query = Q()
+    for base in set(bases):
+        query |= Q(**{field: base}) | Q(**{f"{field}__startswith": f"{base}-"})
+    return query
+
+def _next_free_slug(base, taken):
+    slug = base
     counter = 1
-    while model.objects.language(language_code).filter(translations__slug=slug).exists():
-        slug = f"{base_slug}-{counter}"
+    while slug in taken:
+        slug = f"{base}-{counter}"
         counter += 1
-    return slug
\ No newline at end of file
+    return slug
+
+def _taken_slugs(model, bases, language_code, object_ids):
+    """Slugs ocupados con esos prefijos, en una sola consulta (traducciones ∪ registro)
+    por cada SLUG_PREFIX_CHUNK prefijos distintos.
+
+    Las filas del propio objeto en este idioma no cuentan: al actualizarlo puede conservar su slug.
+    """
+    SlugRegistry = apps.get_model('recipes', 'SlugRegistry')
+    bases = sorted(set(bases))
+    taken = set()
+
+    # Los OR de prefijos se trocean: SQLite no admite expresiones de más de 1000 niveles
+    for start in range(0, len(bases), SLUG_PREFIX_CHUNK):
+        query = _slug_prefix_query(bases[start:start + SLUG_PREFIX_CHUNK])
+        translations = model._parler_meta.root_model.objects.filter(query)
+        registry = SlugRegistry.objects.filter(query, model_label=model._meta.label)
+        if object_ids:
+            translations = translations.exclude(master_id__in=object_ids, language_code=language_code)
+            registry = registry.exclude(object_id__in=object_ids, language_code=language_code)
+        taken.update(translations.values_list('slug', flat=True).union(registry.values_list('slug', flat=True)))
+    return taken
+
+def _reserve_slugs(model, language_code, slugs, object_ids):
+    """Reserva los slugs en SlugRegistry y devuelve los que otro guardado se ha llevado antes."""
+    SlugRegistry = apps.get_model('recipes', 'SlugRegistry')
+    label = model._meta.label
+    lost = set()
+
+    # Objetos nuevos (sin pk): la restricción única decide, uno a uno
+    for slug, object_id in zip(slugs, object_ids):
+        if object_id is None:
+            try:
+                with transaction.atomic():
+                    SlugRegistry.objects.create(model_label=label, language_code=language_code, slug=slug)
+            except IntegrityError:
+                lost.add(slug)
+
+    # Objetos existentes: inserción en bloque y comprobación de a quién pertenece cada slug
+    owned = {slug: object_id for slug, object_id in zip(slugs, object_ids) if object_id is not None}
+    if owned:
+        SlugRegistry.objects.bulk_create(
+            [SlugRegistry(model_label=label, language_code=language_code, slug=slug, object_id=object_id)
+             for slug, object_id in owned.items()],
+            ignore_conflicts=True,
+        )
+        owners = {
+            slug: (object_id, lang)
+            for slug, object_id, lang in SlugRegistry.objects
+            .filter(model_label=label, slug__in=owned)
+            .values_list('slug', 'object_id', 'language_code')
+        }
+        lost.update(slug for slug, object_id in owned.items() if owners.get(slug) != (object_id, language_code))
+
+    return lost
+
+def generate_unique_slug(model, value, language_code, object_id=None):
+    return generate_unique_slugs(model, [value], language_code, [object_id])[0]
+
+def generate_unique_slugs(model, values, language_code, object_ids=None):
+    """Slugs únicos para varios valores: una consulta por prefijo y una reserva en SlugRegistry.
+
+    Si un guardado simultáneo reserva el mismo slug, se reintenta con el siguiente sufijo.
+    """
+    bases = [_base_slug(value) for value in values]
+    if not bases:
+        return []
+    if object_ids is None:
+        object_ids = [None] * len(bases)
+
+    taken = _taken_slugs(model, bases, language_code, [pk for pk in object_ids if pk is not None])
+    slugs = [None] * len(bases)
+    pending = list(range(len(bases)))
+
+    for _ in range(SLUG_ALLOCATION_ATTEMPTS):
+        for i in pending:
+            slugs[i] = _next_free_slug(bases[i], taken)
+            taken.add(slugs[i])
+
+        lost = _reserve_slugs(model, language_code, [slugs[i] for i in pending], [object_ids[i] for i in pending])
+        pending = [i for i in pending if slugs[i] in lost]
+        if not pending:
+            return slugs
+
+    raise IntegrityError(f"No se pudo reservar un slug único para {model._meta.label}: {[bases[i] for i in pending]}")
+
+def generate_unique_field_slug(model, value, exclude_pk=None, field='slug'):
+    """Siguiente slug libre en un campo único del propio modelo (no traducido), con una consulta."""
+    base = slugify(str(value))
+    qs = model._default_manager.filter(_slug_prefix_query([base], field))
+    if exclude_pk is not None:
+        qs = qs.exclude(pk=exclude_pk)
+    return _next_free_slug(base, set(qs.values_list(field, flat=True)))
+
+def save_with_unique_slug(instance, value, save, field='slug'):
+    """Asigna un slug libre y guarda; si otro guardado se adelanta (IntegrityError), prueba el siguiente."""
+    for attempt in range(SLUG_ALLOCATION_ATTEMPTS):
+        setattr(instance, field, generate_unique_field_slug(type(instance), value, instance.pk, field))
+        try:
+            with transaction.atomic():
+                return save()
+        except IntegrityError:
+            if attempt == SLUG_ALLOCATION_ATTEMPTS - 1:
+                raise
+
+
+def bulk_create_with_pks(model, objs, batch_size=500):
+    """bulk_create que deja el pk en cada objeto también en MySQL.
+
+    MySQL no devuelve los ids de un INSERT múltiple: ahí se inserta fila a fila, un INSERT
+    por objeto. Como en loaddata, se guardan en crudo (save_base con raw=True): sin el
+    save() del modelo y con las señales marcadas raw, que los receptores ignoran. Igual que
+    con bulk_create, quien llama se encarga de traducciones, slugs e invalidaciones.
+    """
+    if connection.features.can_return_rows_from_bulk_insert:
+        return model.objects.bulk_create(objs, batch_size=batch_size)
+    with transaction.atomic():
+        for obj in objs:
+            # raw no pasa por pre_save de los campos: auto_now_add/auto_now se rellenan aquí
+            for field in obj._meta.concrete_fields:
+                field.pre_save(obj, True)
+            obj.save_base(raw=True, force_insert=True)
+    return objs
+
+
+def bulk_write_translations(model, values, batch_size=500):
+    """Escribe en bloque filas de traducción de parler: {(master_id, idioma): {campo: valor}}."""
+    if not values:
+        return
+
+    translation_model = model._parler_meta.root_model
+    existing = {
+        (tr.master_id, tr.language_code): tr
+        for tr in translation_model.objects.filter(
+            master_id__in={master_id for master_id, _ in values},
+            language_code__in={lang for _, lang in values},
+        )
+    }
+
+    to_create, to_update, fields = [], [], set()
+    for (master_id, lang), data in values.items():
+        tr = existing.get((master_id, lang))
+        if tr is None:
+            to_create.append(translation_model(master_id=master_id, language_code=lang, **data))
+        else:
+            for field, value in data.items():
+                setattr(tr, field, value)
+            fields.update(data)
+            to_update.append(tr)
+
+    with transaction.atomic():
+        translation_model.objects.bulk_create(to_create, batch_size=batch_size)
+        if to_update:
+            translation_model.objects.bulk_update(to_update, sorted(fields), batch_size=batch_size)
+
+    release_stale_slugs(model, {key: data['slug'] for key, data in values.items() if data.get('slug')})
+
+    # bulk_create/bulk_update no pasan por parler: se invalida su caché a mano
+    cache.delete_many([
+        get_translation_cache_key(translation_model, master_id, lang) for master_id, lang in values
+    ])
+    translations_bulk_written.send(sender=model, master_ids={master_id for master_id, _ in values})
+
+def release_stale_slugs(model, slugs):
+    """Libera en SlugRegistry los slugs anteriores de {(master_id, idioma): slug_actual}."""
+    SlugRegistry = apps.get_model('recipes', 'SlugRegistry')
+    by_lang = {}
+    for (master_id, lang), slug in slugs.items():
+        by_lang.setdefault(lang, {})[master_id] = slug
+    if not by_lang:
+        return
+
+    # Una sola consulta: por cada idioma, filas de esos objetos con un slug que ya no usan
+    stale = Q()
+    for lang, current in by_lang.items():
+        stale |= Q(language_code=lang, object_id__in=current) & ~Q(slug__in=current.values())
+    SlugRegistry.objects.filter(stale, model_label=model._meta.label).delete()
@@ -0,0 +1,97 @@
+import os
+import random
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from recipes.models import CuisineType, Recipe, Theme
+from utils.sampling import BY_CUISINE, BY_THEME, EASY
+
+# Estanterías de RecipeListView: se cachean solo los ids de cada una (por idioma y temas
+# de actualidad) y las tarjetas se cargan en una sola consulta. Cualquier guardado o
+# borrado de Recipe, Rating o Favorite sube la versión y deja las entradas viejas sin uso.
+SHELF_SIZE = 10
+SHELF_CACHE_SECONDS = int(os.getenv("SHELF_CACHE_SECONDS", "600"))
+VERSION_KEY = "shelves:version"
+
+
+def _version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Arranca en un valor nuevo si la clave se ha perdido: no reutiliza entradas antiguas
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def invalidate_shelves():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns(), None)
+
+
+def _shelf_ids(queryset):
+    return list(queryset.values_list('pk', flat=True)[:SHELF_SIZE])
+
+
+def _current_themes(theme_slugs):
+    # Los slugs de actualidad (utils.helpers) son los de los temas en el idioma por defecto
+    themes = (
+        Theme.objects
+        .filter(translations__language_code=settings.LANGUAGE_CODE, translations__slug__in=theme_slugs)
+        .prefetch_related('translations')
+        .distinct()
+    )
+    by_slug = {theme.safe_translation_getter('slug', language_code=settings.LANGUAGE_CODE): theme for theme in themes}
+    return [by_slug[slug] for slug in theme_slugs if slug in by_slug]
+
+
+def _build_shelves(language, theme_slugs):
+    popular_cuisine = (
+        CuisineType.objects
+        .annotate(num_recipes=Count('recipes'))
+        .order_by('-num_recipes')
+        .first()
+    )
+
+    themes = _current_themes(theme_slugs) if theme_slugs else []
+    actualidad = []
+    for theme in themes:
+        actualidad += [pk for pk in BY_THEME.sample_ids(SHELF_SIZE, theme.pk) if pk not in actualidad]
+    random.shuffle(actualidad)
+
+    return {
+        'top_recipes': _shelf_ids(Recipe.objects.top_rated()),
+        'recent_recipes': _shelf_ids(Recipe.objects.order_by('-created_at')),
+        'easy_recipes': EASY.sample_ids(SHELF_SIZE),
+        'cuisine_recipes': BY_CUISINE.sample_ids(SHELF_SIZE, popular_cuisine.pk) if popular_cuisine else [],
+        'popular_recipes': _shelf_ids(Recipe.objects.most_favorited()),
+        'actualidad_recipes': actualidad[:SHELF_SIZE],
+        # Solo el nombre: es lo único que pinta la plantilla
+        'popular_cuisine': {'name': popular_cuisine.safe_translation_getter('name', any_language=True)} if popular_cuisine else None,
+        'theme_name': themes[0].safe_translation_getter('name', language_code=language, any_language=True) if themes else '',
+    }
+
+
+def get_shelves(language, theme_slugs):
+    """Contexto de las estanterías de la portada de recetas para el idioma activo.
+
+    Con el caché caliente es una lectura del caché y una consulta de tarjetas (más la
+    de sus traducciones) para todas las estanterías juntas.
+    """
+    key = f"shelves:{_version()}:{language}:{','.join(theme_slugs)}"
+    shelves = cache.get(key)
+    if shelves is None:
+        shelves = _build_shelves(language, theme_slugs)
+        cache.set(key, shelves, SHELF_CACHE_SECONDS)
+
+    ids = {pk for name, value in shelves.items() if name.endswith('_recipes') for pk in value}
+    cards = Recipe.objects.language(language).prefetch_related('translations').in_bulk(ids) if ids else {}
+
+    context = {'popular_cuisine': shelves['popular_cuisine'], 'theme_name': shelves['theme_name']}
+    for name, value in shelves.items():
+        if name.endswith('_recipes'):
+            # Una receta borrada entre medias simplemente no aparece
+            context[name] = [cards[pk] for pk in value if pk in cards]
+    return context
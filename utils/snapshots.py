@@ -0,0 +1,110 @@
+import os
+from datetime import timedelta
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from parler.utils.context import switch_language
+from recipes.models import RecipeSnapshot
+from utils.detail_cache import detail_version
+from utils.helpers import format_quantity
+
+# Fichas de detalle (RecipeSnapshot): todo lo que pinta recipe_detail de una receta en un
+# idioma, ya traducido y formateado, en una fila que se lee por clave primaria. Las borra
+# utils.detail_cache.invalidate_recipe_detail y la siguiente visita la reconstruye.
+#
+# Los nombres de taxonomías e ingredientes que se escriben en bloque (traducciones, importación)
+# no avisan a las recetas que los usan: por eso una ficha se reconstruye también pasado este tiempo.
+SNAPSHOT_MAX_AGE = int(os.getenv("RECIPE_SNAPSHOT_MAX_AGE", "86400"))
+
+
+def snapshot_key(language, slug):
+    return f"{language}:{slug}"
+
+
+def get_snapshot(language, slug):
+    """Ficha guardada para la URL (idioma y slug), o None si no existe o ha caducado."""
+    try:
+        snapshot = RecipeSnapshot.objects.get(pk=snapshot_key(language, slug))
+    except RecipeSnapshot.DoesNotExist:
+        return None
+    if snapshot.built_at < timezone.now() - timedelta(seconds=SNAPSHOT_MAX_AGE):
+        return None
+    return snapshot
+
+
+def _names(manager):
+    return [str(obj) for obj in manager.all()]
+
+
+def build_snapshot(recipe, language, slug):
+    """Construye y guarda la ficha de una receta cargada con sus relaciones (ver recipe_detail)."""
+    version = detail_version(recipe.pk)
+    with switch_language(recipe, language):
+        data = {
+            'title': recipe.safe_translation_getter('title', any_language=True),
+            'slug': recipe.safe_translation_getter('slug', any_language=True),
+            'description': recipe.safe_translation_getter('description', any_language=True),
+            'instructions': recipe.safe_translation_getter('instructions', any_language=True),
+            'tips': recipe.safe_translation_getter('tips', any_language=True),
+            'photo': recipe.photo.name if recipe.photo else '',
+            'author': str(recipe.author),
+            'category_id': recipe.category_id, # type: ignore
+            'category': {
+                'name': str(recipe.category),
+                'slug': recipe.category.safe_translation_getter('slug', any_language=True),
+            } if recipe.category else None,
+            'cuisine_type': str(recipe.cuisine_type) if recipe.cuisine_type else None,
+            'themes': _names(recipe.themes),
+            'cooking_methods': _names(recipe.cooking_methods),
+            'meal_types': _names(recipe.meal_types),
+            'allergens': _names(recipe.allergens),
+            'tags': _names(recipe.tags),
+            'ingredients': [
+                {
+                    'quantity': format_quantity(ri.quantity),
+                    'unit': str(ri.unit) if ri.unit else '',
+                    'ingredient_name': ri.ingredient.safe_translation_getter('name', any_language=True),
+                }
+                for ri in recipe.recipe_ingredients.all() # type: ignore
+            ],
+            'difficulty': str(recipe.get_difficulty_display()), # type: ignore
+            'prep_time': recipe.prep_time,
+            'cook_time': recipe.cook_time,
+            'total_time': recipe.total_time,
+            'servings': recipe.servings,
+            'rating_avg': recipe.rating_avg,
+            'rating_count': recipe.rating_count,
+            'created_at': recipe.created_at.isoformat(),
+            'updated_at': recipe.updated_at.isoformat(),
+        }
+
+    snapshot = RecipeSnapshot(key=snapshot_key(language, slug), recipe=recipe, language_code=language, data=data)
+    # Si la receta ha cambiado mientras se leía, la ficha sirve para esta petición pero no se guarda
+    if detail_version(recipe.pk) == version:
+        try:
+            with transaction.atomic():
+                snapshot.save()
+        except IntegrityError:
+            # Otra petición la ha guardado entre medias
+            pass
+    return snapshot
+
+
+def snapshot_context(snapshot):
+    """Variables de la plantilla de detalle a partir de la ficha."""
+    data = snapshot.data
+    average = data['rating_avg']
+    full_slices = int(average)  # trozos completos
+    half_slice = 1 if (average - full_slices) >= 0.5 else 0
+    empty_slices = 5 - full_slices - half_slice
+    return {
+        **data,
+        'slug_translated': data['slug'],
+        'average_rating': average,
+        'total_votes': data['rating_count'],
+        'full_slices': range(full_slices),
+        'half_slice': half_slice,
+        'empty_slices': range(empty_slices),
+        'created_at': parse_datetime(data['created_at']),
+        'updated_at': parse_datetime(data['updated_at']),
+    }
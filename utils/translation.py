@@ -1,116 +1,384 @@
 import requests
 import logging
-import html 
+import contextvars
+import html
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from django.db import transaction
 from parler.utils.context import switch_language
+from utils.html_blocks import assemble_blocks, block_reuse_map, plan_block_translation
+from utils.detail_cache import invalidate_recipe_detail
 from utils.html_cleaner import clean_translated_html
+from utils.profiling import count_http_call, stage
+from utils.sampling import RANDOM_BY_LANGUAGE
+from utils.throttling import CircuitBreaker, TokenBucket
+from utils.translation_memory import TranslationCache
 from recipes.models import TRANSLATION_LANGS, Ingredient
-from .helpers import generate_unique_slug
+from utils.services import bulk_write_translations, generate_unique_slug, generate_unique_slugs
 from recipes.models import Recipe
 import os
 
 TRANSLATE_API_URL = os.getenv("TRANSLATE_API_URL", "https://libretranslate.de/translate")
+TRANSLATE_TIMEOUT = float(os.getenv("TRANSLATE_TIMEOUT", "10"))
+TRANSLATE_MAX_WORKERS = int(os.getenv("TRANSLATE_MAX_WORKERS", "8"))
+TRANSLATE_BATCH_SIZE = int(os.getenv("TRANSLATE_BATCH_SIZE", "25"))  # textos por petición (q como lista)
+TRANSLATE_RATE_LIMIT = float(os.getenv("TRANSLATE_RATE_LIMIT", "0"))  # peticiones/segundo (0 = sin límite)
+TRANSLATE_RATE_BURST = int(os.getenv("TRANSLATE_RATE_BURST", "10"))
+TRANSLATE_BREAKER_THRESHOLD = int(os.getenv("TRANSLATE_BREAKER_THRESHOLD", "5"))
+TRANSLATE_BREAKER_RESET = float(os.getenv("TRANSLATE_BREAKER_RESET", "30"))
 
-def translate_text(text, source_lang, target_lang):
-    try:
-        response = requests.post(
-            TRANSLATE_API_URL,
-            json={
-                'q': text,
-                'source': source_lang,
-                'target': target_lang,
-                'format': 'html'
-            },
-            timeout=10
-        )
-        if response.status_code == 200:
-            translated = response.json().get("translatedText", text)
-            return html.unescape(translated)
-        else:
-            logging.warning(f"Translation error [{response.status_code}]: {response.text}")
-            return text  # Devolver original si falla
+RECIPE_FIELDS = ['title', 'description', 'instructions', 'tips']
+
+
+class TranslationUnavailable(Exception):
+    """No se pudieron traducir algunos idiomas; quedan pendientes para un reintento."""
+
+    def __init__(self, languages):
+        self.languages = sorted(languages)
+        super().__init__(f"Translations pending for: {', '.join(self.languages)}")
+
+
+class TranslationClient:
+    """Cliente de LibreTranslate con conexiones persistentes (keep-alive) y peticiones en paralelo."""
+
+    def __init__(self, api_url=TRANSLATE_API_URL, timeout=TRANSLATE_TIMEOUT, max_workers=TRANSLATE_MAX_WORKERS,
+                 batch_size=TRANSLATE_BATCH_SIZE, memory=None, breaker=None, rate_limiter=None):
+        self.api_url = api_url
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='translation')
+        self._lock = threading.Lock()
+        self.http_calls = 0
+
+        # Memoria de traducción consultada antes de cualquier petición HTTP (None = desactivada)
+        self.memory = memory
+        self.breaker = breaker or CircuitBreaker(TRANSLATE_BREAKER_THRESHOLD, TRANSLATE_BREAKER_RESET)
+        self.rate_limiter = rate_limiter or TokenBucket(TRANSLATE_RATE_LIMIT, TRANSLATE_RATE_BURST)
+
+    def translate(self, text, source_lang, target_lang):
+        return self.translate_batch([(text, source_lang, target_lang)])[0]
+
+    def translate_batch(self, items):
+        """Traduce una lista de tuplas (texto, origen, destino) y devuelve las traducciones en el mismo orden.
+
+        Los textos que no se han podido traducir se devuelven como None.
+        """
+        results = [None] * len(items)
+
+        # Los textos repetidos se piden una sola vez
+        unique = {}
+        for i, (text, source_lang, target_lang) in enumerate(items):
+            if not text or source_lang == target_lang:
+                results[i] = text
+                continue
+            unique.setdefault((text, source_lang, target_lang), []).append(i)
+
+        found = self.memory.get_many(list(unique)) if self.memory and unique else {}
+
+        # Los textos que faltan se agrupan por par de idiomas: una petición por lote de batch_size textos
+        groups = {}
+        for key in unique:
+            if key not in found:
+                groups.setdefault(key[1:], []).append(key[0])
 
-    except Exception as e:
-        logging.error(f"Error translating to {target_lang}: {e}")
-        return text  # Devolver original si falla
-    
-def translate_recipe(recipe, source_lang, target_lang, fields=None, original_data=None):
-    if source_lang == target_lang:
-        return
+        futures = []
+        for (source_lang, target_lang), texts in groups.items():
+            for start in range(0, len(texts), self.batch_size):
+                chunk = texts[start:start + self.batch_size]
+                # Con el contexto del hilo que traduce: las llamadas se cuentan en su perfil de guardado
+                future = self._executor.submit(contextvars.copy_context().run, self._post, chunk, source_lang, target_lang)
+                futures.append((chunk, source_lang, target_lang, future))
 
+        fetched = {}
+        for chunk, source_lang, target_lang, future in futures:
+            for text, translated in zip(chunk, future.result()):
+                fetched[(text, source_lang, target_lang)] = translated
+        found.update(fetched)
+
+        if self.memory:
+            # Solo se guardan las traducciones correctas, nunca la copia del original
+            self.memory.set_many({key: value for key, value in fetched.items() if value is not None})
+
+        for key, indexes in unique.items():
+            for i in indexes:
+                results[i] = found[key]
+
+        return results
+
+    def _post(self, texts, source_lang, target_lang):
+        """Envía una petición con uno o varios textos; devuelve una traducción (o None si falla) por texto."""
+        # Con el circuito abierto o sin cupo se falla al instante, sin esperar al timeout
+        if not self.breaker.allow():
+            return [None] * len(texts)
+        if not self.rate_limiter.acquire(timeout=self.timeout):
+            logging.warning(f"Translation rate limit reached, skipping {len(texts)} text(s) to {target_lang}")
+            # Si era la llamada de prueba del circuito, no puede quedarse semiabierto para siempre
+            self.breaker.release()
+            return [None] * len(texts)
+
+        with self._lock:
+            self.http_calls += 1
+        count_http_call()
+        try:
+            response = self.session.post(
+                self.api_url,
+                json={
+                    'q': texts if len(texts) > 1 else texts[0],
+                    'source': source_lang,
+                    'target': target_lang,
+                    'format': 'html'
+                },
+                timeout=self.timeout
+            )
+            if response.status_code == 200:
+                translated = response.json().get("translatedText")
+                if not isinstance(translated, list):
+                    translated = [translated]
+                if len(translated) != len(texts):
+                    logging.warning(f"Translation error: expected {len(texts)} texts, got {len(translated)}")
+                    # El servicio responde: como un 4xx, no cuenta como fallo del circuito
+                    self.breaker.record_success()
+                    return [None] * len(texts)
+                self.breaker.record_success()
+                return [html.unescape(t) if t is not None else None for t in translated]
+            else:
+                logging.warning(f"Translation error [{response.status_code}]: {response.text}")
+                # Los 4xx (idioma no soportado...) son errores de la petición, no del servicio
+                if response.status_code == 429 or response.status_code >= 500:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                return [None] * len(texts)
+
+        except Exception as e:
+            logging.error(f"Error translating to {target_lang}: {e}")
+            self.breaker.record_failure()
+            return [None] * len(texts)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_translation_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = TranslationClient(memory=TranslationCache())
+    return _client
+
+def set_translation_client(client):
+    """Sustituye el cliente compartido (benchmarks, servidor de pruebas...). Devuelve el anterior."""
+    global _client
+    with _client_lock:
+        previous, _client = _client, client
+    return previous
+
+def translate_text(text, source_lang, target_lang):
+    """Devuelve la traducción, o None si el servicio no está disponible."""
+    return get_translation_client().translate(text, source_lang, target_lang)
+
+def get_changed_fields(recipe, source_lang, fields=None, original_data=None):
+    """Devuelve {campo: valor en source_lang} de los campos que hay que traducir."""
     if fields is None:
-        fields = ['title', 'description', 'instructions', 'tips']
-
-     # Determinar si es create o update
-    force_translate = original_data is None
-
-    if force_translate:
-        # CREATE: obtener valores originales en source_lang
-        with switch_language(recipe, source_lang):
-            original_data = {field: getattr(recipe, field, '') for field in fields}
-    else:
-        # UPDATE: solo traducir si se está editando en source_lang
-        if recipe.get_current_language() != source_lang:
-            # Guardar cambios en ese idioma sin traducir
-            with switch_language(recipe, target_lang):
-                for field in fields:
-                    setattr(recipe, field, getattr(recipe, field, ''))
-                recipe.save()
-            return
-
-    translated_data = {}
-
-    for field in fields:
-            new_value = getattr(recipe, field, '')
-            old_value = original_data.get(field, '')
-
-            if force_translate or new_value != old_value:
-                if not new_value:
-                    translated_data[field] = ''
-                elif field == 'title':
-                    translated_data[field] = translate_text(new_value, source_lang, target_lang)
+        fields = RECIPE_FIELDS
+
+    with switch_language(recipe, source_lang):
+        current_data = {field: getattr(recipe, field, '') or '' for field in fields}
+
+    # Create: se traducen todos los campos
+    if original_data is None:
+        return current_data
+
+    # Update: solo los que cambiaron respecto a los datos originales
+    return {
+        field: value for field, value in current_data.items()
+        if value != (original_data.get(field, '') or '')
+    }
+
+def translate_changed_fields(recipe, source_lang, target_langs, changed, original_data=None, existing=None):
+    """Traduce en un único lote los campos cambiados a todos los idiomas destino.
+
+    En update, los campos HTML se envían por bloques (párrafos, elementos de lista) y
+    se reutiliza la traducción existente de los bloques que no han cambiado.
+    `existing` ({idioma: fila de traducción}) evita releer cada idioma desde la receta.
+    Devuelve {idioma: {campo: traducción}}; los campos que no se pudieron traducir no aparecen.
+    """
+    batch = []
+    plans = {}
+
+    for lang in target_langs:
+        for field, value in changed.items():
+            if not value:
+                continue
+
+            reuse = {}
+            if field != 'title' and original_data is not None:
+                if existing is not None:
+                    previous = getattr(existing.get(lang), field, '')
+                elif recipe.has_translation(lang):
+                    with switch_language(recipe, lang):
+                        previous = getattr(recipe, field, '')
                 else:
-                    translated_data[field] = clean_translated_html(translate_text(new_value, source_lang, target_lang))
+                    previous = ''
+                reuse = block_reuse_map(original_data.get(field) or '', previous or '')
+
+            if reuse:
+                segments, pending = plan_block_translation(value, reuse)
             else:
-                # En update, mantener traducción existente
-                with switch_language(recipe, target_lang):
-                    translated_data[field] = getattr(recipe, field, '')
-                    
-    with switch_language(recipe, target_lang):
-        for field in fields:
-            setattr(recipe, field, translated_data.get(field, ''))
-        if 'title' in fields:
-            recipe.slug = generate_unique_slug(Recipe, translated_data.get('title', ''), target_lang)
-        recipe.save()
+                segments, pending = [0], [value]
 
-def get_or_create_translated_ingredient(ingredient, source_lang):
-    with switch_language(ingredient, source_lang):
-        source_name = ingredient.name
-    
-    for lang in TRANSLATION_LANGS:
-        if lang == source_lang:
-            continue
+            plans[(lang, field)] = (segments, len(batch))
+            batch.extend((text, source_lang, lang) for text in pending)
 
-        # Cambiar idioma para asignar la traducción
+    results = get_translation_client().translate_batch(batch)
+
+    translated = {lang: {} for lang in target_langs}
+    for (lang, field), (segments, offset) in plans.items():
+        pending = results[offset:offset + sum(isinstance(s, int) for s in segments)]
+        if all(text is not None for text in pending):
+            translated[lang][field] = assemble_blocks(segments, pending)
+    return translated
+
+def build_recipe_translation(changed, translated):
+    """Valores de la fila de traducción a partir de los campos cambiados y sus traducciones.
+
+    Devuelve None si falta la traducción de algún campo: nunca se guarda el texto
+    original como si fuera la traducción.
+    """
+    if any(value and field not in translated for field, value in changed.items()):
+        return None
+
+    data = {}
+    for field, value in changed.items():
+        if not value:
+            data[field] = ''
+        elif field == 'title':
+            data[field] = translated[field]
+        else:
+            data[field] = clean_translated_html(translated[field])
+    return data
+
+def get_missing_ingredient_langs(ingredient, source_lang, target_langs=None):
+    if target_langs is None:
+        target_langs = [lang for lang in TRANSLATION_LANGS if lang != source_lang]
+
+    missing = []
+    for lang in target_langs:
         with switch_language(ingredient, lang):
-            if ingredient.has_translation(lang) and  ingredient.name:
-                continue
-            # Traducir usando texto original
-            translated_name = translate_text(source_name, source_lang, lang)
+            if not (ingredient.has_translation(lang) and ingredient.name):
+                missing.append(lang)
+    return missing
 
-            ingredient.name = translated_name
-            ingredient.slug = generate_unique_slug(Ingredient, translated_name, lang)
-            ingredient.save_translations()
-            ingredient.save()
+def translate_ingredient_names(ingredients, source_lang, target_langs=None):
+    """Traduce los nombres de varios ingredientes a la vez.
 
+    Los nombres se agrupan en una petición por idioma destino, los slugs se calculan
+    con una consulta por idioma y las filas de traducción se escriben en bloque.
+    Devuelve el conjunto de idiomas que han quedado pendientes.
+    """
+    pending = []
+    for ingredient in ingredients:
+        with switch_language(ingredient, source_lang):
+            source_name = ingredient.name
+        if not source_name:
+            continue
+        for lang in get_missing_ingredient_langs(ingredient, source_lang, target_langs):
+            pending.append((ingredient, lang, source_name))
+
+    results = get_translation_client().translate_batch(
+        [(source_name, source_lang, lang) for _, lang, source_name in pending]
+    )
+
+    by_lang = {}
+    failed_langs = set()
+    for (ingredient, lang, _), translated_name in zip(pending, results):
+        if translated_name is None:
+            failed_langs.add(lang)
+            continue
+        by_lang.setdefault(lang, []).append((ingredient.pk, translated_name))
+
+    values = {}
+    for lang, rows in by_lang.items():
+        slugs = generate_unique_slugs(Ingredient, [name for _, name in rows], lang, [pk for pk, _ in rows])
+        for (ingredient_id, name), slug in zip(rows, slugs):
+            values[(ingredient_id, lang)] = {'name': name, 'slug': slug}
+
+    bulk_write_translations(Ingredient, values)
+    return failed_langs
+
+def get_or_create_translated_ingredient(ingredient, source_lang):
+    translate_ingredient_names([ingredient], source_lang)
     return ingredient
 
 def translate_ingredients(recipe, source_lang, target_langs):
-    for ri in recipe.recipe_ingredients.all():
-        ingredient = ri.ingredient
-        get_or_create_translated_ingredient(ingredient, source_lang)
+    recipe_ingredients = recipe.recipe_ingredients.select_related('ingredient').prefetch_related('ingredient__translations')
+    return translate_ingredient_names([ri.ingredient for ri in recipe_ingredients], source_lang, target_langs)
+
+def handle_translations_for_recipe(recipe, source_lang, original_data=None, target_langs=None):
+    """Traduce la receta y sus ingredientes a target_langs (por defecto, el resto de TRANSLATION_LANGS).
 
-def handle_translations_for_recipe(recipe, source_lang, original_data=None):
-    target_langs = [lang for lang in TRANSLATION_LANGS if lang != source_lang]
+    Los idiomas que no se pueden traducir no se tocan y se notifican con TranslationUnavailable.
+    """
+    if target_langs is None:
+        target_langs = [lang for lang in TRANSLATION_LANGS if lang != source_lang]
+    target_langs = [lang for lang in target_langs if lang != source_lang]
+
+    # Filas de traducción existentes, en una consulta (reutilización de bloques y slugs)
+    existing = {tr.language_code: tr for tr in recipe.translations.all()}
+
+    # Un único lote con todos los campos × idiomas: el tiempo total es el de la petición más lenta.
+    # Los idiomas sin fila todavía se traducen completos aunque sea una edición.
+    with stage('translate_fields'):
+        full = get_changed_fields(recipe, source_lang)
+        changed = full if original_data is None else get_changed_fields(recipe, source_lang, original_data=original_data)
+        updating = [lang for lang in target_langs if lang in existing and original_data is not None]
+        creating = [lang for lang in target_langs if lang not in updating]
+
+        translated_by_lang = {}
+        if updating:
+            translated_by_lang.update(translate_changed_fields(recipe, source_lang, updating, changed, original_data, existing))
+        if creating:
+            translated_by_lang.update(translate_changed_fields(recipe, source_lang, creating, full))
+
+    pending_langs = set()
+    values = {}
     for lang in target_langs:
-        translate_recipe(recipe, source_lang, lang, original_data=original_data)
-    translate_ingredients(recipe, source_lang, target_langs)
\ No newline at end of file
+        data = build_recipe_translation(changed if lang in updating else full, translated_by_lang[lang])
+        if data is None:
+            pending_langs.add(lang)
+            continue
+        row = existing.get(lang)
+        if 'title' in data or not (row and row.slug):
+            title = data.get('title', row.title if row else '')
+            data['slug'] = generate_unique_slug(Recipe, title, lang, object_id=recipe.pk)
+        if data:
+            values[(recipe.pk, lang)] = data
+
+    # Todas las filas de idioma en un INSERT/UPDATE en bloque en lugar de un save() por idioma
+    with stage('write_translations'):
+        bulk_write_translations(Recipe, values)
+
+    # bulk_write no envía señales: los idiomas nuevos se añaden a mano al array de la receta aleatoria
+    new_langs = [lang for (_, lang) in values if lang not in existing]
+    if new_langs and recipe.photo:
+        def add_to_random_pool():
+            for lang in new_langs:
+                RANDOM_BY_LANGUAGE.add(recipe.pk, lang)
+        transaction.on_commit(add_to_random_pool)
+
+    with stage('translate_ingredients'):
+        pending_langs |= translate_ingredients(recipe, source_lang, target_langs)
+    # Ni bulk_write ni los ingredientes envían señales: la página cacheada se invalida a mano
+    transaction.on_commit(lambda: invalidate_recipe_detail(recipe.pk))
+
+    if pending_langs:
+        raise TranslationUnavailable(pending_langs)
@@ -0,0 +1,105 @@
+import logging
+from datetime import timedelta
+from django.db import connection, transaction
+from django.utils import timezone
+from recipes.models import Recipe, TranslationJob, TranslationJobStatus
+from utils.profiling import profile_save
+from utils.translation import TranslationUnavailable, handle_translations_for_recipe
+
+RETRY_BASE_DELAY = 30  # segundos; se duplica en cada reintento
+STALE_JOB_TIMEOUT = timedelta(minutes=15)
+
+
+def enqueue_recipe_translation(recipe, source_lang, original_data=None):
+    """Encola la traducción de la receta al resto de idiomas de TRANSLATION_LANGS."""
+    pending = (
+        TranslationJob.objects
+        .filter(recipe=recipe, source_lang=source_lang, status=TranslationJobStatus.PENDING)
+        .order_by('pk')
+        .first()
+    )
+    if pending:
+        # Ya hay un trabajo esperando: se conservan sus datos originales,
+        # que son la referencia más antigua para la traducción diferencial.
+        if pending.pending_langs is not None:
+            # El texto ha vuelto a cambiar: hay que revisar todos los idiomas
+            pending.pending_langs = None
+            pending.save(update_fields=['pending_langs', 'updated_at'])
+        return pending
+
+    return TranslationJob.objects.create(
+        recipe=recipe,
+        source_lang=source_lang,
+        original_data=original_data,
+    )
+
+
+def requeue_stale_jobs(timeout=STALE_JOB_TIMEOUT):
+    # Trabajos que quedaron "en curso" porque el worker murió a mitad
+    return TranslationJob.objects.filter(
+        status=TranslationJobStatus.RUNNING,
+        updated_at__lt=timezone.now() - timeout,
+    ).update(status=TranslationJobStatus.PENDING, updated_at=timezone.now())
+
+
+def claim_next_job():
+    with transaction.atomic():
+        qs = TranslationJob.objects.filter(
+            status=TranslationJobStatus.PENDING,
+            run_after__lte=timezone.now(),
+        ).order_by('run_after', 'pk')
+
+        if connection.features.has_select_for_update_skip_locked:
+            qs = qs.select_for_update(skip_locked=True)
+
+        job = qs.first()
+        if job is None:
+            return None
+
+        job.status = TranslationJobStatus.RUNNING
+        job.attempts += 1
+        job.save(update_fields=['status', 'attempts', 'updated_at'])
+    return job
+
+
+def _schedule_retry(job, error):
+    if job.attempts >= job.max_attempts:
+        job.status = TranslationJobStatus.FAILED
+    else:
+        job.status = TranslationJobStatus.PENDING
+        job.run_after = timezone.now() + timedelta(seconds=RETRY_BASE_DELAY * 2 ** (job.attempts - 1))
+    job.last_error = str(error)
+
+
+def run_job(job):
+    try:
+        with profile_save('translation_job', recipe_id=job.recipe_id):
+            recipe = Recipe.objects.get(pk=job.recipe_id)
+            recipe.set_current_language(job.source_lang)
+            handle_translations_for_recipe(
+                recipe, job.source_lang,
+                original_data=job.original_data,
+                target_langs=job.pending_langs,
+            )
+    except TranslationUnavailable as e:
+        # El servicio no responde: los idiomas pendientes se reintentan más tarde
+        logging.warning(f"Translation job {job.pk}: {e}")
+        job.pending_langs = e.languages
+        _schedule_retry(job, e)
+    except Exception as e:
+        logging.exception(f"Translation job {job.pk} failed (attempt {job.attempts}/{job.max_attempts})")
+        _schedule_retry(job, e)
+    else:
+        job.status = TranslationJobStatus.DONE
+        job.pending_langs = None
+        job.last_error = ''
+
+    # update() en lugar de save(): la receta (y su trabajo) pudo borrarse mientras tanto
+    TranslationJob.objects.filter(pk=job.pk).update(
+        status=job.status,
+        pending_langs=job.pending_langs,
+        run_after=job.run_after,
+        last_error=job.last_error,
+        updated_at=timezone.now(),
+    )
+    return job
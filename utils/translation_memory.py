@@ -0,0 +1,128 @@
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from django.db import connection
+from django.db.models import F, Q
+from django.utils import timezone
+from recipes.models import TranslationMemory
+
+TRANSLATION_MEMORY_SIZE = int(os.getenv("TRANSLATION_MEMORY_SIZE", "5000"))
+TRANSLATION_MEMORY_TTL_DAYS = int(os.getenv("TRANSLATION_MEMORY_TTL_DAYS", "180"))
+
+_whitespace_re = re.compile(r'\s+')
+
+def normalize_source_text(text):
+    """Normaliza el texto de origen para la clave de caché: sin espacios extra."""
+    return _whitespace_re.sub(' ', text).strip()
+
+def hash_text(text):
+    return hashlib.sha256(normalize_source_text(text).encode('utf-8')).hexdigest()
+
+
+class TranslationCache:
+    """Memoria de traducción en dos niveles: LRU en memoria del proceso + tabla TranslationMemory."""
+
+    def __init__(self, maxsize=TRANSLATION_MEMORY_SIZE, ttl_days=TRANSLATION_MEMORY_TTL_DAYS):
+        self.maxsize = maxsize
+        self.ttl = timedelta(days=ttl_days)
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'memory_hits': 0, 'db_hits': 0, 'misses': 0, 'stores': 0}
+
+    def _key(self, text, source_lang, target_lang):
+        return (source_lang, target_lang, hash_text(text))
+
+    def _remember(self, key, translated):
+        with self._lock:
+            self._lru[key] = translated
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.maxsize:
+                self._lru.popitem(last=False)
+
+    def get_many(self, items):
+        """Recibe tuplas (texto, origen, destino) y devuelve {tupla: traducción} de las que estén en memoria."""
+        found = {}
+        missing = {}
+
+        with self._lock:
+            for item in items:
+                key = self._key(*item)
+                if key in self._lru:
+                    self._lru.move_to_end(key)
+                    found[item] = self._lru[key]
+                    self.stats['memory_hits'] += 1
+                else:
+                    missing[key] = item
+
+        if not missing:
+            return found
+
+        query = Q()
+        for source_lang, target_lang, text_hash in missing:
+            query |= Q(source_lang=source_lang, target_lang=target_lang, text_hash=text_hash)
+
+        rows = TranslationMemory.objects.filter(query, last_used_at__gte=timezone.now() - self.ttl)
+
+        used_ids = []
+        for row in rows:
+            key = (row.source_lang, row.target_lang, row.text_hash)
+            item = missing.get(key)
+            # Se compara el texto para descartar colisiones de hash
+            if item is None or normalize_source_text(item[0]) != row.source_text:
+                continue
+            found[item] = row.translated_text
+            used_ids.append(row.pk)
+            self._remember(key, row.translated_text)
+            del missing[key]
+
+        if used_ids:
+            TranslationMemory.objects.filter(pk__in=used_ids).update(hits=F('hits') + 1, last_used_at=timezone.now())
+
+        with self._lock:
+            self.stats['db_hits'] += len(used_ids)
+            self.stats['misses'] += len(missing)
+
+        return found
+
+    def set_many(self, translations):
+        """Guarda {(texto, origen, destino): traducción}; solo deben llegar traducciones correctas."""
+        if not translations:
+            return
+
+        rows = []
+        for (text, source_lang, target_lang), translated in translations.items():
+            key = self._key(text, source_lang, target_lang)
+            self._remember(key, translated)
+            rows.append(TranslationMemory(
+                source_lang=source_lang,
+                target_lang=target_lang,
+                text_hash=key[2],
+                source_text=normalize_source_text(text),
+                translated_text=translated,
+            ))
+
+        # Si ya existía (p. ej. caducada) se refresca con la nueva traducción
+        TranslationMemory.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            # MySQL no admite indicar la restricción (ON DUPLICATE KEY UPDATE usa cualquiera)
+            unique_fields=(
+                ['source_lang', 'target_lang', 'text_hash']
+                if connection.features.supports_update_conflicts_with_target else None
+            ),
+            update_fields=['source_text', 'translated_text', 'last_used_at'],
+        )
+        with self._lock:
+            self.stats['stores'] += len(rows)
+
+    def prune(self):
+        """Elimina de la tabla las entradas no usadas durante más del TTL."""
+        deleted, _ = TranslationMemory.objects.filter(last_used_at__lt=timezone.now() - self.ttl).delete()
+        return deleted
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
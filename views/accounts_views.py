@@ -16,6 +16,9 @@ from django.views.generic import View, CreateView
 from accounts.models import AVATAR_CHOICES, UserProfile
 from forms.account_forms import CustomUserCreationForm, CustomUserForm, UserProfileForm
 from recipes.models import Comment, Favorite, Rating, Recipe
+from utils.comments import decode_cursor, load_comment_page
+
+PROFILE_COMMENTS_PER_PAGE = 20
 
 class RegisterView(CreateView):
     form_class = CustomUserCreationForm
@@ -47,25 +50,42 @@ class UserProfileView(LoginRequiredMixin, View):
         favorite_qs = Favorite.objects.filter(user=user).select_related('recipe')
         last_checked = profile.last_checked_comments or now()
 
-        my_comments = Comment.objects.filter(user=user, parent__isnull=True).select_related("recipe").order_by("-created_at")
+        # Listas del buzón paginadas por keyset (cada una con su cursor en la URL),
+        # con la receta y su traducción en la misma tanda
+        my_comments, my_comments_cursor = load_comment_page(
+            Comment.objects.filter(user=user, parent__isnull=True)
+            .select_related("recipe")
+            .prefetch_related("recipe__translations"),
+            decode_cursor(request.GET.get('my_comments')),
+            PROFILE_COMMENTS_PER_PAGE,
+        )
         
         new_replies_to_my_comments = Comment.objects.filter(
             parent__user=user
         ).exclude(user=user).filter(created_at__gt=last_checked)
 
-        replies_to_my_comments = Comment.objects.filter(
-            parent__user=user
-        ).exclude(user=user).select_related("recipe", "user", "parent").order_by("-created_at")
+        replies_to_my_comments, replies_cursor = load_comment_page(
+            Comment.objects.filter(parent__user=user)
+            .exclude(user=user)
+            .select_related("recipe", "user", "parent")
+            .prefetch_related("recipe__translations"),
+            decode_cursor(request.GET.get('replies')),
+            PROFILE_COMMENTS_PER_PAGE,
+        )
 
         new_comments_on_my_recipes = Comment.objects.filter(
             recipe__author=user,
             parent__isnull=True
         ).exclude(user=user).filter(created_at__gt=last_checked)
 
-        comments_on_my_recipes = Comment.objects.filter(
-            recipe__author=user,
-            parent__isnull=True
-        ).exclude(user=user).select_related("recipe", "user").order_by("-created_at")
+        comments_on_my_recipes, recipe_comments_cursor = load_comment_page(
+            Comment.objects.filter(recipe__author=user, parent__isnull=True)
+            .exclude(user=user)
+            .select_related("recipe", "user")
+            .prefetch_related("recipe__translations"),
+            decode_cursor(request.GET.get('recipe_comments')),
+            PROFILE_COMMENTS_PER_PAGE,
+        )
 
         # Guardar nuevo last_checked
         profile.last_checked_comments = now()
@@ -79,6 +99,9 @@ class UserProfileView(LoginRequiredMixin, View):
             "my_comments": my_comments,
             "replies_to_my_comments": replies_to_my_comments,
             "comments_on_my_recipes": comments_on_my_recipes,
+            "my_comments_cursor": my_comments_cursor,
+            "replies_cursor": replies_cursor,
+            "recipe_comments_cursor": recipe_comments_cursor,
             "new_replies_to_my_comments": new_replies_to_my_comments,
             "new_comments_on_my_recipes": new_comments_on_my_recipes,
             "has_new_replies": new_replies_to_my_comments.exists(),
@@ -7,7 +7,8 @@ from django.views.generic import FormView, TemplateView
 from accounts.models import AVATAR_CHOICES, Contact
 from forms.account_forms import ContactForm
 from forms.recipes_forms import SearchForm
-from recipes.models import Category, Recipe
+from recipes.models import Category
+from utils.sampling import FEATURED
 from utils.search_recipes import search_recipes
 from views.recipes_views import CATEGORY_IMAGES
 
@@ -18,7 +19,7 @@ class HomeView(TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        featured_recipes = Recipe.objects.filter(featured=True).exclude(photo='').order_by('?')[:4]
+        featured_recipes = FEATURED.sample(4)
         for recipe in featured_recipes:
             recipe.rotacion = randint(-5, 5) #type: ignore
 
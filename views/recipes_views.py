@@ -1,202 +1,147 @@
-import random
-from django.db import transaction
-from django.db.models import Avg, Count
+from asgiref.sync import sync_to_async
 from django.contrib import messages
 from django.http import Http404, HttpResponseRedirect, JsonResponse
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView
 from django.template.loader import render_to_string
 from django.views.decorators.http import require_POST
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from django.utils import translation
+from django.utils.cache import patch_cache_control
+from django.utils.formats import date_format
+from django.utils.timezone import localtime
 from django.utils.translation import gettext_lazy as _, get_language
-from django.shortcuts import get_object_or_404, render,  redirect
+from django.shortcuts import aget_object_or_404, get_object_or_404, render,  redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.middleware.csrf import get_token
 from django.forms import ValidationError
 from parler.utils.context import switch_language
-from recipes.models import TRANSLATION_LANGS, Category, Comment,  Favorite,  Rating, Recipe, CuisineType
+from recipes.models import TRANSLATION_LANGS, Category, Comment, Rating, Recipe
 from forms.recipes_forms import RecipeForm, CommentForm, get_recipe_ingredient_formset
-from utils.helpers import format_quantity, get_current_theme_slugs, process_ingredients_formset, save_photo_if_exists, save_recipe_object
-from utils.translation import   handle_translations_for_recipe
+from utils.comments import decode_cursor, load_comment_threads, load_more_replies
+from utils.detail_cache import detail_version, get_detail_page, set_detail_page
+from utils.helpers import get_current_theme_slugs
+from utils.favorites import get_favorite_ids, toggle_recipe_favorite
+from utils.profiling import profile_save, stage
+from utils.ratings import set_rating
+from utils.sampling import BY_CATEGORY, RANDOM_BY_LANGUAGE
+from utils.shelves import get_shelves
+from utils.snapshots import build_snapshot, get_snapshot, snapshot_context
+from utils.recipe_save import save_recipe
 
 
 class RecipeListView(ListView):
     model = Recipe
     template_name = 'core/recipe_list.html'
     context_object_name = 'recipes'
-    paginate_by = 12
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        # Top recetas mejor valoradas (average_rating anotado)
-        top_recipes = (
-            Recipe.objects
-            .annotate(avg_rating=Avg('ratings__score'))
-            .filter(avg_rating__gte=4)
-            .order_by('-avg_rating')[:10]
-        )
-        context['top_recipes'] = top_recipes
-
-        # Recetas recientes (las más nuevas)
-        recent_recipes = Recipe.objects.all().order_by('-created_at')[:10]
-        context['recent_recipes'] = recent_recipes
-
-        # Recetas fáciles (por campo difficulty)
-        easy_recipes = Recipe.objects.filter(difficulty='easy').order_by('?')[:10]
-        context['easy_recipes'] = easy_recipes
-
-        # Cocina más popular según número de recetas
-        popular_cuisine = (
-            CuisineType.objects
-            .annotate(num_recipes=Count('recipes'))
-            .order_by('-num_recipes')
-            .first()
-        )
-        context['popular_cuisine'] = popular_cuisine
-        
-        if popular_cuisine:
-            cuisine_recipes = Recipe.objects.filter(cuisine_type=popular_cuisine).order_by('?')[:10]
-        else:
-            cuisine_recipes = []
-        context['cuisine_recipes'] = cuisine_recipes
-        
-        # Popular = recetas más favoritas
-        popular_recipes = (
-            Recipe.objects
-            .annotate(num_favorites=Count('favorited_by'))
-            .filter(num_favorites__gt=0)
-            .order_by('?')[:10]
-        )
-        context['popular_recipes'] = popular_recipes
-        
-        language = get_language()
 
-        current_theme_slugs = get_current_theme_slugs()
-        
-        from recipes.signals import translations
-        theme_names = []
-        for slug in current_theme_slugs:
-            if slug in translations.get(language, {}).get('themes', {}):
-                theme_name = translations[language]['themes'][slug]
-                theme_names.append(theme_name)
-        
-        actualidad_recipes = Recipe.objects.none()
-        
-        if current_theme_slugs:
-            actualidad_recipes = (
-                Recipe.objects.filter(
-                    themes__translations__name__in=theme_names,
-                    themes__translations__language_code=language
-                )
-                .distinct()
-                .order_by('?')[:10]
-            )
-        
-        context['actualidad_recipes'] = actualidad_recipes
-        context['theme_name'] = theme_names[0] if theme_names else translations[language]['themes'].get(current_theme_slugs[-1], '')
+        # Top valoradas, recientes, fáciles, cocina más popular, favoritas y actualidad:
+        # ids cacheados por idioma (utils.shelves) y una sola carga de tarjetas
+        context.update(get_shelves(get_language(), get_current_theme_slugs()))
 
         return context
 
 def recipe_detail(request, slug):
     current_lang = get_language()
-    try:
-        recipe = Recipe.objects.prefetch_related(
-            'recipe_ingredients__ingredient',
-            'recipe_ingredients__unit',
-            'meal_types',
-            'cooking_methods',
-            'tags',
-            'themes',
-            'allergens',
-            'ratings',
-        ).select_related(
-            'author',
-            'category',
-            'cuisine_type'
-        ).get(translations__slug=slug)
-    except Recipe.DoesNotExist:
-        raise Http404(_("Receta no encontrada en el idioma actual."))
-    
-    with switch_language(recipe, current_lang):
-        translated_slug = recipe.slug #type: ignore
-
-    if translated_slug and translated_slug != slug:
-        return redirect('recipes:recipe_detail', slug=translated_slug)
-
-    # Traducciones seguras
-    title = recipe.safe_translation_getter("title", any_language=True)
-    description = recipe.safe_translation_getter("description", any_language=True)
-    instructions = recipe.safe_translation_getter("instructions", any_language=True)
-    tips = recipe.safe_translation_getter("tips", any_language=True)
-
-    # Ingredientes traducidos
-    ingredients = []
-    for ri in recipe.recipe_ingredients.all():  # type: ignore
-        ingredients.append({
-            'quantity': format_quantity(ri.quantity),
-            'unit': ri.unit,
-            'ingredient_name': ri.ingredient.safe_translation_getter("name", any_language=True)
-        })
-    total_votes = recipe.ratings.count() # type: ignore
-    average = recipe.ratings.aggregate(avg=Avg('score'))['avg'] or 0
-    full_slices = int(average)  # trozos completos
-    half_slice = 1 if (average - full_slices) >= 0.5 else 0
-    empty_slices = 5 - full_slices - half_slice
+    authenticated = request.user.is_authenticated
+    # Solo se cachea la primera página de comentarios
+    comments_cursor = request.GET.get('comments')
+    if not comments_cursor:
+        page = get_detail_page(current_lang, slug, authenticated)
+        if page is not None:
+            return render(request, 'core/recipe_detail.html', page)
+
+    # Ficha precalculada (una lectura por clave primaria); si falta se construye con la carga completa
+    snapshot = get_snapshot(current_lang, slug)
+    if snapshot is None:
+        try:
+            recipe = Recipe.objects.prefetch_related(
+                'recipe_ingredients__ingredient',
+                'recipe_ingredients__unit',
+                'meal_types',
+                'cooking_methods',
+                'tags',
+                'themes',
+                'allergens',
+            ).select_related(
+                'author',
+                'category',
+                'cuisine_type'
+            ).get(translations__slug=slug)
+        except Recipe.DoesNotExist:
+            raise Http404(_("Receta no encontrada en el idioma actual."))
+
+        with switch_language(recipe, current_lang):
+            translated_slug = recipe.slug #type: ignore
+
+        if translated_slug and translated_slug != slug:
+            return redirect('recipes:recipe_detail', slug=translated_slug)
+
+        snapshot = build_snapshot(recipe, current_lang, slug)
+
+    recipe_id = snapshot.recipe_id # type: ignore
+    version = detail_version(recipe_id)
+    context = snapshot_context(snapshot)
+    image_url = Recipe._meta.get_field('photo').storage.url(context['photo']) if context['photo'] else '' # type: ignore
 
     recommended_recipes = []
-    if recipe.category:
-        recommended_recipes = Recipe.objects.filter(
-            category=recipe.category
-        ).exclude(id=recipe.id).order_by('?')[:4] # type: ignore
-    
-    is_favorited = False
-    selected_rating = None
-    if request.user.is_authenticated:
-        is_favorited = recipe.favorited_by.filter(user=request.user).exists()  # type: ignore
-        rating = recipe.ratings.filter(user=request.user).first()  # type: ignore
-        selected_rating = rating.score if rating else None
-        
-    context = {
-        'recipe': recipe,
-        'title': title,
-        'description': description,
-        'instructions': instructions,
-        'tips': tips,
-        'image': recipe.photo,
-        'ingredients': ingredients,
-        'author': recipe.author,
-        'category': recipe.category,
-        'cuisine_type': recipe.cuisine_type,
-        'prep_time': recipe.prep_time,
-        'cook_time': recipe.cook_time,
-        'servings': recipe.servings,
-        'difficulty': recipe.get_difficulty_display(), # type: ignore
-        'meal_types': recipe.meal_types.all(),
-        'tags': recipe.tags.all(),
-        'themes': recipe.themes.all(),
-        'cooking_methods': recipe.cooking_methods.all(),
-        'allergens': recipe.allergens.all(),
-        'slug_translated': recipe.safe_translation_getter('slug', any_language=True),
-        'average_rating': recipe.average_rating,
-        'total_time': recipe.total_time,
-        'total_votes': total_votes,
-        'full_slices': range(full_slices),
-        'half_slice': half_slice,
-        'empty_slices': range(empty_slices),
-        'recommended_recipes': recommended_recipes,
-    }
+    if context['category_id']:
+        recommended_recipes = BY_CATEGORY.sample(4, context['category_id'], exclude=[recipe_id])
 
-    comment_form = CommentForm()
-    comments = recipe.comments.select_related('user').filter(parent__isnull=True)  # type: ignore
+    # Página de comentarios raíz (keyset) con las primeras respuestas de cada hilo
+    comments, next_comments_cursor = load_comment_threads(recipe_id, decode_cursor(comments_cursor))
 
     context.update({
+        'image_url': image_url,
+        'recommended_recipes': recommended_recipes,
         'comments': comments,
-        'comment_form': comment_form,
-        'is_favorited': is_favorited,
-        'selected_rating': selected_rating,
+        'next_comments_cursor': next_comments_cursor,
+        # Lo único que depende del visitante; el resto (favorita, valoración, botones de autor
+        # y token CSRF) lo rellena la página con recipe_user_state_json
+        'is_authenticated': authenticated,
+        'user_state_url': reverse('recipes:recipe_user_state_json', kwargs={'slug': slug}),
+        'share_url': request.build_absolute_uri(request.path),
     })
 
-    return render(request, 'core/recipe_detail.html', context)
+    page = {
+        'pk': recipe_id,
+        'version': version,
+        'title': context['title'],
+        'image_url': image_url,
+        # Sin request: el cuerpo cacheado es el mismo para cualquier visitante de la variante
+        'body': render_to_string('_includes/_recipe_detail_body.html', context),
+    }
+    if not comments_cursor:
+        set_detail_page(current_lang, slug, authenticated, page)
+    return render(request, 'core/recipe_detail.html', page)
+
+
+async def recipe_user_state_json(request, slug):
+    """Estado del visitante sobre la página de detalle cacheada, que es igual para todos."""
+    recipe = await Recipe.objects.filter(translations__slug=slug).values('pk', 'author_id').afirst()
+    if recipe is None:
+        return JsonResponse({"error": "Recipe not found"}, status=404)
+
+    user = await request.auser()
+    state = {
+        "is_favorited": False,
+        "selected_rating": None,
+        "is_author": False,
+        "csrf_token": get_token(request),
+    }
+    if user.is_authenticated:
+        favorite_ids = await sync_to_async(get_favorite_ids)(user)
+        state.update({
+            "is_favorited": recipe['pk'] in favorite_ids,
+            "selected_rating": await Rating.objects.filter(recipe_id=recipe['pk'], user=user).values_list('score', flat=True).afirst(),
+            "is_author": recipe['author_id'] == user.pk,
+        })
+    response = JsonResponse(state)
+    patch_cache_control(response, private=True, no_cache=True, max_age=0)
+    return response
 
 
 CATEGORY_INTROS = {
@@ -295,21 +240,18 @@ class RecipeCreateView(LoginRequiredMixin,CreateView):
 
         return context       
 
-    @transaction.atomic
     def form_valid(self, form):
         RecipeIngredientFormSet = get_recipe_ingredient_formset(extra=3)
-        
-        self.object = save_recipe_object(form, self.request) 
 
-        save_photo_if_exists(self.object, form)
-
-        formset = RecipeIngredientFormSet(self.request.POST, instance=self.object, prefix="ingredients")
+        # Se valida todo antes de escribir nada
+        formset = RecipeIngredientFormSet(self.request.POST, instance=form.instance, prefix="ingredients")
         if not formset.is_valid():
             return self.form_invalid(form, formset)
 
-        process_ingredients_formset(formset, get_language()[:2])
-        formset.save()
-        
+        with profile_save('create') as profile:
+            self.object = save_recipe(form, formset, self.request)
+            profile.recipe_id = self.object.pk
+
         if self.request.headers.get('x-requested-with') == 'XMLHttpRequest':
             return JsonResponse({
                 'redirect_url': str(self.get_success_url()),
@@ -374,19 +316,16 @@ class RecipeUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
         return obj
 
     def form_valid(self, form):
-        original_data = {field: getattr(self.get_object(), field) for field in ['title', 'description', 'instructions', 'tips']}
-
-        self.object = save_recipe_object(form, self.request, is_update=True)
-
         formset = self.get_ingredient_formset()
-
         if not formset.is_valid():
             return self.form_invalid(form, formset)
-        
-        process_ingredients_formset(formset, get_language()[:2])
-        formset.save()
 
-        handle_translations_for_recipe(self.object, get_language()[:2], original_data=original_data)
+        with profile_save('update', recipe_id=self.object.pk):
+            # self.object ya tiene los datos del formulario: el original se relee de la base de datos
+            with stage('load_original'):
+                original_data = {field: getattr(self.get_object(), field) for field in ['title', 'description', 'instructions', 'tips']}
+
+            self.object = save_recipe(form, formset, self.request, original_data=original_data)
 
         if self.request.headers.get('x-requested-with') == 'XMLHttpRequest':
             return JsonResponse({
@@ -397,6 +336,7 @@ class RecipeUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
         
         # Para peticiones normales (no AJAX) añadimos el mensaje a Django
         messages.success(self.request, _("Receta actualizada con éxito."))
+        return HttpResponseRedirect(self.get_success_url())
 
     def get_success_url(self):
         url = reverse_lazy('recipes:recipe_detail', kwargs={'slug': self.object.slug})
@@ -448,102 +388,162 @@ class RecipeDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
         recipe = self.get_object()
         return recipe.author == self.request.user #type: ignore
 
+def _wants_json(request):
+    # Las interacciones hechas con fetch piden JSON; los formularios clásicos, redirección
+    return 'application/json' in request.headers.get('Accept', '')
+
+
 @login_required
-def rate_recipe(request, slug):
-    recipe = get_object_or_404(Recipe.objects.language(request.LANGUAGE_CODE), translations__slug=slug) #type: ignore
-    
+async def rate_recipe(request, slug):
+    recipe = await aget_object_or_404(Recipe.objects.language(request.LANGUAGE_CODE), translations__slug=slug) #type: ignore
+    user = await request.auser()
+
+    def reject(message):
+        if _wants_json(request):
+            return JsonResponse({"error": str(message)}, status=400)
+        messages.error(request, message)
+        return redirect("recipes:recipe_detail", slug=slug)
+
     try:
         rating_value = int(request.POST.get("rating", 0))
     except (ValueError, TypeError):
-        messages.error(request, _("Valoración inválida."))
-        return redirect("recipes:recipe_detail", slug=slug)
+        return reject(_("Valoración inválida."))
 
     if rating_value < 1 or rating_value > 5:
-        messages.error(request, _("La puntuación debe estar entre 1 y 5."))
-        return redirect("recipes:recipe_detail", slug=slug)
+        return reject(_("La puntuación debe estar entre 1 y 5."))
     
-    if recipe.author == request.user:
-        messages.error(request, _("No puedes valorar tu propia receta."))
-        return redirect("recipes:recipe_detail", slug=slug)
+    if recipe.author_id == user.pk:
+        return reject(_("No puedes valorar tu propia receta."))
+
+    # Crea o actualiza la valoración junto con los agregados de la receta (transacción: hilo síncrono)
+    await sync_to_async(set_rating)(recipe, user, rating_value)
+
+    if _wants_json(request):
+        await recipe.arefresh_from_db(fields=['rating_count', 'rating_avg'])
+        return JsonResponse({"score": rating_value, "average": recipe.rating_avg, "votes": recipe.rating_count})
 
-    # Actualiza o crea la valoración
-    Rating.objects.update_or_create(
-        recipe=recipe,
-        user=request.user,
-        defaults={"score": rating_value}
-    )
-    
     messages.success(request, _(f"⭐ Valoraste con {rating_value} estrella(s)."))
     return redirect("recipes:recipe_detail", slug=slug)
 
 
+def _save_comment(data, user, recipe, parent):
+    """Valida y guarda un comentario. Devuelve (comentario o None, errores)."""
+    form = CommentForm(data, user=user, recipe=recipe, parent=parent)
+    if not form.is_valid():
+        return None, [error for field_errors in form.errors.values() for error in field_errors]
+
+    comment = form.save(commit=False)
+    comment.user = user
+    comment.recipe = recipe
+    comment.parent = parent
+    try:
+        comment.full_clean()
+        comment.save()
+    except ValidationError as e:
+        return None, e.messages
+    return comment, []
+
+
 @login_required
-def add_comment(request, slug):
-    recipe = get_object_or_404(
+async def add_comment(request, slug):
+    recipe = await aget_object_or_404(
         Recipe.objects.language(request.LANGUAGE_CODE), #type: ignore
         translations__slug=slug
     )
+    user = await request.auser()
     
     parent_id = request.POST.get("parent_id")
     parent = None
     if parent_id:
-        parent = get_object_or_404(Comment, id=parent_id)
-
-    form = CommentForm(request.POST, user=request.user, recipe=recipe, parent=parent)
+        parent = await aget_object_or_404(Comment, id=parent_id, recipe=recipe)
 
     if request.method == "POST":
-        if form.is_valid():
-            comment = form.save(commit=False)
-            comment.user = request.user
-            comment.recipe = recipe
-            comment.parent = parent
-
-            try:
-                comment.full_clean()
-                comment.save()
-                messages.success(request, _("🗨️ Comentario añadido correctamente."))
-            except ValidationError as e:
-                for msg in e.messages:
-                    messages.error(request, msg)
+        comment, errors = await sync_to_async(_save_comment)(request.POST, user, recipe, parent)
+
+        if _wants_json(request):
+            if errors:
+                return JsonResponse({"errors": [str(error) for error in errors]}, status=400)
+            return JsonResponse({"id": comment.id, "parent_id": comment.parent_id, "root_id": comment.root_id}, status=201) # type: ignore
+
+        if errors:
+            for error in errors:
+                messages.error(request, error) #type: ignore
         else:
-            for field_errors in form.errors.values():
-                for error in field_errors:
-                    messages.error(request, error) #type: ignore
+            messages.success(request, _("🗨️ Comentario añadido correctamente."))
 
     return redirect('recipes:recipe_detail', slug=slug)
 
 
-def random_recipe_json(request):
-    recipes = Recipe.objects.all()
-    if recipes.exists():
-        recipe = random.choice(recipes)
-        return JsonResponse({
-            "title": recipe.title, #type: ignore
-            "image_url": recipe.photo.url,
-            "url": recipe.get_absolute_url(),
+def comment_replies_json(request, slug, comment_id):
+    root = get_object_or_404(
+        Comment,
+        id=comment_id,
+        parent__isnull=True,
+        recipe__in=Recipe.objects.filter(translations__slug=slug),
+    )
+    replies, next_cursor = load_more_replies(root, decode_cursor(request.GET.get('after')))
+
+    return JsonResponse({
+        "replies": [
+            {
+                "id": reply.id, # type: ignore
+                "parent_id": reply.parent_id, # type: ignore
+                "username": reply.user.username,
+                "avatar_url": reply.user.get_avatar_url(), # type: ignore
+                "created_at": date_format(localtime(reply.created_at), "SHORT_DATETIME_FORMAT"),
+                "content": reply.content,
+            }
+            for reply in replies
+        ],
+        "next": next_cursor,
+    })
+
+
+async def random_recipe_json(request):
+    language = get_language()
+    # Array de ids del idioma (con foto y traducción) y una lectura por pk de las columnas que se devuelven
+    recipe = None
+    for _attempt in range(3):
+        pk = await sync_to_async(RANDOM_BY_LANGUAGE.choice)(language)
+        if pk is None:
+            break
+        recipe = await (
+            Recipe.objects.filter(pk=pk, translations__language_code=language)
+            .exclude(photo='')
+            .values('photo', 'translations__title', 'translations__slug')
+            .afirst()
+        )
+        if recipe and recipe['translations__slug']:
+            break
+        # Borrada, sin foto o sin traducción desde que se construyó el array
+        recipe = None
+        await sync_to_async(RANDOM_BY_LANGUAGE.discard)(pk, language)
+
+    if not recipe:
+        response = JsonResponse({"error": "No recipes available."}, status=404)
+    else:
+        response = JsonResponse({
+            "title": recipe['translations__title'],
+            "image_url": Recipe._meta.get_field('photo').storage.url(recipe['photo']),
+            "url": reverse('recipes:recipe_detail', kwargs={'slug': recipe['translations__slug']}),
         })
-    return JsonResponse({"error": "No recipes available."}, status=404)
+    # Cada clic en "sorpréndeme" tiene que sortear de nuevo: que ni el navegador ni un proxy
+    # sirvan la misma receta a todos
+    patch_cache_control(response, private=True, no_cache=True, max_age=0)
+    return response
 
 @require_POST
 @login_required
-def toggle_favorite(request):
+async def toggle_favorite(request):
     slug = request.POST.get("slug")
     if not slug:
         return JsonResponse({"error": "Missing slug"}, status=400)
 
-    try:
-        recipe = get_object_or_404(Recipe, translations__slug=slug)
-    except Exception as e:
-        return JsonResponse({"error": "Recipe not found or error: " + str(e)}, status=404)
-
-    user = request.user
+    recipe_id = await Recipe.objects.filter(translations__slug=slug).values_list('pk', flat=True).afirst()
+    if recipe_id is None:
+        return JsonResponse({"error": "Recipe not found"}, status=404)
 
-    try:
-        favorite, created = Favorite.objects.get_or_create(user=user, recipe=recipe)
-        if not created:
-            favorite.delete()
-            return JsonResponse({"status": "removed"})
-        else:
-            return JsonResponse({"status": "added"})
-    except Exception as e:
-        return JsonResponse({"error": "Database error: " + str(e)}, status=500)
\ No newline at end of file
+    user = await request.auser()
+    added = await sync_to_async(toggle_recipe_favorite)(recipe_id, user)
+    favorite_count = await Recipe.objects.filter(pk=recipe_id).values_list('favorite_count', flat=True).afirst()
+    return JsonResponse({"status": "added" if added else "removed", "favorite_count": favorite_count})